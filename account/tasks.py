@@ -0,0 +1,22 @@
+from django.template.loader import render_to_string
+from django.utils.encoding import force_bytes
+from django.utils.http import urlsafe_base64_encode
+
+from .models import UserBase
+from .tokens import account_activation_token
+
+
+def send_activation_email(user_id, domain):
+    """
+    Background job queued by account_register.
+    """
+    user = UserBase.objects.filter(pk=user_id, is_active=False).first()
+    if user is None:
+        return
+    message = render_to_string('account/registration/account_activation_email.html', {
+        'user': user,
+        'domain': domain,
+        'uid': urlsafe_base64_encode(force_bytes(user.pk)),
+        'token': account_activation_token.make_token(user),
+    })
+    user.email_user(subject='Activate your Account', message=message)
@@ -1,3 +1,85 @@
+from datetime import timedelta
+from decimal import Decimal
+
+from django.core import mail
+from django.db import connection
 from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from jobs.queue import run_pending
+from orders.models import Order, OrderItem
+from store.models import Product
+from .models import UserBase
+
+
+class RegistrationTestCase(TestCase):
+
+    def test_activation_email_is_sent_by_a_job(self):
+        response = self.client.post(reverse('account:register'), {
+            'user_name': 'newcomer', 'email': 'newcomer@example.com',
+            'password': 'a-long-password', 'password2': 'a-long-password',
+        })
+        self.assertEqual(response.status_code, 200)
+        self.assertFalse(UserBase.objects.get(email='newcomer@example.com').is_active)
+        self.assertEqual(mail.outbox, [])
+
+        self.assertEqual(run_pending(), 1)
+        self.assertEqual(len(mail.outbox), 1)
+        self.assertEqual(mail.outbox[0].to, ['newcomer@example.com'])
+
+
+class DashboardTestCase(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = UserBase.objects.create(email='till@example.com', user_name='till', is_active=True)
+        cls.staff = UserBase.objects.create(email='staff@example.com', user_name='staff', is_active=True,
+                                            is_staff=True)
+        cls.products = Product.objects.bulk_create([
+            Product(created_by=cls.user, title=f'tile-{i}', slug=f'tile-{i}', price=Decimal('2.50'))
+            for i in range(3)
+        ])
+
+    def place_orders(self, count, days_ago=0):
+        orders = Order.objects.bulk_create([
+            Order(user=self.user, full_name='cust', address1='', phone='', total_paid=Decimal('7.50'),
+                  billing_status=True, created=timezone.now() - timedelta(days=days_ago))
+            for _ in range(count)
+        ])
+        OrderItem.objects.bulk_create([
+            OrderItem(order=order, product=product, price=product.price, quantity=1)
+            for order in Order.objects.filter(items__isnull=True) for product in self.products
+        ])
+
+    def dashboard_queries(self, user, **params):
+        self.client.force_login(user)
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get(reverse('account:dashboard'), params)
+        self.assertEqual(response.status_code, 200)
+        return response, len(ctx.captured_queries)
+
+    def test_query_count_does_not_grow_with_orders(self):
+        self.place_orders(2)
+        self.dashboard_queries(self.user)  # warm the category cache
+        _, few = self.dashboard_queries(self.user)
+        self.place_orders(30)
+        response, many = self.dashboard_queries(self.user)
+
+        self.assertEqual(few, many)
+        self.assertEqual(len(response.context['orders']), 10)
+        self.assertEqual(response.context['orders'].paginator.count, 32)
+
+    def test_staff_see_a_date_window(self):
+        self.place_orders(2)
+        self.place_orders(3, days_ago=60)
+
+        response, _ = self.dashboard_queries(self.staff)
+        self.assertEqual(response.context['orders'].paginator.count, 2)
 
-# Create your tests here.
+        start = timezone.localdate() - timedelta(days=90)
+        response, _ = self.dashboard_queries(self.staff, mode='summary', start_date=start)
+        summary = response.context['summary']
+        self.assertEqual((summary['orders'], summary['revenue']), (5, Decimal('37.50')))
+        self.assertEqual([day['orders'] for day in summary['days']], [3, 2])
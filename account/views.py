@@ -1,12 +1,16 @@
 from django.contrib.auth import login, logout
 from django.contrib.auth.decorators import login_required
 from django.contrib.sites.shortcuts import get_current_site
+from django.core.paginator import Paginator
 from django.http import HttpResponse
 from django.shortcuts import redirect, render
-from django.template.loader import render_to_string
-from django.utils.encoding import force_bytes, force_str
-from django.utils.http import urlsafe_base64_decode, urlsafe_base64_encode
+from django.utils.encoding import force_str
+from django.utils.http import urlsafe_base64_decode
+from django.db import transaction
 from django.db.models import Sum
+from jobs.queue import enqueue
+from orders.forms import DateWindowForm
+from orders.summaries import in_window, order_summary
 from orders.views import user_orders
 
 from .forms import RegistrationForm, UserEditForm
@@ -14,11 +18,30 @@ from .models import UserBase
 from .tokens import account_activation_token
 
 
+ORDERS_PER_PAGE = 10
+
+
 @login_required
 def dashboard(request):
     orders = user_orders(request)
+    context = {}
+    if request.user.is_staff or request.user.is_superuser:
+        # Staff see every order, so only a date window of them at a time
+        form = DateWindowForm(request.GET or None)
+        start, end = form.window()
+        context.update(form=form, start=start, end=end)
+        if request.GET.get('mode') == 'summary':
+            context['summary'] = order_summary(orders, start, end)
+            return render(request, 'account/user/dashboard.html', context)
+        orders = in_window(orders, start, end)
+
+    orders = orders.select_related('user').prefetch_related('items__product')
+    context['orders'] = Paginator(orders, ORDERS_PER_PAGE).get_page(request.GET.get('page'))
+    query = request.GET.copy()
+    query.pop('page', None)
+    context['query'] = query.urlencode()
     return render(request,
-                  'account/user/dashboard.html', {'orders':orders})
+                  'account/user/dashboard.html', context)
 
 @login_required
 def edit_details(request):
@@ -53,16 +76,11 @@ def account_register(request):
             user.email = registerForm.cleaned_data['email']
             user.set_password(registerForm.cleaned_data['password'])
             user.is_active = False
-            user.save()
-            current_site = get_current_site(request)
-            subject = 'Activate your Account'
-            message = render_to_string('account/registration/account_activation_email.html', {
-                'user': user,
-                'domain': current_site.domain,
-                'uid': urlsafe_base64_encode(force_bytes(user.pk)),
-                'token': account_activation_token.make_token(user),
-            })
-            user.email_user(subject=subject, message=message)
+            with transaction.atomic():
+                user.save()
+                enqueue('account.tasks.send_activation_email',
+                        {'user_id': user.pk, 'domain': get_current_site(request).domain},
+                        key=f'activation:{user.pk}')
             return HttpResponse('registered succesfully and activation sent')
     else:
         registerForm = RegistrationForm()
@@ -1,90 +1,130 @@
-from decimal import Decimal
-
+from store.catalog import price_version, prices
 from store.models import Product
-from django.conf import settings
+from .storage import get_storage
 
 
 class Basket():
     """
     A base Basket class, providing some default behaviors that
     can be inherited or overrided, as necessary.
+
+    The basket is stored as product ids and quantities, in parallel lists,
+    plus the catalog price version they were last written under. Prices
+    come from the cached price table and are for display: checkout
+    charges the prices in the database. Where it is stored is up to the
+    BASKET_STORAGE backend (see basket.storage), which is only written
+    when the content actually changes.
+
+    Product lookups and totals are memoized on the request, so every
+    Basket built during one request shares them. Any change to the basket
+    drops the memo.
     """
 
     def __init__(self, request):
-        self.session = request.session
-        basket = self.session.get('skey')
-        if 'skey' not in request.session:
-            basket = self.session['skey'] = {}
-        self.basket = basket
+        self.storage = get_storage(request)
+        self._memo = request.__dict__.setdefault('_basket_memo', {})
 
+    @property
+    def basket(self):
+        """
+        {product_id: qty} for every line, in the order they were added.
+        """
+        if 'items' not in self._memo:
+            data = self._data()
+            if 'ids' in data:
+                self._memo['items'] = dict(zip(data['ids'], data['qty']))
+            else:
+                # Baskets written before the compact encoding
+                self._memo['items'] = {int(product_id): item['qty'] for product_id, item in data.items()}
+        return self._memo['items']
+
+    def _data(self):
+        if 'data' not in self._memo:
+            self._memo['data'] = self.storage.load()
+        return self._memo['data']
+
+    def _write(self, items):
+        if items == self.basket:
+            return
+        self.storage.save({'v': price_version(), 'ids': list(items), 'qty': list(items.values())} if items else {})
+        self._memo.clear()
 
     def add(self, product, qty):
         """
         Adding and updating the users basket session data
         """
-        product_id = str(product.id)
-    
+        self._write({**self.basket, product.id: qty})
 
-        if product_id in self.basket:
-            self.basket[product_id]['qty'] = qty
-        else:
-            self.basket[product_id] = {'price': str(product.price), 'qty': qty}
+    def _prices(self):
+        if 'prices' not in self._memo:
+            self._memo['prices'] = prices(self.basket.keys()) if self.basket else {}
+        return self._memo['prices']
 
-        self.save()
+    def items(self):
+        """
+        (product_id, price, qty) for every line of a product still on sale,
+        at the current catalog prices. Costs no queries when the prices are
+        cached.
+        """
+        return [(product_id, self._prices()[product_id], qty)
+                for product_id, qty in self.basket.items() if product_id in self._prices()]
+
+    def repriced(self):
+        """
+        True when catalog prices changed since the basket was last written.
+        """
+        return bool(self.basket) and self._data().get('v') != price_version()
+
+    def _lines(self):
+        if 'lines' not in self._memo:
+            # Priced from the same table as get_total_price, so the lines
+            # and the total on a page agree
+            products = Product.products.in_bulk(self.basket.keys())
+            self._memo['lines'] = [
+                {'product': products[product_id], 'price': price, 'qty': qty, 'total_price': price * qty}
+                for product_id, price, qty in self.items() if product_id in products
+            ]
+        return self._memo['lines']
 
     def __iter__(self):
         """
         Collect the product_id in the session data to query the database
         and return products
         """
-        product_ids = self.basket.keys()
-        products = Product.products.filter(id__in=product_ids)
-        basket = self.basket.copy()
-
-        for product in products:
-            basket[str(product.id)]['product'] = product
-
-        for item in basket.values():
-            item['price'] = Decimal(item['price'])
-            item['total_price'] = item['price'] * item['qty']
-            yield item
+        return iter(self._lines())
 
     def __len__(self):
         """
         Get the basket data and count the qty of items
         """
-        return sum(item['qty'] for item in self.basket.values())
+        if 'qty' not in self._memo:
+            self._memo['qty'] = sum(self.basket.values())
+        return self._memo['qty']
 
     def update(self, product, qty):
         """
         Update values in session data
         """
-        product_id = str(product)
+        product_id = int(product)
         if product_id in self.basket:
-            self.basket[product_id]['qty'] = qty
-        self.save()
+            self._write({**self.basket, product_id: qty})
 
     def get_total_price(self):
-        return sum(Decimal(item['price']) * item['qty'] for item in self.basket.values())
+        if 'total' not in self._memo:
+            self._memo['total'] = sum(price * qty for _, price, qty in self.items())
+        return self._memo['total']
 
     def delete(self, product):
         """
         Delete item from session data
         """
-        product_id = str(product)
-
+        product_id = int(product)
         if product_id in self.basket:
-            del self.basket[product_id]
-            print(product_id)
-            self.save()
-
-    def save(self):
-        self.session.modified = True
+            self._write({key: qty for key, qty in self.basket.items() if key != product_id})
 
     def clear(self):
-        # Remove basket from session
-        del self.session['skey']
-        self.save()
+        # Remove basket from storage
+        self._write({})
 
 
 
@@ -1,5 +1,8 @@
+from django.utils.functional import SimpleLazyObject
+
 from .basket import Basket
 
 
 def basket(request):
-    return {'basket': Basket(request)}
\ No newline at end of file
+    # Lazy, so pages that never show the basket don't load the session
+    return {'basket': SimpleLazyObject(lambda: Basket(request))}
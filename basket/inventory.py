@@ -0,0 +1,51 @@
+from store.models import Product
+
+
+def availability(quantities, queryset=None):
+    """
+    Check ``quantities`` ({product_id: requested qty}) against stock with a
+    single in_bulk query. Returns ``(products, report)``: the products found,
+    keyed by id, and one report line per requested product::
+
+        {'product_id': 3, 'title': 'Oak tile', 'requested': 5,
+         'available': 2, 'shortfall': 3, 'can_backorder': False}
+
+    Unknown products are reported with nothing available. Pass ``queryset``
+    to read through another manager or to lock the rows, as checkout does
+    with select_for_update().
+    """
+    if queryset is None:
+        queryset = Product.products.all()
+    products = queryset.in_bulk(quantities.keys())
+
+    report = []
+    for product_id, requested in quantities.items():
+        product = products.get(product_id)
+        available = product.inventory if product else 0
+        report.append({
+            'product_id': product_id,
+            'title': product.title if product else None,
+            'requested': requested,
+            'available': available,
+            'shortfall': max(requested - available, 0),
+            'can_backorder': product.can_backorder if product else False,
+        })
+    return products, report
+
+
+def unavailable(report, allow_backorder=False):
+    """
+    Return the report lines that cannot be supplied. Lines short on stock
+    are let through when ``allow_backorder`` is set and the product can be
+    backordered.
+    """
+    return [
+        line for line in report
+        if line['shortfall'] and not (allow_backorder and line['can_backorder'])
+    ]
+
+
+def shortfall_message(line):
+    if line['title'] is None:
+        return f"Product {line['product_id']} not found."
+    return f"Only {line['available']} units of '{line['title']}' available in stock."
@@ -0,0 +1,99 @@
+from collections import defaultdict
+from decimal import Decimal
+from importlib import import_module
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.test import Client
+from django.test.utils import CaptureQueriesContext, override_settings, setup_test_environment
+from django.urls import reverse
+from django.utils.module_loading import import_string
+
+from store.models import Product
+
+
+STORAGES = ('SessionStorage', 'CookieStorage', 'KeyedStorage')
+
+
+def writes(queries, table):
+    return sum(1 for query in queries
+               if query['sql'].startswith(('INSERT', 'UPDATE', 'DELETE')) and f'"{table}"' in query['sql'])
+
+
+class Command(BaseCommand):
+    help = ('Measure session bytes and session writes per basket operation, against the per-line price '
+            'encoding the basket used before, then the writes each basket storage makes. Rolls back all writes.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--lines', type=int, default=20, help='Products in the basket')
+
+    def run(self, client, operations):
+        for name, url, data in operations:
+            with CaptureQueriesContext(connection) as ctx:
+                if data is None:
+                    client.get(url)
+                else:
+                    client.post(url, dict(data, action='post'))
+            yield name, ctx.captured_queries
+
+    def handle(self, *args, **options):
+        # Lets the test client's "testserver" host through ALLOWED_HOSTS
+        setup_test_environment()
+        store = import_module(settings.SESSION_ENGINE).SessionStore
+        serializer = import_string(settings.SESSION_SERIALIZER)()
+
+        with transaction.atomic():
+            user = get_user_model().objects.create(email='bench@example.com', user_name='bench-basket')
+            products = Product.objects.bulk_create([
+                Product(created_by=user, title=f'bench-basket-{i}', slug=f'bench-basket-{i}',
+                        price=Decimal('1234.50'), inventory=10 ** 6)
+                for i in range(options['lines'])
+            ])
+            add, update, delete = (reverse(f'basket:basket_{name}') for name in ('add', 'update', 'delete'))
+            operations = (
+                [('add', add, {'productid': p.id, 'productqty': 2}) for p in products]
+                + [('add again', add, {'productid': p.id, 'productqty': 2}) for p in products]
+                + [('same qty', update, {'productid': p.id, 'productqty': 2}) for p in products]
+                + [('new qty', update, {'productid': p.id, 'productqty': 3}) for p in products]
+                + [('view', reverse('basket:basket_summary'), None)]
+                + [('delete', delete, {'productid': p.id}) for p in products[:len(products) // 2]]
+                + [('delete again', delete, {'productid': p.id}) for p in products[:len(products) // 2]]
+            )
+
+            stats = defaultdict(lambda: {'calls': 0, 'writes': 0})
+            with override_settings(BASKET_STORAGE='basket.storage.SessionStorage'):
+                client = Client()
+                for name, queries in self.run(client, operations):
+                    stats[name]['calls'] += 1
+                    stats[name]['writes'] += writes(queries, 'django_session')
+
+                    session = client.session
+                    basket = session.get(settings.BASKET_SESSION_ID, {})
+                    legacy = dict(session._session, **{settings.BASKET_SESSION_ID: {
+                        str(product_id): {'price': str(Decimal('1234.50')), 'qty': qty}
+                        for product_id, qty in zip(basket.get('ids', []), basket.get('qty', []))
+                    }})
+                    # Raw serialized size, and the signed, compressed size stored
+                    stats[name]['sizes'] = (len(serializer.dumps(session._session)), len(serializer.dumps(legacy)),
+                                            len(session.encode(session._session)), len(store().encode(legacy)))
+
+            self.stdout.write(f"{'operation':>13} {'calls':>6} {'writes':>7} {'json':>6} {'legacy':>7} "
+                              f"{'stored':>7} {'legacy':>7}")
+            for name, row in stats.items():
+                self.stdout.write(f"{name:>13} {row['calls']:>6} {row['writes']:>7} "
+                                  + ' '.join(f"{size:>{width}}" for size, width in zip(row['sizes'], (6, 7, 7, 7))))
+            self.stdout.write("Before, every add, update and delete call wrote the session.\n")
+
+            self.stdout.write(f"{'storage':>15} {'session writes':>15} {'basket writes':>14} {'cookie bytes':>13}")
+            for storage in STORAGES:
+                with override_settings(BASKET_STORAGE=f'basket.storage.{storage}'):
+                    client = Client()
+                    queries = [query for _, captured in self.run(client, operations) for query in captured]
+                    cookie = client.cookies.get(settings.BASKET_SESSION_ID)
+                    cookie_bytes = len(cookie.value) if storage == 'CookieStorage' and cookie else 0
+                    self.stdout.write(f"{storage:>15} {writes(queries, 'django_session'):>15} "
+                                      f"{writes(queries, 'basket_storedbasket'):>14} {cookie_bytes:>13}")
+
+            transaction.set_rollback(True)
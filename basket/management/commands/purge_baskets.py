@@ -0,0 +1,10 @@
+from django.core.management.base import BaseCommand
+
+from basket.storage import purge_expired
+
+
+class Command(BaseCommand):
+    help = 'Delete keyed baskets that outlived BASKET_TTL. Run it periodically, like clearsessions.'
+
+    def handle(self, *args, **options):
+        self.stdout.write(f"Deleted {purge_expired()} expired baskets")
@@ -0,0 +1,15 @@
+class BasketMiddleware:
+    """
+    Let the request's basket storage write its cookie, if a basket was
+    used at all.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        response = self.get_response(request)
+        storage = request.__dict__.get('_basket_storage')
+        if storage is not None:
+            storage.process_response(response)
+        return response
@@ -0,0 +1,23 @@
+# Generated by Django 4.1.6 on 2026-10-18 15:51
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='StoredBasket',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('key', models.CharField(max_length=64, unique=True)),
+                ('data', models.JSONField(default=dict)),
+                ('expires', models.DateTimeField(db_index=True)),
+            ],
+        ),
+    ]
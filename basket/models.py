@@ -1,3 +1,14 @@
 from django.db import models
 
-# Create your models here.
+
+class StoredBasket(models.Model):
+    """
+    A basket kept by basket.storage.KeyedStorage, apart from the session
+    table. The shopper's cookie holds ``key``.
+    """
+    key = models.CharField(max_length=64, unique=True)
+    data = models.JSONField(default=dict)
+    expires = models.DateTimeField(db_index=True)
+
+    def __str__(self):
+        return self.key
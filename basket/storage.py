@@ -0,0 +1,146 @@
+import json
+import secrets
+from datetime import timedelta
+
+from django.conf import settings
+from django.utils import timezone
+from django.utils.module_loading import import_string
+
+from .models import StoredBasket
+
+COOKIE_SALT = 'basket.storage'
+
+
+class BasketStorage:
+    """
+    Where a request's basket data lives. ``load`` returns the encoded
+    basket (an empty dict when there is none) and ``save`` replaces it, an
+    empty dict removing it. Backends that keep state in cookies write them
+    in ``process_response``, called by basket.middleware.BasketMiddleware.
+    """
+
+    def __init__(self, request):
+        self.request = request
+
+    def load(self):
+        raise NotImplementedError
+
+    def save(self, data):
+        raise NotImplementedError
+
+    def process_response(self, response):
+        pass
+
+
+class SessionStorage(BasketStorage):
+    """
+    The basket is a key of the Django session. Every change rewrites the
+    session.
+    """
+
+    def load(self):
+        session = self.request.session
+        # Baskets saved before the key came from settings
+        return session.get(settings.BASKET_SESSION_ID) or session.get('skey', {})
+
+    def save(self, data):
+        session = self.request.session
+        session.pop('skey', None)
+        if data:
+            session[settings.BASKET_SESSION_ID] = data
+        else:
+            session.pop(settings.BASKET_SESSION_ID, None)
+
+
+class CookieStorage(BasketStorage):
+    """
+    The basket is a signed cookie, so anonymous shoppers browse and fill
+    baskets without ever touching the database.
+    """
+
+    def __init__(self, request):
+        super().__init__(request)
+        self.changed = None
+
+    def load(self):
+        if self.changed is not None:
+            return self.changed
+        value = self.request.get_signed_cookie(settings.BASKET_SESSION_ID, default=None, salt=COOKIE_SALT,
+                                               max_age=settings.BASKET_TTL)
+        try:
+            return json.loads(value) if value else {}
+        except ValueError:
+            return {}
+
+    def save(self, data):
+        self.changed = data
+
+    def process_response(self, response):
+        if self.changed is None:
+            return
+        if self.changed:
+            response.set_signed_cookie(settings.BASKET_SESSION_ID, json.dumps(self.changed, separators=(',', ':')),
+                                       salt=COOKIE_SALT, max_age=settings.BASKET_TTL, httponly=True, samesite='Lax')
+        else:
+            response.delete_cookie(settings.BASKET_SESSION_ID, samesite='Lax')
+
+
+class KeyedStorage(BasketStorage):
+    """
+    The basket is a StoredBasket row, found by a random key in the
+    shopper's cookie. Basket writes go to their own table, away from the
+    session table, and expire BASKET_TTL seconds after the last change.
+    """
+
+    def __init__(self, request):
+        super().__init__(request)
+        self.key = request.COOKIES.get(settings.BASKET_SESSION_ID)
+        self.cookie_changed = False
+
+    def load(self):
+        if not self.key:
+            return {}
+        data = (StoredBasket.objects.filter(key=self.key, expires__gt=timezone.now())
+                .values_list('data', flat=True).first())
+        return data or {}
+
+    def save(self, data):
+        self.cookie_changed = True
+        if not data:
+            StoredBasket.objects.filter(key=self.key).delete()
+            self.key = None
+            return
+        self.key = self.key or secrets.token_urlsafe(32)
+        # One statement whether or not the row exists
+        StoredBasket.objects.bulk_create(
+            [StoredBasket(key=self.key, data=data, expires=timezone.now() + timedelta(seconds=settings.BASKET_TTL))],
+            update_conflicts=True, unique_fields=['key'], update_fields=['data', 'expires'],
+        )
+
+    def process_response(self, response):
+        if not self.cookie_changed:
+            return
+        if self.key:
+            # The cookie expires along with the row
+            response.set_cookie(settings.BASKET_SESSION_ID, self.key, max_age=settings.BASKET_TTL,
+                                httponly=True, samesite='Lax')
+        else:
+            response.delete_cookie(settings.BASKET_SESSION_ID, samesite='Lax')
+
+
+def purge_expired():
+    """
+    Delete the keyed baskets past their TTL. Returns how many there were.
+    """
+    deleted, _ = StoredBasket.objects.filter(expires__lte=timezone.now()).delete()
+    return deleted
+
+
+def get_storage(request):
+    """
+    The BASKET_STORAGE backend of ``request``, shared by every Basket
+    built during the request.
+    """
+    if '_basket_storage' not in request.__dict__:
+        request._basket_storage = import_string(settings.BASKET_STORAGE)(request)
+    return request._basket_storage
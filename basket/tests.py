@@ -0,0 +1,204 @@
+import json
+from decimal import Decimal
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.contrib.sessions.backends.cache import SessionStore
+from django.core.cache import cache
+from django.test import RequestFactory, TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from store.models import Product
+from .basket import Basket
+from .models import StoredBasket
+from .storage import purge_expired
+from .inventory import availability, unavailable
+
+
+class BasketTestCase(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        user = get_user_model().objects.create(email='till@example.com', user_name='till')
+        cls.products = Product.objects.bulk_create([
+            Product(created_by=user, title=f'tile-{i}', slug=f'tile-{i}', price=Decimal('2.50'), inventory=10)
+            for i in range(3)
+        ])
+
+    def setUp(self):
+        cache.clear()
+        self.request = RequestFactory().get('/')
+        self.request.session = SessionStore()
+
+    def test_products_load_once_per_request(self):
+        basket = Basket(self.request)
+        for product in self.products:
+            basket.add(product, 2)
+        # Prices come from the price cache, warmed by the first total
+        self.assertEqual(basket.get_total_price(), Decimal('15.00'))
+
+        with self.assertNumQueries(1):
+            self.assertEqual(len(list(basket)), 3)
+            self.assertEqual(len(list(Basket(self.request))), 3)
+        self.assertEqual(len(basket), 6)
+
+    def test_changes_drop_the_memo(self):
+        basket = Basket(self.request)
+        basket.add(self.products[0], 1)
+        self.assertEqual(basket.get_total_price(), Decimal('2.50'))
+
+        Basket(self.request).update(self.products[0].id, 4)
+        self.assertEqual(basket.get_total_price(), Decimal('10.00'))
+        self.assertEqual(len(basket), 4)
+
+        basket.delete(self.products[0].id)
+        self.assertEqual(list(basket), [])
+
+    def test_reading_an_empty_basket_leaves_the_session_alone(self):
+        basket = Basket(self.request)
+        self.assertEqual(len(basket), 0)
+        self.assertEqual(list(basket), [])
+        self.assertNotIn(settings.BASKET_SESSION_ID, self.request.session)
+
+
+    def test_session_is_compact_and_only_written_on_change(self):
+        basket = Basket(self.request)
+        basket.add(self.products[0], 2)
+        basket.add(self.products[1], 1)
+        self.assertEqual({key: self.request.session[settings.BASKET_SESSION_ID][key] for key in ('ids', 'qty')},
+                         {'ids': [self.products[0].id, self.products[1].id], 'qty': [2, 1]})
+
+        self.request.session.modified = False
+        basket.add(self.products[0], 2)
+        basket.update(self.products[1].id, 1)
+        basket.delete(self.products[2].id)
+        self.assertFalse(self.request.session.modified)
+
+        basket.update(self.products[1].id, 3)
+        self.assertTrue(self.request.session.modified)
+
+    def test_prices_follow_the_catalog(self):
+        basket = Basket(self.request)
+        basket.add(self.products[0], 2)
+        self.assertFalse(basket.repriced())
+
+        product = Product.objects.get(pk=self.products[0].pk)
+        product.price = Decimal('3.00')
+        product.save()
+        # A later request
+        request = RequestFactory().get('/')
+        request.session = self.request.session
+        basket = Basket(request)
+        self.assertTrue(basket.repriced())
+        self.assertEqual(basket.items(), [(product.id, Decimal('3.00'), 2)])
+        self.assertEqual(basket.get_total_price(), Decimal('6.00'))
+
+    def test_lines_and_total_agree(self):
+        basket = Basket(self.request)
+        basket.add(self.products[0], 2)
+        basket.get_total_price()
+        # Bypasses the signals, so the cached price is stale
+        Product.objects.filter(pk=self.products[0].pk).update(price=Decimal('9.00'))
+
+        basket = Basket(self.request)
+        self.assertEqual(basket.get_total_price(), sum(line['total_price'] for line in basket))
+
+    def test_reads_baskets_in_the_old_encoding(self):
+        self.request.session['skey'] = {str(self.products[0].id): {'price': '2.50', 'qty': 4}}
+        basket = Basket(self.request)
+        self.assertEqual(len(basket), 4)
+        self.assertEqual(basket.get_total_price(), Decimal('10.00'))
+        basket.add(self.products[1], 1)
+        self.assertEqual(self.request.session[settings.BASKET_SESSION_ID]['ids'],
+                         [self.products[0].id, self.products[1].id])
+        self.assertNotIn('skey', self.request.session)
+
+
+class StorageTestCase(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        user = get_user_model().objects.create(email='shop@example.com', user_name='shop')
+        cls.product = Product.objects.create(created_by=user, title='tile', slug='tile', price=Decimal('2.50'),
+                                             inventory=10)
+
+    def setUp(self):
+        cache.clear()
+
+    def add(self, qty):
+        return self.client.post(reverse('basket:basket_add'),
+                                {'action': 'post', 'productid': self.product.id, 'productqty': qty})
+
+    @override_settings(BASKET_STORAGE='basket.storage.CookieStorage')
+    def test_cookie_baskets_skip_the_database(self):
+        self.add(2)
+        # Only the stock check
+        with self.assertNumQueries(1):
+            self.assertEqual(self.add(2).json(), {'qty': 2})
+        self.assertEqual(self.add(3).json(), {'qty': 3})
+        self.assertNotIn(settings.SESSION_COOKIE_NAME, self.client.cookies)
+
+        self.client.cookies[settings.BASKET_SESSION_ID] = 'forged'
+        self.assertEqual(self.add(1).json(), {'qty': 1})
+
+    @override_settings(BASKET_STORAGE='basket.storage.KeyedStorage')
+    def test_keyed_baskets_use_their_own_table(self):
+        self.add(2)
+        self.assertEqual(self.add(3).json(), {'qty': 3})
+        stored = StoredBasket.objects.get()
+        self.assertEqual(stored.data['qty'], [3])
+        self.assertEqual(self.client.cookies[settings.BASKET_SESSION_ID].value, stored.key)
+        self.assertNotIn(settings.SESSION_COOKIE_NAME, self.client.cookies)
+
+        self.client.post(reverse('basket:basket_delete'), {'action': 'post', 'productid': self.product.id})
+        self.assertFalse(StoredBasket.objects.exists())
+
+    @override_settings(BASKET_STORAGE='basket.storage.KeyedStorage')
+    def test_keyed_baskets_expire(self):
+        self.add(2)
+        StoredBasket.objects.update(expires=timezone.now())
+        self.assertEqual(self.add(1).json(), {'qty': 1})
+
+        StoredBasket.objects.update(expires=timezone.now())
+        self.assertEqual(purge_expired(), 1)
+
+class AvailabilityTestCase(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        user = get_user_model().objects.create(email='stock@example.com', user_name='stock')
+        cls.plenty, cls.scarce, cls.backorder = Product.objects.bulk_create([
+            Product(created_by=user, title='plenty', slug='plenty', price=Decimal('1.00'), inventory=50),
+            Product(created_by=user, title='scarce', slug='scarce', price=Decimal('1.00'), inventory=2),
+            Product(created_by=user, title='backorder', slug='backorder', price=Decimal('1.00'), inventory=0,
+                    can_backorder=True),
+        ])
+
+    def test_report_is_built_from_one_query(self):
+        quantities = {self.plenty.id: 5, self.scarce.id: 5, self.backorder.id: 1, 999999: 1}
+        with self.assertNumQueries(1):
+            products, report = availability(quantities)
+
+        self.assertEqual(set(products), {self.plenty.id, self.scarce.id, self.backorder.id})
+        lines = {line['product_id']: line for line in report}
+        self.assertEqual(lines[self.plenty.id]['shortfall'], 0)
+        self.assertEqual((lines[self.scarce.id]['available'], lines[self.scarce.id]['shortfall']), (2, 3))
+        self.assertTrue(lines[self.backorder.id]['can_backorder'])
+        self.assertEqual(lines[999999]['shortfall'], 1)
+
+        self.assertEqual([line['product_id'] for line in unavailable(report)],
+                         [self.scarce.id, self.backorder.id, 999999])
+        self.assertEqual([line['product_id'] for line in unavailable(report, allow_backorder=True)],
+                         [self.scarce.id, 999999])
+
+    def test_check_inventory_view(self):
+        items = [{'productid': self.plenty.id, 'productqty': 3}, {'productid': self.scarce.id, 'productqty': 3}]
+        with self.assertNumQueries(1):
+            response = self.client.post(reverse('basket:check_inventory'), {'items': json.dumps(items)})
+        self.assertEqual(response.json()['status'], 'error')
+        self.assertIn("Only 2 units of 'scarce'", response.json()['message'])
+
+        items[1]['productqty'] = 2
+        response = self.client.post(reverse('basket:check_inventory'), {'items': json.dumps(items)})
+        self.assertEqual(response.json()['status'], 'ok')
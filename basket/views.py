@@ -1,16 +1,16 @@
-from django.http import JsonResponse
-from django.shortcuts import get_object_or_404, render
+from django.http import Http404, JsonResponse
+from django.shortcuts import render
 
 from store.models import Product
 from django.views.decorators.csrf import csrf_exempt
 import json
 
 from .basket import Basket
+from .inventory import availability, shortfall_message, unavailable
 
 
 def basket_summary(request):
     basket = Basket(request)
-    print(basket.basket)
     return render(request, 'basket/summary.html', {'basket': basket})
 
 
@@ -19,11 +19,15 @@ def basket_add(request):
     if request.POST.get('action') == 'post':
         product_id = int(request.POST.get('productid'))
         product_qty = int(request.POST.get('productqty'))
-        product = get_object_or_404(Product, id=product_id)
-        
+        products, report = availability({product_id: product_qty}, Product.objects.all())
+        if product_id not in products:
+            raise Http404('No Product matches the given query.')
+        product = products[product_id]
+
         # Check if the inventory is sufficient
-        if product.inventory < product_qty:
-            response = JsonResponse({'error': f"Insufficient Inventory for {product.title}. Available: {product.inventory}"})
+        if unavailable(report):
+            response = JsonResponse({'error': f"Insufficient Inventory for {product.title}. Available: {product.inventory}",
+                                     'lines': report})
             response.status_code = 400  # Set the status code to 400 (Bad Request)
             return response
 
@@ -52,8 +56,6 @@ def basket_update(request):
     if request.POST.get('action') == 'post':
         product_id = int(request.POST.get('productid'))
         product_qty = int(request.POST.get('productqty'))
-        print(product_id)
-        print(product_qty)
         basket.update(product=product_id, qty=product_qty)
 
         basketqty = basket.__len__()
@@ -65,23 +67,17 @@ def basket_update(request):
 def check_inventory(request):
     if request.method == "POST":
         try:
-            items = json.loads(request.POST.get("items", "[]"))
+            quantities = {}
+            for item in json.loads(request.POST.get("items", "[]")):
+                product_id = int(item.get("productid"))
+                quantities[product_id] = quantities.get(product_id, 0) + int(item.get("productqty", 0))
         except Exception:
             return JsonResponse({"status": "error", "message": "Invalid data."})
 
-        for item in items:
-            product_id = item.get("productid")
-            product_qty = int(item.get("productqty", 0))
-            try:
-                product = Product.objects.get(id=product_id)
-            except Product.DoesNotExist:
-                return JsonResponse({"status": "error", "message": f"Product {product_id} not found."})
-
-            if product_qty > product.inventory:  # Adjust field name if needed
-                return JsonResponse({
-                    "status": "error",
-                    "message": f"Only {product.inventory} units of '{product.title}' available in stock."
-                })
-
-        return JsonResponse({"status": "ok"})
-    return JsonResponse({"status": "error", "message": "Invalid request."})
\ No newline at end of file
+        _, report = availability(quantities, Product.objects.all())
+        short = unavailable(report)
+        if short:
+            return JsonResponse({"status": "error", "message": shortfall_message(short[0]), "lines": report})
+
+        return JsonResponse({"status": "ok", "lines": report})
+    return JsonResponse({"status": "error", "message": "Invalid request."})
@@ -0,0 +1,138 @@
+import logging
+import time
+from contextlib import ExitStack
+from contextvars import ContextVar
+
+from django.db import connections
+from django.template.backends.django import DjangoTemplates, Template, reraise
+from django.template.exceptions import TemplateDoesNotExist
+
+logger = logging.getLogger(__name__)
+
+TRANSACTION_STATEMENTS = ('BEGIN', 'COMMIT', 'ROLLBACK', 'SAVEPOINT ', 'RELEASE SAVEPOINT ')
+
+# Metrics of the request being handled, if any
+_current = ContextVar('request_metrics', default=None)
+
+
+def query_budget(queries):
+    """
+    Declare the most database queries a view may make per request. The
+    instrumentation middleware logs requests that go over it as warnings,
+    and the test suites assert it with core.testing.QueryBudgetAssertions.
+    """
+    def decorator(view):
+        view.query_budget = queries
+        return view
+    return decorator
+
+
+class RequestMetrics:
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.total = None
+        self.queries = 0
+        self.db_time = 0.0
+        self.template_time = 0.0
+        self.view = None
+        self.budget = None
+
+    def record_query(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.db_time += time.perf_counter() - started
+            # Transaction control is not a query: SQLite sends BEGIN for
+            # every atomic block, and nested ones (all of them under
+            # TestCase) become savepoints
+            if not sql.startswith(TRANSACTION_STATEMENTS):
+                self.queries += 1
+
+    def finish(self):
+        self.total = time.perf_counter() - self.started
+
+    @property
+    def over_budget(self):
+        return self.budget is not None and self.queries > self.budget
+
+    def server_timing(self):
+        return (f'db;dur={self.db_time * 1000:.1f};desc="{self.queries} queries", '
+                f'tpl;dur={self.template_time * 1000:.1f};desc="templates", '
+                f'total;dur={self.total * 1000:.1f}')
+
+
+class InstrumentationMiddleware:
+    """
+    Measure every request: database queries and their time, template
+    rendering time and total time. They are sent back in a Server-Timing
+    header, so browser dev tools show them, and logged as one line per
+    request on the core.instrumentation logger. Requests over their view's
+    query_budget are logged as warnings.
+
+    Goes first in MIDDLEWARE so the other middleware's queries count too.
+    Streamed response bodies are produced after it returns and are not
+    measured.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        metrics = RequestMetrics()
+        token = _current.set(metrics)
+        try:
+            with ExitStack() as wrappers:
+                for connection in connections.all():
+                    wrappers.enter_context(connection.execute_wrapper(metrics.record_query))
+                response = self.get_response(request)
+        finally:
+            _current.reset(token)
+        metrics.finish()
+
+        response['Server-Timing'] = metrics.server_timing()
+        response.metrics = metrics
+        logger.log(
+            logging.WARNING if metrics.over_budget else logging.INFO,
+            'method=%s path=%s view=%s status=%s queries=%d budget=%s db_ms=%.1f template_ms=%.1f total_ms=%.1f',
+            request.method, request.path, metrics.view, response.status_code, metrics.queries,
+            metrics.budget, metrics.db_time * 1000, metrics.template_time * 1000, metrics.total * 1000,
+        )
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        metrics = _current.get()
+        if metrics is not None:
+            metrics.view = f'{view_func.__module__}.{view_func.__qualname__}'
+            metrics.budget = getattr(view_func, 'query_budget', None)
+
+
+class TimedTemplate(Template):
+
+    def render(self, context=None, request=None):
+        metrics = _current.get()
+        if metrics is None:
+            return super().render(context, request)
+        started = time.perf_counter()
+        try:
+            return super().render(context, request)
+        finally:
+            metrics.template_time += time.perf_counter() - started
+
+
+class InstrumentedTemplates(DjangoTemplates):
+    """
+    The Django template backend, timing each page it renders for the
+    instrumentation middleware. Included and extended templates are part
+    of the page that uses them.
+    """
+
+    def from_string(self, template_code):
+        return TimedTemplate(self.engine.from_string(template_code), self)
+
+    def get_template(self, template_name):
+        try:
+            return TimedTemplate(self.engine.get_template(template_name), self)
+        except TemplateDoesNotExist as exc:
+            reraise(exc, self)
@@ -26,12 +26,16 @@ INSTALLED_APPS = [
     'account',
     'payment',
     'orders',
+    'jobs',
     'rangefilter',
 ]
 
 MIDDLEWARE = [
+    'core.instrumentation.InstrumentationMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
+    'basket.middleware.BasketMiddleware',
+    'store.storefronts.StorefrontMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
@@ -43,7 +47,8 @@ ROOT_URLCONF = 'core.urls'
 
 TEMPLATES = [
     {
-        'BACKEND': 'django.template.backends.django.DjangoTemplates',
+        # DjangoTemplates, timing renders for core.instrumentation
+        'BACKEND': 'core.instrumentation.InstrumentedTemplates',
         'DIRS': [BASE_DIR / 'templates'],
         'APP_DIRS': True,
         'OPTIONS': {
@@ -61,6 +66,26 @@ TEMPLATES = [
 
 WSGI_APPLICATION = 'core.wsgi.application'
 
+# One line per request with its query count and timings, on the console;
+# over-budget requests are warnings. REQUEST_LOG_LEVEL=WARNING keeps only
+# those.
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'handlers': {
+        'requests': {'class': 'logging.StreamHandler'},
+    },
+    'loggers': {
+        'core.instrumentation': {
+            'handlers': ['requests'],
+            'level': os.environ.get('REQUEST_LOG_LEVEL', 'INFO'),
+            'propagate': False,
+        },
+    },
+}
+
+TEST_RUNNER = 'core.testing.TestRunner'
+
 
 # Database
 # https://docs.djangoproject.com/en/4.1/ref/settings/#databases
@@ -72,6 +97,35 @@ DATABASES = {
     }
 }
 
+# Set POSTGRES_DB to run against a local PostgreSQL instead (needs psycopg2),
+# e.g. to compare manage.py bench_concurrency across both databases.
+if os.environ.get('POSTGRES_DB'):
+    DATABASES['default'] = {
+        'ENGINE': 'django.db.backends.postgresql',
+        'NAME': os.environ['POSTGRES_DB'],
+        'USER': os.environ.get('POSTGRES_USER', ''),
+        'PASSWORD': os.environ.get('POSTGRES_PASSWORD', ''),
+        'HOST': os.environ.get('POSTGRES_HOST', ''),
+        'PORT': os.environ.get('POSTGRES_PORT', ''),
+    }
+
+
+# Cache
+# https://docs.djangoproject.com/en/4.1/ref/settings/#caches
+
+# The web processes and the job worker share the catalog, price and chart
+# caches and, above all, their version keys: a bump in one process has to
+# retire the entries every other process reads. A file cache on the same
+# host needs no extra service; point CACHE_DIR at the same directory for
+# every process.
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+        'LOCATION': os.environ.get('CACHE_DIR', BASE_DIR / 'cache'),
+        'OPTIONS': {'MAX_ENTRIES': 10000},
+    }
+}
+
 
 # Password validation
 # https://docs.djangoproject.com/en/4.1/ref/settings/#auth-password-validators
@@ -122,7 +176,16 @@ DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 MEDIA_URL = '/media/'
 MEDIA_ROOT = os.path.join(BASE_DIR, 'media/')
 
-BASKET_SESSION_ID = 'basket' 
+# Rendered invoice PDFs; private, so not under MEDIA_ROOT
+INVOICE_ROOT = os.path.join(BASE_DIR, 'invoices/')
+
+# Session key of the basket, or its cookie with the cookie and keyed storages
+BASKET_SESSION_ID = 'basket'
+# Where baskets live: basket.storage.SessionStorage, CookieStorage (signed
+# cookie, for anonymous browsing) or KeyedStorage (a table of its own)
+BASKET_STORAGE = 'basket.storage.SessionStorage'
+# Seconds a cookie or keyed basket lives after its last change
+BASKET_TTL = 60 * 60 * 24 * 30
 
 AUTH_USER_MODEL = 'account.UserBase'
 LOGIN_REDIRECT_URL = '/account/dashboard'
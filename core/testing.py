@@ -0,0 +1,48 @@
+import logging
+import subprocess
+import sys
+
+from django.conf import settings
+from django.test.runner import DiscoverRunner
+
+
+class QueryBudgetAssertions:
+    """
+    TestCase mixin checking responses against their view's query_budget,
+    as measured by core.instrumentation.
+    """
+
+    def assertWithinBudget(self, response):
+        metrics = response.metrics
+        self.assertIsNotNone(metrics.budget, f'{metrics.view} declares no query budget')
+        self.assertLessEqual(metrics.queries, metrics.budget,
+                             f'{metrics.view} made {metrics.queries} queries, over its budget of {metrics.budget}')
+
+
+def run_in_other_process(code):
+    """
+    Run ``code`` with ``manage.py shell`` in a separate process, as another
+    web process or the job worker would, and return what it printed. It
+    shares the cache with the tests but not the test database.
+    """
+    result = subprocess.run([sys.executable, str(settings.BASE_DIR / 'manage.py'), 'shell', '-c', code],
+                            capture_output=True, text=True, check=True)
+    return result.stdout
+
+
+class TestRunner(DiscoverRunner):
+    """
+    The default runner, keeping the one-line-per-request log of
+    core.instrumentation down to over-budget warnings while tests run.
+    assertLogs still sees the INFO lines.
+    """
+
+    def setup_test_environment(self, **kwargs):
+        super().setup_test_environment(**kwargs)
+        logger = logging.getLogger('core.instrumentation')
+        self._request_log_level = logger.level
+        logger.setLevel(logging.WARNING)
+
+    def teardown_test_environment(self, **kwargs):
+        logging.getLogger('core.instrumentation').setLevel(self._request_log_level)
+        super().teardown_test_environment(**kwargs)
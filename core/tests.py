@@ -0,0 +1,28 @@
+from unittest import mock
+
+from django.test import TestCase
+from django.urls import reverse
+
+from store import views
+
+
+class InstrumentationTestCase(TestCase):
+
+    def test_server_timing_and_log_line(self):
+        with self.assertLogs('core.instrumentation', 'INFO') as logs:
+            response = self.client.get(reverse('store:product_all'))
+
+        metrics = response.metrics
+        self.assertEqual((metrics.view, metrics.budget), ('store.views.product_all', 3))
+        self.assertGreater(metrics.template_time, 0)
+        self.assertRegex(response['Server-Timing'],
+                         rf'^db;dur=[\d.]+;desc="{metrics.queries} queries", tpl;dur=[\d.]+;desc="templates", '
+                         r'total;dur=[\d.]+$')
+        self.assertEqual(logs.records[0].levelname, 'INFO')
+        self.assertIn('view=store.views.product_all status=200', logs.output[0])
+
+    def test_over_budget_is_a_warning(self):
+        with mock.patch.object(views.product_all, 'query_budget', 0), \
+                self.assertLogs('core.instrumentation', 'WARNING') as logs:
+            self.client.get(reverse('store:product_all'))
+        self.assertIn('budget=0', logs.output[0])
@@ -20,14 +20,14 @@ from django.urls import include, path
 
 urlpatterns = [
     path('admin/', admin.site.urls),
+    # Storefronts share store.urls; each instance namespace is the
+    # storefront's slug and the kwarg selects it in StorefrontMiddleware
+    path('sjshop/', include(('store.urls', 'store'), namespace='sj'), {'storefront': 'sj'}),
     path('', include('store.urls', namespace='store')),
     path('basket/', include('basket.urls', namespace='basket')),
     path('account/', include('account.urls', namespace='account')),
     path('payment/', include('payment.urls', namespace='payment')),
     path('orders/', include('orders.urls', namespace='orders')),
-    
-    #path('', include('orders.urls')),
-#    path('sjshop/', include('shop2.urls', namespace='shop2')),
 ]
 
 if settings.DEBUG:
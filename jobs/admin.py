@@ -0,0 +1,17 @@
+from django.contrib import admin
+from unfold.admin import ModelAdmin
+
+from .models import Job
+
+
+@admin.register(Job)
+class JobAdmin(ModelAdmin):
+    list_display = ['id', 'task', 'status', 'attempts', 'run_at', 'idempotency_key']
+    list_filter = ['status', 'task']
+    search_fields = ['idempotency_key', 'task']
+    actions = ['retry']
+
+    @admin.action(description='Retry selected jobs')
+    def retry(self, request, queryset):
+        from .queue import retry
+        retry(queryset)
@@ -0,0 +1,41 @@
+import multiprocessing
+
+from django.core.management.base import BaseCommand
+from django.db import connections
+
+from jobs.worker import work
+
+
+class Command(BaseCommand):
+    help = 'Run a pool of worker processes that drain the background job queue.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--processes', type=int, default=2)
+        parser.add_argument('--batch-size', type=int, default=10, help='Jobs claimed per poll')
+        parser.add_argument('--interval', type=float, default=1.0, help='Seconds to sleep when the queue is empty')
+        parser.add_argument('--once', action='store_true', help='Exit once the queue is empty')
+
+    def handle(self, *args, **options):
+        worker_options = {'batch_size': options['batch_size'], 'interval': options['interval'],
+                          'once': options['once']}
+        if options['processes'] <= 1:
+            work(**worker_options)
+            return
+
+        # Children must open their own database connections
+        connections.close_all()
+        workers = [multiprocessing.Process(target=work, kwargs=worker_options, daemon=True)
+                   for _ in range(options['processes'])]
+        for worker in workers:
+            worker.start()
+        self.stdout.write(f"Started {len(workers)} workers")
+
+        try:
+            for worker in workers:
+                worker.join()
+        except KeyboardInterrupt:
+            for worker in workers:
+                worker.terminate()
+            for worker in workers:
+                worker.join()
+        self.stdout.write("Workers stopped")
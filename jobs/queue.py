@@ -0,0 +1,170 @@
+import logging
+import traceback
+from contextlib import contextmanager
+from contextvars import ContextVar
+from datetime import timedelta
+
+from django.db import transaction
+from django.db.models import F, Q
+from django.utils import timezone
+from django.utils.module_loading import import_string
+
+from .models import Job
+
+logger = logging.getLogger(__name__)
+
+# A running job whose worker has not finished it by then is handed out again
+LOCK_TIMEOUT = timedelta(minutes=10)
+# Seconds before the first retry; doubled on every further attempt
+RETRY_BACKOFF = 30
+
+# The job whose task is running in this thread, if any
+_running = ContextVar('running_job', default=None)
+
+
+class _JobLost(Exception):
+    """
+    The running job was reclaimed by another worker or cancelled.
+    """
+
+
+def enqueue(task, payload=None, key=None, run_at=None, max_attempts=5):
+    """
+    Queue a call of ``task`` (the dotted path of a function) with ``payload``
+    as keyword arguments.
+
+    Enqueue inside the transaction whose commit should trigger the work: the
+    job row commits or rolls back with it. Jobs sharing an idempotency
+    ``key`` are only queued once, later calls are ignored.
+    """
+    Job.objects.bulk_create([
+        Job(task=task, payload=payload or {}, idempotency_key=key,
+            run_at=run_at or timezone.now(), max_attempts=max_attempts)
+    ], ignore_conflicts=True)
+
+
+# Jobs whose task has not taken effect. A running job's database writes
+# commit together with marking it done (see completing), which fails once
+# the job is gone.
+UNFINISHED = [Job.PENDING, Job.RUNNING, Job.FAILED]
+
+
+def cancel(key):
+    """
+    Drop the not yet completed job queued under ``key``. Returns True when
+    there was one, meaning its task never took effect.
+    """
+    deleted, _ = Job.objects.filter(idempotency_key=key, status__in=UNFINISHED).delete()
+    return bool(deleted)
+
+
+def cancel_many(keys):
+    """
+    Drop the not yet completed jobs queued under any of ``keys``, with one
+    query each to find and delete them. Returns the set of keys that had
+    one. Call it in a transaction that has already written, so no worker
+    can claim the jobs in between.
+    """
+    jobs = Job.objects.filter(idempotency_key__in=list(keys), status__in=UNFINISHED)
+    pending = dict(jobs.select_for_update().values_list('pk', 'idempotency_key'))
+    jobs.filter(pk__in=pending.keys()).delete()
+    return set(pending.values())
+
+
+def retry(queryset):
+    return queryset.filter(status=Job.FAILED).update(status=Job.PENDING, attempts=0, run_at=timezone.now())
+
+
+def _due(now):
+    return (Q(status=Job.PENDING, run_at__lte=now)
+            | Q(status=Job.RUNNING, locked_at__lt=now - LOCK_TIMEOUT))
+
+
+def claim(limit=10):
+    """
+    Mark up to ``limit`` due jobs as running and return them. Each job is
+    taken with a conditional UPDATE, so concurrent workers never get the
+    same job.
+    """
+    now = timezone.now()
+    candidates = Job.objects.filter(_due(now)).order_by('run_at', 'id').values_list('pk', flat=True)[:limit]
+    claimed = [
+        pk for pk in list(candidates)
+        if Job.objects.filter(_due(now), pk=pk).update(
+            status=Job.RUNNING, locked_at=now, attempts=F('attempts') + 1)
+    ]
+    return list(Job.objects.filter(pk__in=claimed).order_by('run_at', 'id'))
+
+
+def _complete(job):
+    done = Job.objects.filter(pk=job.pk, status=Job.RUNNING, locked_at=job.locked_at).update(
+        status=Job.DONE, locked_at=None, last_error='')
+    if not done:
+        raise _JobLost
+
+
+@contextmanager
+def completing():
+    """
+    Transaction for a task's database writes that also marks its job done,
+    so the writes happen exactly once even if the worker dies halfway, or
+    not at all if the job was cancelled or reclaimed meanwhile. Tasks open
+    it around their writes only, after any slow work, so it holds the
+    database's write lock briefly. Outside a job it is a plain atomic block.
+    """
+    job = _running.get()
+    if job is None or job.status != Job.RUNNING:
+        with transaction.atomic():
+            yield
+        return
+    with transaction.atomic():
+        # Marking the job done first takes the write lock up front, which
+        # SQLite needs to queue concurrent writers instead of failing them
+        _complete(job)
+        yield
+    job.status = Job.DONE
+
+
+def run(job):
+    """
+    Call a claimed job's task, outside any transaction. Tasks that write to
+    the database do so in completing(); the job of any other task is marked
+    done in a transaction of its own once the task returns, so its side
+    effects may repeat if the worker dies in between. Failures are retried
+    with exponential backoff until ``max_attempts`` is reached. Returns True
+    when the job is done.
+    """
+    token = _running.set(job)
+    try:
+        import_string(job.task)(**job.payload)
+        if job.status == Job.RUNNING:
+            _complete(job)
+    except _JobLost:
+        # Another worker reclaimed the job after LOCK_TIMEOUT, or it was
+        # cancelled; its task had no effect here
+        return False
+    except Exception:
+        logger.exception('Job %s (%s) failed on attempt %s', job.pk, job.task, job.attempts)
+        if job.attempts >= job.max_attempts:
+            changes = {'status': Job.FAILED}
+        else:
+            delay = timedelta(seconds=RETRY_BACKOFF * 2 ** (job.attempts - 1))
+            changes = {'status': Job.PENDING, 'run_at': timezone.now() + delay}
+        Job.objects.filter(pk=job.pk, status=Job.RUNNING, locked_at=job.locked_at).update(
+            locked_at=None, last_error=traceback.format_exc(), **changes)
+        return False
+    finally:
+        _running.reset(token)
+    return True
+
+
+def run_pending(batch_size=10):
+    """
+    Run due jobs until none are left. Returns how many jobs completed.
+    """
+    completed = 0
+    while True:
+        jobs = claim(batch_size)
+        if not jobs:
+            return completed
+        completed += sum(run(job) for job in jobs)
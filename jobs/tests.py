@@ -0,0 +1,91 @@
+from datetime import timedelta
+
+from django.test import TestCase
+from django.utils import timezone
+
+from .models import Job
+from .queue import LOCK_TIMEOUT, cancel, claim, completing, enqueue, run, run_pending
+
+calls = []
+
+
+def record(value):
+    calls.append(value)
+    with completing():
+        Job.objects.create(task='marker', status=Job.DONE, idempotency_key=f'marker:{value}')
+
+
+def flaky(value):
+    with completing():
+        Job.objects.create(task='marker', status=Job.DONE, idempotency_key=f'marker:{value}')
+        raise RuntimeError('boom')
+
+
+def notify(value):
+    # No database writes, so its job is only marked done once it returns
+    calls.append(Job.objects.get(task='jobs.tests.notify').status)
+
+
+class QueueTestCase(TestCase):
+
+    def setUp(self):
+        calls.clear()
+
+    def test_jobs_run_once_per_key(self):
+        enqueue('jobs.tests.record', {'value': 1}, key='one')
+        enqueue('jobs.tests.record', {'value': 1}, key='one')
+        enqueue('jobs.tests.record', {'value': 2})
+
+        self.assertEqual(run_pending(), 2)
+        self.assertEqual(calls, [1, 2])
+        self.assertEqual(Job.objects.filter(status=Job.DONE, task='jobs.tests.record').count(), 2)
+        self.assertEqual(run_pending(), 0)
+
+    def test_failures_roll_back_and_retry_with_backoff(self):
+        enqueue('jobs.tests.flaky', {'value': 1}, max_attempts=2)
+
+        with self.assertLogs('jobs.queue', 'ERROR'):
+            self.assertEqual(run_pending(), 0)
+        job = Job.objects.get(task='jobs.tests.flaky')
+        self.assertEqual((job.status, job.attempts), (Job.PENDING, 1))
+        self.assertGreater(job.run_at, timezone.now())
+        self.assertIn('RuntimeError', job.last_error)
+        self.assertFalse(Job.objects.filter(task='marker').exists())
+
+        Job.objects.filter(pk=job.pk).update(run_at=timezone.now())
+        with self.assertLogs('jobs.queue', 'ERROR'):
+            run_pending()
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.attempts), (Job.FAILED, 2))
+
+    def test_stale_jobs_are_reclaimed(self):
+        enqueue('jobs.tests.record', {'value': 1})
+        [stale] = claim()
+        self.assertEqual(claim(), [])
+
+        Job.objects.filter(pk=stale.pk).update(locked_at=timezone.now() - LOCK_TIMEOUT - timedelta(seconds=1))
+        [job] = claim()
+        self.assertEqual(job.attempts, 2)
+        # The first worker finishing late must not double apply the task
+        self.assertFalse(run(stale))
+        self.assertTrue(run(job))
+        self.assertEqual(Job.objects.filter(task='marker').count(), 1)
+
+    def test_tasks_run_outside_the_completing_transaction(self):
+        enqueue('jobs.tests.notify', {'value': 1})
+        self.assertEqual(run_pending(), 1)
+        self.assertEqual(calls, [Job.RUNNING])
+        self.assertEqual(Job.objects.get(task='jobs.tests.notify').status, Job.DONE)
+
+    def test_cancelled_running_job_has_no_effect(self):
+        enqueue('jobs.tests.record', {'value': 1}, key='one')
+        [job] = claim()
+        self.assertTrue(cancel('one'))
+        self.assertFalse(run(job))
+        self.assertFalse(Job.objects.filter(task='marker').exists())
+
+    def test_cancel(self):
+        enqueue('jobs.tests.record', {'value': 1}, key='one')
+        self.assertTrue(cancel('one'))
+        self.assertFalse(cancel('one'))
+        self.assertEqual(run_pending(), 0)
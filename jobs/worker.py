@@ -0,0 +1,37 @@
+import logging
+import time
+
+logger = logging.getLogger(__name__)
+
+
+def work(batch_size=10, interval=1.0, once=False):
+    """
+    Worker loop: claim and run due jobs, sleeping ``interval`` seconds when
+    the queue is empty. With ``once`` the loop returns as soon as the queue
+    has been drained.
+
+    This is the target of the runworker processes. It imports the queue
+    lazily, because on platforms that spawn rather than fork the child has
+    to set Django up itself first.
+    """
+    import django
+    from django.apps import apps
+
+    if not apps.ready:
+        django.setup()
+
+    from django.db import close_old_connections
+    from .queue import claim, run
+
+    try:
+        while True:
+            close_old_connections()
+            jobs = claim(batch_size)
+            for job in jobs:
+                run(job)
+            if not jobs:
+                if once:
+                    return
+                time.sleep(interval)
+    except KeyboardInterrupt:
+        pass
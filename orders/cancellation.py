@@ -0,0 +1,82 @@
+from collections import Counter, defaultdict
+from contextvars import ContextVar
+
+from django.db import transaction
+from django.utils import timezone
+
+from store.stock import release
+from .models import InventoryMovement, Order, OrderItem
+
+# Order numbers already reversed by cancel_orders, so the pre_delete
+# receiver leaves them alone while they are deleted
+_reversed = ContextVar('reversed_orders', default=frozenset())
+
+
+def already_reversed(order):
+    return order.pk in _reversed.get()
+
+
+@transaction.atomic
+def reverse_orders(orders):
+    """
+    Undo what checkout did for ``orders`` before they are deleted: put their
+    items back in stock, log the IN movements and take them out of the
+    daily reports. The number of queries does not grow with the number of
+    orders or items, only with the number of days they were placed on:
+
+    - stock is restocked by one grouped UPDATE (store.stock.release)
+    - the movements are bulk inserted
+    - orders whose reporting job has not run yet just lose the job; the
+      others are reversed out of the reports once per day
+    """
+    from jobs.queue import cancel_many
+    from .rollups import apply_lines
+    from .tasks import sale_job_key
+
+    orders = {order.pk: order for order in orders}
+    items = list(OrderItem.objects.filter(order_id__in=orders.keys(), product__isnull=False)
+                 .values_list('order_id', 'product_id', 'price', 'quantity'))
+    if not items:
+        cancel_many([sale_job_key(number) for number in orders])
+        return
+
+    # Writing first takes the lock before the jobs are looked at, see
+    # cancel_many and place_order
+    restock = Counter()
+    for _, product_id, _, qty in items:
+        restock[product_id] += qty
+    release(restock)
+    InventoryMovement.objects.bulk_create([
+        InventoryMovement(product_id=product_id, movement_type='IN', quantity=qty,
+                          note=f"Order #{order_id} returned")
+        for order_id, product_id, _, qty in items
+    ])
+
+    unreported = cancel_many([sale_job_key(number) for number in orders])
+    days = defaultdict(lambda: ([], set()))
+    for order_id, product_id, price, qty in items:
+        if sale_job_key(order_id) in unreported:
+            continue
+        lines, sales = days[timezone.localdate(orders[order_id].created)]
+        lines.append((product_id, price, qty))
+        sales.add((order_id, product_id))
+    for day, (lines, sales) in days.items():
+        apply_lines(lines, day=day, sign=-1, transactions=Counter(product_id for _, product_id in sales))
+
+
+@transaction.atomic
+def cancel_orders(orders):
+    """
+    Cancel and delete ``orders``, a queryset or list of orders, restocking
+    them in bulk. Returns the number of orders deleted.
+    """
+    orders = list(orders)
+    if not orders:
+        return 0
+    reverse_orders(orders)
+    token = _reversed.set(_reversed.get() | {order.pk for order in orders})
+    try:
+        _, deleted = Order.objects.filter(pk__in=[order.pk for order in orders]).delete()
+    finally:
+        _reversed.reset(token)
+    return deleted.get(Order._meta.label, 0)
@@ -0,0 +1,119 @@
+from datetime import date
+
+from django.core.cache import cache
+from django.db.models import Avg, Max, Min, Sum
+from django.db.models.functions import ExtractMonth
+from django.utils import timezone
+
+from .models import Order, SalesReport
+from .rollups import day_bounds
+
+CHART_VERSION_KEY = 'orders:chart-version:{year}'
+CHART_KEY = 'orders:chart:{name}:{year}:{version}'
+# Current-year charts are refreshed through the version key when orders are
+# written; the timeout only bounds entries left behind by a year rollover.
+CURRENT_YEAR_TIMEOUT = 60 * 60 * 24
+
+
+def chart_version(year):
+    key = CHART_VERSION_KEY.format(year=year)
+    version = cache.get(key)
+    if version is None:
+        cache.add(key, 1, timeout=None)
+        version = cache.get(key)
+    return version
+
+
+def bump_chart_version(year):
+    """
+    Retire the cached charts of ``year``. Called whenever the daily rollups
+    of that year change.
+    """
+    key = CHART_VERSION_KEY.format(year=year)
+    try:
+        cache.incr(key)
+    except ValueError:
+        cache.add(key, 2, timeout=None)
+
+
+def year_bounds(year):
+    return day_bounds(date(year, 1, 1))[0], day_bounds(date(year + 1, 1, 1))[0]
+
+
+def cached_chart(name, year, build):
+    """
+    Return ``build(year)``, cached per (chart, year). Past years can no
+    longer change through checkout and are kept until their rollups are
+    rebuilt.
+    """
+    key = CHART_KEY.format(name=name, year=year, version=chart_version(year))
+    data = cache.get(key)
+    if data is None:
+        data = build(year)
+        timeout = None if year < timezone.localdate().year else CURRENT_YEAR_TIMEOUT
+        cache.set(key, data, timeout)
+    return data
+
+
+def _monthly_sales(year):
+    start, end = year_bounds(year)
+    rows = (SalesReport.objects.filter(date_created__gte=start, date_created__lt=end)
+            .annotate(month=ExtractMonth('date_created')).values('month')
+            .annotate(total=Sum('total_sales')).order_by('month'))
+    return {row['month']: row['total'] for row in rows}
+
+
+def _monthly_spend(year):
+    # The rollups count transactions per product, not per order, so the
+    # average order value is the one chart read from Order, over an indexed
+    # range of one year.
+    start, end = year_bounds(year)
+    rows = (Order.objects.filter(created__gte=start, created__lt=end)
+            .annotate(month=ExtractMonth('created')).values('month')
+            .annotate(average=Avg('total_paid')).order_by('month'))
+    return {row['month']: row['average'] for row in rows}
+
+
+def _units_by_product(year):
+    start, end = year_bounds(year)
+    # materialize() writes zero rows for days without sales; products that
+    # only have those did not sell and stay off the charts
+    rows = (SalesReport.objects.filter(date_created__gte=start, date_created__lt=end, total_units_sold__gt=0)
+            .values('product__title').annotate(units=Sum('total_units_sold')).order_by('-units', 'product__title'))
+    return [(row['product__title'], row['units']) for row in rows]
+
+
+def monthly_sales(year):
+    """
+    Sales per month of ``year``, as {month number: total}.
+    """
+    return cached_chart('monthly-sales', year, _monthly_sales)
+
+
+def monthly_spend(year):
+    """
+    Average order value per month of ``year``, as {month number: average}.
+    """
+    return cached_chart('monthly-spend', year, _monthly_spend)
+
+
+def units_by_product(year):
+    """
+    (product title, units sold) pairs for ``year``, best sellers first.
+    """
+    return cached_chart('units-by-product', year, _units_by_product)
+
+
+def _years(_):
+    bounds = SalesReport.objects.filter(total_units_sold__gt=0).aggregate(first=Min('date_created'), last=Max('date_created'))
+    if bounds['first'] is None:
+        return []
+    first, last = timezone.localdate(bounds['first']).year, timezone.localdate(bounds['last']).year
+    return list(range(last, first - 1, -1))
+
+
+def sales_years():
+    """
+    Years with sales, newest first.
+    """
+    return cached_chart('years', timezone.localdate().year, _years)
@@ -0,0 +1,97 @@
+from django.db import transaction
+
+from jobs.queue import enqueue
+from store.models import MAIN_STOREFRONT_ID, Product
+from store.stock import reserve
+from .models import Order, OrderItem, InventoryMovement
+from .tasks import sale_job_key
+
+
+class InsufficientStock(ValueError):
+    """
+    Raised when one or more basket lines cannot be covered by the
+    current inventory. ``lines`` holds the offending product ids.
+    """
+
+    def __init__(self, lines):
+        self.lines = lines
+        super().__init__(f"Insufficient inventory for products {sorted(lines)}")
+
+
+def basket_lines(basket):
+    """
+    Turn the basket into (product_id, price, qty) tuples at the prices the
+    shopper was shown. place_order charges the prices in the database.
+    """
+    return basket.items()
+
+
+def place_order(*, order_number, user_id, full_name, address1, phone, lines):
+    """
+    Create a paid order for ``lines`` with a fixed number of queries,
+    whatever the size of the basket:
+
+    - stock is reserved by one conditional UPDATE (store.stock.reserve),
+      which also locks the product rows until the order commits
+    - order items and inventory movements are bulk inserted
+
+    Lines are (product_id, price, qty). The price charged is read from the
+    product rows while they are locked, not taken from the line: the basket
+    shows prices from a cache that can lag behind the database.
+
+    Updating the daily reports is queued as a background job in the same
+    transaction, so it never runs while the product rows are locked and
+    the shopper doesn't wait for it.
+    """
+    lines = [line for line in lines if line[2] > 0]
+    if not lines:
+        raise ValueError('Basket is empty.')
+    quantities = {product_id: qty for product_id, _, qty in lines}
+
+    with transaction.atomic():
+        # Writing first takes the lock up front. Reading first would make
+        # SQLite fail concurrent checkouts at once with "database is locked"
+        # when they upgrade to a write, rather than queue them.
+        failed = reserve(quantities)
+        if failed:
+            raise InsufficientStock(failed)
+        products = Product.objects.only('inventory', 'storefront', 'price').in_bulk(quantities.keys())
+        storefronts = {product.storefront_id for product in products.values()}
+
+        order = Order.objects.create(
+            # Baskets are shared across storefronts; a mixed one is booked
+            # to the main shop
+            storefront_id=storefronts.pop() if len(storefronts) == 1 else MAIN_STOREFRONT_ID,
+            user_id=user_id,
+            full_name=full_name,
+            address1=address1,
+            phone=phone,
+            total_paid=sum(products[product_id].price * qty for product_id, qty in quantities.items()),
+            order_number=order_number,
+            billing_status=True,
+        )
+
+        OrderItem.objects.bulk_create([
+            OrderItem(
+                order=order,
+                product_id=product_id,
+                price=products[product_id].price,
+                quantity=qty,
+                inventory=products[product_id].inventory,
+            )
+            for product_id, qty in quantities.items()
+        ])
+        InventoryMovement.objects.bulk_create([
+            InventoryMovement(
+                product_id=product_id,
+                movement_type='OUT',
+                quantity=qty,
+                note=f"Order #{order.order_number} stock out",
+            )
+            for product_id, qty in quantities.items()
+        ])
+
+        enqueue('orders.tasks.record_sale', {'order_id': order.pk}, key=sale_job_key(order.order_number))
+
+    return order
+
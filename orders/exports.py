@@ -0,0 +1,84 @@
+import csv
+import zlib
+
+from django.db.models import Max, Min
+from django.http import StreamingHttpResponse
+from django.utils import timezone
+
+
+class Echo:
+    """
+    File-like object whose write() just hands the value back, so csv.writer
+    can format rows without buffering them.
+    """
+
+    def write(self, value):
+        return value
+
+
+def csv_rows(queryset, heading, columns, chunk_size=2000):
+    """
+    Yield the encoded lines of a report CSV: the heading, a blank row, the
+    column headers and then one line per row of ``queryset``.
+
+    ``columns`` is a list of (header, lookup) pairs. Rows are read with
+    values_list().iterator() so only ``chunk_size`` of them are in memory at
+    a time.
+    """
+    writer = csv.writer(Echo())
+    yield writer.writerow([heading]).encode()
+    yield writer.writerow([]).encode()
+    yield writer.writerow([header for header, _ in columns]).encode()
+
+    lookups = [lookup for _, lookup in columns]
+    buffer = []
+    for row in queryset.values_list(*lookups).iterator(chunk_size=chunk_size):
+        buffer.append(writer.writerow(row))
+        if len(buffer) == chunk_size:
+            yield ''.join(buffer).encode()
+            buffer = []
+    if buffer:
+        yield ''.join(buffer).encode()
+
+
+def gzipped(chunks):
+    compressor = zlib.compressobj(wbits=31)
+    for chunk in chunks:
+        data = compressor.compress(chunk)
+        if data:
+            yield data
+    yield compressor.flush()
+
+
+def stream_csv(queryset, filename, title, date_field, columns, gzip=False):
+    """
+    Build a StreamingHttpResponse for a report export. The title row and the
+    filename carry the date range covered by ``date_field``.
+    """
+    bounds = queryset.order_by().aggregate(earliest=Min(date_field), latest=Max(date_field))
+    if bounds['earliest'] and bounds['latest']:
+        date_range = f"{bounds['earliest']:%Y-%m-%d} to {bounds['latest']:%Y-%m-%d}"
+        filename = f"{filename}_{bounds['latest']:%Y-%m-%d}.csv"
+    else:
+        date_range = f"Date: {timezone.now():%Y-%m-%d}"
+        filename = f"{filename}_{timezone.now():%Y-%m-%d}.csv"
+    rows = csv_rows(queryset, f"{title} for: {date_range}", columns)
+
+    if gzip:
+        response = StreamingHttpResponse(gzipped(rows), content_type='application/gzip')
+        filename += '.gz'
+    else:
+        response = StreamingHttpResponse(rows, content_type='text/csv')
+    response['Content-Disposition'] = f'attachment; filename={filename}'
+    return response
+
+
+def model_columns(model, exclude):
+    """
+    CSV columns for every concrete field of ``model`` not in ``exclude``.
+    Foreign keys to products are exported by title, like their __str__.
+    """
+    return [
+        (field.name, f'{field.name}__title' if field.is_relation else field.name)
+        for field in model._meta.fields if field.name not in exclude
+    ]
@@ -1,4 +1,7 @@
+from datetime import timedelta
+
 from django import forms
+from django.utils import timezone
 from .models import Order
 
 class StockHistorySearchForm(forms.ModelForm):
@@ -7,4 +10,18 @@ class StockHistorySearchForm(forms.ModelForm):
 
 	class Meta:
 		model = Order
-		fields = ['start_date', 'end_date']
\ No newline at end of file
+		fields = ['start_date', 'end_date']
+
+class DateWindowForm(forms.Form):
+	start_date = forms.DateField(required=False, widget=forms.DateInput(attrs={'class': 'datetimeinput', 'type': 'date'}))
+	end_date = forms.DateField(required=False, widget=forms.DateInput(attrs={'class': 'datetimeinput', 'type': 'date'}))
+
+	def window(self, days=30):
+		"""
+		The (start, end) dates picked, both inclusive. Missing or invalid
+		dates default to the last ``days`` days.
+		"""
+		data = self.cleaned_data if self.is_bound and self.is_valid() else {}
+		end = data.get('end_date') or timezone.localdate()
+		start = data.get('start_date') or end - timedelta(days=days - 1)
+		return start, end
@@ -0,0 +1,90 @@
+import time
+from decimal import Decimal
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+from store.models import Product
+from orders.checkout import place_order
+from orders.rollups import apply_lines
+from orders.models import Order, OrderItem, InventoryReport, SalesReport, InventoryMovement
+
+
+def legacy_checkout(order_number, user_id, lines):
+    """
+    The per-line checkout that orders.views.add used before the set-based
+    engine, kept here as the benchmark baseline.
+    """
+    order = Order.objects.create(user_id=user_id, full_name='bench', address1='bench', phone='0',
+                                 total_paid=sum(price * qty for _, price, qty in lines),
+                                 order_number=order_number)
+    Order.objects.filter(order_number=order_number).update(billing_status=True)
+    today = timezone.now().date()
+    for product_id, price, qty in lines:
+        inv = Product.objects.select_for_update().get(id=product_id)
+        inv.inventory -= qty
+        inv.save()
+        OrderItem.objects.create(order_id=order.pk, product=inv, price=price, quantity=qty)
+        InventoryMovement.objects.create(product=inv, movement_type='OUT', quantity=qty,
+                                         note=f"Order #{order_number} stock out")
+        inventory_report, _ = InventoryReport.objects.get_or_create(
+            product=inv, created__date=today, defaults={'created': timezone.now()})
+        inventory_report.quantity_sold = inventory_report.calculate_amount_sold()
+        inventory_report.save()
+        sales_report, _ = SalesReport.objects.get_or_create(
+            product=inv, date_created__date=today, defaults={'date_created': timezone.now()})
+        sales_report.total_sales = sales_report.calculate_total_sales()
+        sales_report.total_units_sold = sales_report.calculate_total_units_sold()
+        sales_report.number_of_transactions = sales_report.calculate_number_of_transactions()
+        sales_report.save()
+
+
+class Command(BaseCommand):
+    help = 'Compare query count and latency of the legacy and set-based checkout paths. Rolls back all writes.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--sizes', default='1,10,30,100', help='Comma separated basket sizes')
+        parser.add_argument('--repeat', type=int, default=5)
+
+    def handle(self, *args, **options):
+        sizes = [int(size) for size in options['sizes'].split(',')]
+        repeat = options['repeat']
+
+        self.stdout.write(f"{'lines':>6} {'path':>8} {'queries':>8} {'ms/order':>10}")
+        with transaction.atomic():
+            user = get_user_model().objects.create(email='bench@example.com', user_name='bench-checkout')
+            products = Product.objects.bulk_create([
+                Product(created_by=user, title=f'bench-{i}', slug=f'bench-{i}',
+                        price=Decimal('9.99'), inventory=10 ** 6)
+                for i in range(max(sizes))
+            ])
+            order_number = 10 ** 8
+
+            for size in sizes:
+                lines = [(product.id, product.price, 1) for product in products[:size]]
+                for name in ('legacy', 'set'):
+                    elapsed = 0.0
+                    for _ in range(repeat):
+                        order_number += 1
+                        with CaptureQueriesContext(connection) as ctx:
+                            started = time.perf_counter()
+                            if name == 'legacy':
+                                legacy_checkout(order_number, user.id, lines)
+                            else:
+                                place_order(order_number=order_number, user_id=user.id, full_name='bench',
+                                            address1='bench', phone='0', lines=lines)
+                            elapsed += time.perf_counter() - started
+                    self.stdout.write(f"{size:>6} {name:>8} {len(ctx.captured_queries):>8} "
+                                      f"{elapsed * 1000 / repeat:>10.2f}")
+
+                with CaptureQueriesContext(connection) as ctx:
+                    started = time.perf_counter()
+                    apply_lines(lines)
+                    elapsed = time.perf_counter() - started
+                self.stdout.write(f"{size:>6} {'reports':>8} {len(ctx.captured_queries):>8} "
+                                  f"{elapsed * 1000:>10.2f}  (after commit)")
+
+            transaction.set_rollback(True)
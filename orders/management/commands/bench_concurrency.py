@@ -0,0 +1,189 @@
+import json
+import random
+import threading
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from decimal import Decimal
+from http.cookiejar import CookieJar
+from urllib.error import HTTPError
+from urllib.parse import urlencode
+from urllib.request import HTTPCookieProcessor, Request, build_opener
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.db import connection, connections
+from django.db.models import Sum
+from django.test import Client
+from django.test.utils import setup_test_environment
+from django.urls import reverse
+
+from jobs.models import Job
+from orders.cancellation import cancel_orders
+from orders.models import Order, OrderItem
+from orders.tasks import sale_job_key
+from store.models import Product
+
+PASSWORD = 'bench-concurrency'
+
+
+def _json(body):
+    try:
+        return json.loads(body)
+    except ValueError:
+        return {}
+
+
+class ClientTill:
+    """
+    A till driving the views in this process through the test client. Each
+    till runs in its own thread and so has its own database connection.
+    """
+
+    def __init__(self, user, base_url=None):
+        self.client = Client()
+        self.client.force_login(user)
+
+    def post(self, path, data):
+        response = self.client.post(path, data)
+        return response.status_code, _json(response.content)
+
+
+class HttpTill:
+    """
+    A till logged in to a running server at ``base_url``, such as
+    manage.py runserver or a WSGI server on the same database.
+    """
+
+    def __init__(self, user, base_url):
+        self.base_url = base_url.rstrip('/')
+        self.cookies = CookieJar()
+        self.opener = build_opener(HTTPCookieProcessor(self.cookies))
+        login = reverse('account:login')
+        self.opener.open(self.base_url + login)
+        self.post(login, {'username': user.email, 'password': PASSWORD})
+
+    def post(self, path, data):
+        token = next((cookie.value for cookie in self.cookies if cookie.name == 'csrftoken'), '')
+        request = Request(self.base_url + path, data=urlencode(data).encode(),
+                          headers={'X-CSRFToken': token, 'Referer': self.base_url + path})
+        try:
+            with self.opener.open(request, timeout=60) as response:
+                return response.status, _json(response.read())
+        except HTTPError as error:
+            return error.code, _json(error.read())
+
+
+def outcome(status, body):
+    if status == 200:
+        return 'ok'
+    if status == 400 and 'lines' in body:
+        return 'out of stock'
+    if status == 503:
+        return 'lock errors'
+    return 'errors'
+
+
+def percentile(values, p):
+    """
+    Nearest-rank percentile of the sorted ``values``.
+    """
+    if not values:
+        return 0.0
+    return values[min(len(values) - 1, max(0, round(p / 100 * len(values)) - 1))]
+
+
+class Command(BaseCommand):
+    help = ('Check out from many simulated tills at once against a few shared hot products and report orders/s, '
+            'latency percentiles, lock errors and oversold units. Runs the views through the test client, or '
+            'against a running server with --url. Point the settings at PostgreSQL (POSTGRES_DB) to compare '
+            'databases. Bench data is committed while the tills run and deleted afterwards.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--tills', type=int, default=8, help='Concurrent checkouts')
+        parser.add_argument('--orders', type=int, default=25, help='Checkouts per till')
+        parser.add_argument('--skus', type=int, default=4, help='Hot products shared by all tills')
+        parser.add_argument('--lines', type=int, default=2, help='Products per basket')
+        parser.add_argument('--qty', type=int, default=1, help='Units per basket line')
+        parser.add_argument('--stock', type=int, default=50,
+                            help='Starting inventory of each hot product; keep it below demand to test oversell')
+        parser.add_argument('--url', help='Base URL of a running server to check out against')
+        parser.add_argument('--seed', type=int, default=0)
+        parser.add_argument('--keep', action='store_true', help='Keep the bench orders and products')
+
+    def handle(self, *args, **options):
+        if options['url'] is None:
+            # Lets the test client's "testserver" host through ALLOWED_HOSTS
+            setup_test_environment()
+        till_class = ClientTill if options['url'] is None else HttpTill
+
+        stamp = time.time_ns()
+        user = get_user_model().objects.create_user(email=f'bench-{stamp}@example.com', user_name=f'bench-{stamp}',
+                                                    password=PASSWORD, is_active=True)
+        products = Product.objects.bulk_create([
+            Product(created_by=user, title=f'bench-hot-{stamp}-{i}', slug=f'bench-hot-{i}', price=Decimal('9.99'),
+                    inventory=options['stock'])
+            for i in range(options['skus'])
+        ])
+        products = list(Product.objects.filter(created_by=user))
+        rng = random.Random(options['seed'])
+        baskets = [rng.sample(products, min(options['lines'], len(products))) for _ in range(options['tills'])]
+
+        start = threading.Barrier(options['tills'])
+        results = []
+
+        def run_till(basket):
+            try:
+                till = till_class(user, options['url'])
+                for product in basket:
+                    till.post(reverse('basket:basket_add'),
+                              {'action': 'post', 'productid': product.id, 'productqty': options['qty']})
+                start.wait()
+                timings = []
+                for _ in range(options['orders']):
+                    started = time.perf_counter()
+                    status, body = till.post(reverse('orders:add'),
+                                             {'action': 'post', 'cusName': 'bench', 'add': 'bench', 'phone_num': '0'})
+                    timings.append((time.perf_counter() - started, outcome(status, body)))
+                return timings
+            finally:
+                connections.close_all()
+
+        try:
+            started = time.perf_counter()
+            with ThreadPoolExecutor(max_workers=options['tills']) as executor:
+                for timings in executor.map(run_till, baskets):
+                    results += timings
+            elapsed = time.perf_counter() - started
+            self.report(options, products, user, results, elapsed)
+        finally:
+            if not options['keep']:
+                self.cleanup(user)
+
+    def report(self, options, products, user, results, elapsed):
+        outcomes = Counter(kind for _, kind in results)
+        latencies = sorted(seconds * 1000 for seconds, kind in results if kind != 'errors')
+
+        sold = dict(OrderItem.objects.filter(order__user=user).values('product_id')
+                    .annotate(units=Sum('quantity')).values_list('product_id', 'units'))
+        remaining = dict(Product.objects.filter(pk__in=[p.pk for p in products]).values_list('id', 'inventory'))
+        stock = options['stock']
+        oversold = sum(max(0, sold.get(p.pk, 0) - stock) for p in products)
+        # Units that are neither sold nor left on the shelf: lost updates
+        drift = sum(abs(stock - sold.get(p.pk, 0) - remaining[p.pk]) for p in products)
+
+        self.stdout.write(f"database: {connection.vendor}  target: {options['url'] or 'test client'}  "
+                          f"tills: {options['tills']}  hot products: {len(products)}  stock each: {stock}")
+        self.stdout.write(f"{'ok':>6} {'no stock':>9} {'locked':>7} {'errors':>7} {'orders/s':>9} "
+                          f"{'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'oversold':>9} {'drift':>6}")
+        self.stdout.write(f"{outcomes['ok']:>6} {outcomes['out of stock']:>9} {outcomes['lock errors']:>7} "
+                          f"{outcomes['errors']:>7} {outcomes['ok'] / elapsed:>9.1f} "
+                          f"{percentile(latencies, 50):>8.1f} {percentile(latencies, 95):>8.1f} "
+                          f"{percentile(latencies, 99):>8.1f} {oversold:>9} {drift:>6}")
+
+    def cleanup(self, user):
+        order_numbers = list(Order.objects.filter(user=user).values_list('order_number', flat=True))
+        # Cancelling the orders restocks them and drops their queued report jobs
+        cancel_orders(Order.objects.filter(user=user))
+        Job.objects.filter(idempotency_key__in=[f'invoice:{number}' for number in order_numbers]).delete()
+        user.delete()
@@ -0,0 +1,75 @@
+import resource
+import time
+from datetime import timedelta
+from decimal import Decimal
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.utils import timezone
+
+from store.models import Product
+from orders.exports import model_columns, stream_csv
+from orders.models import SalesReport
+from orders.rollups import day_bounds
+
+DAYS = 365
+
+
+def peak_rss_mb():
+    # ru_maxrss is reported in kilobytes on Linux
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+class Command(BaseCommand):
+    help = ('Export synthetic SalesReport rows through the streaming CSV export and check that '
+            'peak RSS stays bounded. Rolls back all writes.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rows', type=int, default=1_000_000)
+        parser.add_argument('--gzip', action='store_true')
+        parser.add_argument('--max-rss-growth', type=float, default=64, help='Allowed peak RSS growth in MB')
+
+    def handle(self, *args, **options):
+        rows = options['rows']
+        with transaction.atomic():
+            user = get_user_model().objects.create(email='bench@example.com', user_name='bench-export')
+            # One row per product and day, as the reports hold them: a year
+            # of days for as many products as the rows need
+            days = [timezone.localdate() - timedelta(days=offset) for offset in range(DAYS)]
+            products = Product.objects.bulk_create([
+                Product(created_by=user, title=f'bench-export-{i}', slug=f'bench-export-{i}', price=Decimal('9.99'))
+                for i in range(-(-rows // DAYS))
+            ])
+
+            def report(n):
+                product, day = products[n // DAYS], days[n % DAYS]
+                return SalesReport(product=product, product_title=product.title, product_price=product.price,
+                                   total_sales=Decimal('19.98'), total_units_sold=2, number_of_transactions=1,
+                                   average_transaction_value=Decimal('19.98'), date_created=day_bounds(day)[0],
+                                   report_date=day)
+
+            for start in range(0, rows, 10_000):
+                SalesReport.objects.bulk_create([report(n) for n in range(start, min(start + 10_000, rows))])
+            self.stdout.write(f"Inserted {rows} rows")
+
+            before = peak_rss_mb()
+            started = time.perf_counter()
+            response = stream_csv(SalesReport.objects.all(), 'sales', 'Sales Report', 'date_created',
+                                  model_columns(SalesReport, exclude=["product_title", "id", "order"]),
+                                  gzip=options['gzip'])
+            first_byte = None
+            size = 0
+            for chunk in response.streaming_content:
+                if first_byte is None:
+                    first_byte = time.perf_counter() - started
+                size += len(chunk)
+            elapsed = time.perf_counter() - started
+            growth = peak_rss_mb() - before
+
+            transaction.set_rollback(True)
+
+        self.stdout.write(f"bytes={size} first_byte={first_byte * 1000:.1f}ms total={elapsed:.2f}s "
+                          f"rows/s={rows / elapsed:.0f} peak_rss_growth={growth:.1f}MB")
+        if growth > options['max_rss_growth']:
+            raise CommandError(f"Peak RSS grew by {growth:.1f}MB, more than {options['max_rss_growth']}MB")
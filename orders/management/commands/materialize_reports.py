@@ -0,0 +1,24 @@
+from datetime import date, timedelta
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from orders.rollups import materialize
+
+
+class Command(BaseCommand):
+    help = ('Fill in the missing per-product daily SalesReport/InventoryReport rows. '
+            'Meant to run from cron once a day, or on demand.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--days', type=int, default=30, help='How many days back from --end to cover')
+        parser.add_argument('--start', type=date.fromisoformat, help='First day (YYYY-MM-DD), overrides --days')
+        parser.add_argument('--end', type=date.fromisoformat, help='Last day (YYYY-MM-DD), defaults to today')
+
+    def handle(self, *args, **options):
+        end = options['end'] or timezone.localdate()
+        start = options['start'] or end - timedelta(days=options['days'])
+
+        sales, inventory = materialize(start, end)
+        self.stdout.write(self.style.SUCCESS(
+            f"Created {sales} sales and {inventory} inventory report rows between {start} and {end}"))
@@ -0,0 +1,26 @@
+from datetime import date
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from orders.rollups import rebuild
+
+
+class Command(BaseCommand):
+    help = 'Rebuild the daily SalesReport/InventoryReport rollups from OrderItem for a date range.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--start', type=date.fromisoformat, help='First day (YYYY-MM-DD), defaults to --end')
+        parser.add_argument('--end', type=date.fromisoformat, help='Last day (YYYY-MM-DD), defaults to today')
+        parser.add_argument('--check', action='store_true', help='Only report drift, do not write anything')
+
+    def handle(self, *args, **options):
+        end = options['end'] or timezone.localdate()
+        start = options['start'] or end
+
+        drift = rebuild(start, end, dry_run=options['check'])
+        for report, product_id, day in sorted(drift, key=lambda row: (row[2], row[1], row[0])):
+            self.stdout.write(f"{day} product={product_id} {report} report drifted")
+
+        verb = 'Found' if options['check'] else 'Repaired'
+        self.stdout.write(self.style.SUCCESS(f"{verb} {len(drift)} drifted rows between {start} and {end}"))
@@ -0,0 +1,41 @@
+# Generated by Django 4.1.6 on 2026-10-18 15:39
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('orders', '0015_inventorymovement'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='inventoryreport',
+            index=models.Index(fields=['created'], name='invreport_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='inventoryreport',
+            index=models.Index(fields=['product', 'created'], name='invreport_product_day_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='order',
+            index=models.Index(fields=['created'], name='order_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='order',
+            index=models.Index(condition=models.Q(('billing_status', True)), fields=['-created'], name='order_billed_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='order',
+            index=models.Index(condition=models.Q(('billing_status', True)), fields=['user', '-created'], name='order_user_billed_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='salesreport',
+            index=models.Index(fields=['date_created'], name='salesreport_date_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='salesreport',
+            index=models.Index(fields=['product', 'date_created'], name='salesreport_product_day_idx'),
+        ),
+    ]
@@ -0,0 +1,64 @@
+# Generated by Django 4.1.6 on 2026-10-18 15:41
+
+from django.db import migrations, models
+import django.utils.timezone
+from django.utils import timezone
+
+
+def fill_report_dates(apps, schema_editor):
+    """
+    Set report_date from each row's timestamp. Where racing get_or_create
+    calls left several rows for one product and day, keep the oldest: the
+    incremental rollups applied every change to all of them alike.
+    """
+    for model_name, date_field in (('SalesReport', 'date_created'), ('InventoryReport', 'created')):
+        model = apps.get_model('orders', model_name)
+        kept, duplicates, changed = set(), [], []
+        for report in model.objects.order_by('id').only('id', 'product_id', date_field).iterator():
+            day = timezone.localdate(getattr(report, date_field))
+            if (report.product_id, day) in kept:
+                duplicates.append(report.id)
+                continue
+            kept.add((report.product_id, day))
+            report.report_date = day
+            changed.append(report)
+        for start in range(0, len(duplicates), 500):
+            model.objects.filter(id__in=duplicates[start:start + 500]).delete()
+        model.objects.bulk_update(changed, ['report_date'], batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('orders', '0016_hot_query_indexes'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='inventoryreport',
+            name='invreport_product_day_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='salesreport',
+            name='salesreport_product_day_idx',
+        ),
+        migrations.AddField(
+            model_name='inventoryreport',
+            name='report_date',
+            field=models.DateField(default=django.utils.timezone.localdate),
+        ),
+        migrations.AddField(
+            model_name='salesreport',
+            name='report_date',
+            field=models.DateField(default=django.utils.timezone.localdate),
+        ),
+        migrations.RunPython(fill_report_dates, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='inventoryreport',
+            constraint=models.UniqueConstraint(fields=('product', 'report_date'), name='invreport_product_day_uniq'),
+        ),
+        migrations.AddConstraint(
+            model_name='salesreport',
+            constraint=models.UniqueConstraint(fields=('product', 'report_date'), name='salesreport_product_day_uniq'),
+        ),
+    ]
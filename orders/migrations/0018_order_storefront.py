@@ -0,0 +1,20 @@
+# Generated by Django 4.1.6 on 2026-10-18 15:56
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('store', '0009_storefronts'),
+        ('orders', '0017_report_date'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='order',
+            name='storefront',
+            field=models.ForeignKey(default=1, on_delete=django.db.models.deletion.PROTECT, to='store.storefront'),
+        ),
+    ]
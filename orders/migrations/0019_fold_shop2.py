@@ -0,0 +1,111 @@
+from datetime import timezone
+
+from django.db import migrations, models
+from django.utils.dateparse import parse_datetime
+
+SHOP2_STOREFRONT = 'sj'
+
+
+def _rows(cursor, table):
+    cursor.execute(f'SELECT * FROM "{table}"')
+    columns = [column[0] for column in cursor.description]
+    return [dict(zip(columns, row)) for row in cursor.fetchall()]
+
+
+def _value(field, value):
+    # Raw reads skip the backend's converters: SQLite hands back datetimes
+    # as naive UTC strings.
+    if isinstance(field, models.DateTimeField) and value is not None:
+        if isinstance(value, str):
+            value = parse_datetime(value)
+        if value.tzinfo is None:
+            value = value.replace(tzinfo=timezone.utc)
+    return value
+
+
+def _copy(model, row, **values):
+    # Keep the columns the shared model has; shop2's tables predate some of
+    # them and the defaults fill in the rest.
+    fields = {field.attname: field for field in model._meta.concrete_fields if not field.primary_key}
+    copied = {name: _value(fields[name], value) for name, value in row.items() if name in fields}
+    return model(**{**copied, **values})
+
+
+def fold_shop2(apps, schema_editor):
+    """
+    Copy the catalog and orders of the old shop2 app into the shared store
+    and orders tables, under the School Junction storefront. A no-op where
+    shop2 was never migrated.
+
+    Rows get new ids, and orders new order numbers, from the shared tables.
+    Daily reports are not copied: rebuild_reports regenerates them from the
+    orders. The shop2 tables are left in place.
+    """
+    connection = schema_editor.connection
+    tables = set(connection.introspection.table_names())
+    if 'shop2_product' not in tables:
+        return
+
+    Storefront = apps.get_model('store', 'Storefront')
+    Category = apps.get_model('store', 'Category')
+    SubCategory = apps.get_model('store', 'SubCategory')
+    Product = apps.get_model('store', 'Product')
+    Order = apps.get_model('orders', 'Order')
+    OrderItem = apps.get_model('orders', 'OrderItem')
+    storefront = Storefront.objects.get(slug=SHOP2_STOREFRONT)
+
+    with connection.cursor() as cursor:
+        categories = _rows(cursor, 'shop2_category')
+        subcategories = _rows(cursor, 'shop2_subcategory')
+        products = _rows(cursor, 'shop2_product')
+        orders = _rows(cursor, 'shop2_order')
+        items = _rows(cursor, 'shop2_orderitem')
+
+    # Objects are created in the old rows' order, so zip() pairs each old id
+    # with its new object once bulk_create has set the new ids.
+    category_ids = dict(zip(
+        [row['id'] for row in categories],
+        [obj.id for obj in Category.objects.bulk_create(
+            [_copy(Category, row, storefront=storefront) for row in categories])],
+    ))
+    subcategory_ids = dict(zip(
+        [row['id'] for row in subcategories],
+        [obj.id for obj in SubCategory.objects.bulk_create(
+            [_copy(SubCategory, row, categories_id=category_ids[row['categories_id']]) for row in subcategories])],
+    ))
+    copies = Product.objects.bulk_create([
+        _copy(Product, row, storefront=storefront,
+              category_id=category_ids.get(row['category_id']),
+              subcategory_id=subcategory_ids.get(row['subcategory_id']))
+        for row in products
+    ])
+    # created is auto_now_add, so bulk_create stamped it; the listings are
+    # ordered by it, so put the original back
+    for obj, row in zip(copies, products):
+        obj.created = _value(Product._meta.get_field('created'), row['created'])
+    Product.objects.bulk_update(copies, ['created'])
+    product_ids = dict(zip([row['id'] for row in products], [obj.id for obj in copies]))
+    order_numbers = dict(zip(
+        [row['order_number'] for row in orders],
+        [obj.order_number for obj in Order.objects.bulk_create(
+            [_copy(Order, row, storefront=storefront) for row in orders])],
+    ))
+    OrderItem.objects.bulk_create([
+        _copy(OrderItem, row, order_id=order_numbers[row['order_id']], product_id=product_ids.get(row['product_id']))
+        for row in items
+        if row['order_id'] in order_numbers
+    ])
+
+    from store.search import index_products
+    index_products(product_ids.values())
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('orders', '0018_order_storefront'),
+    ]
+
+    operations = [
+        migrations.RunPython(fold_shop2, migrations.RunPython.noop),
+    ]
@@ -2,13 +2,14 @@ from decimal import Decimal
 from django.conf import settings
 from django.db import models
 from django.utils import timezone
-from store.models import Product
+from store.models import MAIN_STOREFRONT_ID, Product, Storefront
 from django.db.models import F, Sum
-from django.db.models.signals import pre_delete
+from django.db.models.signals import post_delete, post_save, pre_delete
 from django.dispatch import receiver
 
 
 class Order(models.Model):
+    storefront = models.ForeignKey(Storefront, on_delete=models.PROTECT, default=MAIN_STOREFRONT_ID)
     user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='order_user')
     full_name = models.CharField(max_length=50)
     address1 = models.CharField(max_length=250)
@@ -22,10 +23,29 @@ class Order(models.Model):
 
     class Meta:
         ordering = ('-created',)
+        indexes = [
+            # Date windows: charts, exports, report rebuilds
+            models.Index(fields=['created'], name='order_created_idx'),
+            # Paid orders, newest first: staff order history and sales pages,
+            # and per customer. Partial, because Django filters
+            # billing_status=True as a bare boolean column rather than an
+            # equality a composite index could match.
+            models.Index(fields=['-created'], condition=models.Q(billing_status=True),
+                         name='order_billed_created_idx'),
+            models.Index(fields=['user', '-created'], condition=models.Q(billing_status=True),
+                         name='order_user_billed_idx'),
+        ]
     
     def __str__(self):
         return str(self.created)
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        order = super().from_db(db, field_names, values)
+        # Remembered so saving can tell when an order has just been paid
+        order._was_billed = dict(zip(field_names, values)).get('billing_status', False)
+        return order
+
         
 
 class OrderItem(models.Model):
@@ -62,9 +82,17 @@ class InventoryReport(models.Model):
     inventory_on_hand = models.PositiveIntegerField(default=0)
     quantity_sold = models.PositiveIntegerField(default=0)
     created = models.DateTimeField(default=timezone.now)
+    # The local day this row reports on; one row per product and day
+    report_date = models.DateField(default=timezone.localdate)
 
     class Meta:
         ordering = ('-created',)
+        indexes = [
+            models.Index(fields=['created'], name='invreport_created_idx'),
+        ]
+        constraints = [
+            models.UniqueConstraint(fields=['product', 'report_date'], name='invreport_product_day_uniq'),
+        ]
 
     def calculate_days_on_hand(self):
     # Calculate days on hand based on last order date
@@ -79,17 +107,21 @@ class InventoryReport(models.Model):
         return self.product.inventory
 
     def calculate_amount_sold(self):
+        from .rollups import day_bounds
+        start, end = day_bounds(timezone.localdate(self.created))
         total_quantity_sold = OrderItem.objects.filter(
             product=self.product,
-            order__created__date=self.created
+            order__created__gte=start,
+            order__created__lt=end,
         ).aggregate(total=Sum('quantity'))['total']
         return total_quantity_sold if total_quantity_sold else 0
 
     def save(self, *args, **kwargs):
+        # quantity_sold is maintained incrementally by orders.rollups
+        self.report_date = timezone.localdate(self.created)
         self.product_title = self.product.title
         self.days_on_hand = self.calculate_days_on_hand()
         self.inventory_on_hand = self.calculate_inventory_on_hand()
-        self.quantity_sold = self.calculate_amount_sold()
         super().save(*args, **kwargs)
 
     def __str__(self):
@@ -107,17 +139,32 @@ class SalesReport(models.Model):
     average_transaction_value = models.DecimalField(max_digits=10, decimal_places=2, default=Decimal('0.00'))
     order = models.ForeignKey(Order, on_delete=models.CASCADE, related_name='sales_reports', null=True)
     date_created = models.DateTimeField(default=timezone.now)
+    # The local day this row reports on; one row per product and day
+    report_date = models.DateField(default=timezone.localdate)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['date_created'], name='salesreport_date_idx'),
+        ]
+        constraints = [
+            models.UniqueConstraint(fields=['product', 'report_date'], name='salesreport_product_day_uniq'),
+        ]
+
+    def day_items(self):
+        from .rollups import day_bounds
+        start, end = day_bounds(timezone.localdate(self.date_created))
+        return OrderItem.objects.filter(product_id=self.product_id, order__created__gte=start, order__created__lt=end)
 
     def calculate_total_sales(self):
-        total_sales = self.product.order_items.filter(order__created__date=self.date_created.date()).aggregate(total=Sum(F('price') * F('quantity')))['total']
+        total_sales = self.day_items().aggregate(total=Sum(F('price') * F('quantity')))['total']
         return total_sales if total_sales else Decimal('0.00')
 
     def calculate_total_units_sold(self):
-        total_units_sold = self.product.order_items.filter(order__created__date=self.date_created.date()).aggregate(total=Sum('quantity'))['total']
+        total_units_sold = self.day_items().aggregate(total=Sum('quantity'))['total']
         return total_units_sold if total_units_sold else 0
 
     def calculate_number_of_transactions(self):
-        number_of_transactions = self.product.order_items.filter(order__created__date=self.date_created.date()).values('order_id').distinct().count()
+        number_of_transactions = self.day_items().values('order_id').distinct().count()
         return number_of_transactions
 
     def calculate_average_transaction_value(self):
@@ -132,11 +179,10 @@ class SalesReport(models.Model):
         return self.product_title
 
     def save(self, *args, **kwargs):
+        # The totals are maintained incrementally by orders.rollups
+        self.report_date = timezone.localdate(self.date_created)
         self.product_price = self.calculate_product_price()
         self.product_title = self.product.title
-        self.total_sales = self.calculate_total_sales()
-        self.total_units_sold = self.calculate_total_units_sold()
-        self.number_of_transactions = self.calculate_number_of_transactions()
         self.average_transaction_value = self.calculate_average_transaction_value()
         super().save(*args, **kwargs)
 
@@ -155,22 +201,33 @@ class InventoryMovement(models.Model):
     def __str__(self):
         return f"{self.product} - {self.movement_type} - {self.quantity} on {self.timestamp:%Y-%m-%d}"
 
+    def stock_change(self):
+        """
+        The signed change this movement makes to the product's inventory.
+        """
+        return self.quantity if self.movement_type == 'IN' else -self.quantity
+
 
 @receiver(pre_delete, sender=Order)
 def handle_order_delete(sender, instance, **kwargs):
-    # Restore product inventory and create InventoryMovement for each item
-    for item in instance.items.all():
-        if item.product:
-            # Update product inventory
-            item.product.inventory += item.quantity
-            item.product.save(update_fields=['inventory'])
-            # Log the inventory movement
-            InventoryMovement.objects.create(
-                product=item.product,
-                quantity=item.quantity,
-                note="Returned order",
-                movement_type="IN",
-                timestamp=timezone.now()
-            )
-    # Delete related InventoryReport and SalesReport for this order
-    
\ No newline at end of file
+    # Restock the order, log the movements and take it back out of the daily
+    # reports. cancel_orders does this in bulk before deleting its orders.
+    from .cancellation import already_reversed, reverse_orders
+    if not already_reversed(instance):
+        reverse_orders([instance])
+
+
+@receiver(post_save, sender=Order)
+def prerender_paid_invoice(sender, instance, **kwargs):
+    if instance.billing_status and not getattr(instance, '_was_billed', False):
+        from jobs.queue import enqueue
+        enqueue('payment.tasks.prerender_invoice', {'order_number': instance.order_number},
+                key=f'invoice:{instance.order_number}')
+    instance._was_billed = instance.billing_status
+
+
+@receiver([post_save, post_delete], sender=Order)
+def invalidate_closed_summaries(sender, instance, **kwargs):
+    if timezone.localdate(instance.created) < timezone.localdate():
+        from .summaries import bump_summary_version
+        bump_summary_version()
@@ -0,0 +1,334 @@
+from collections import defaultdict
+from datetime import datetime, time, timedelta
+from decimal import Decimal
+
+from django.db import connection, models, transaction
+from django.db.models import Case, Count, Exists, ExpressionWrapper, F, Func, OuterRef, Sum, Value, When
+from django.db.models.functions import Cast, Greatest, TruncDate
+from django.utils import timezone
+
+from store.models import Product
+from .models import InventoryReport, OrderItem, SalesReport
+
+
+def order_lines(order):
+    """
+    Return the (product_id, price, qty) lines of a saved order.
+    """
+    return list(order.items.filter(product__isnull=False).values_list('product_id', 'price', 'quantity'))
+
+
+def _deltas(lines):
+    deltas = defaultdict(lambda: [0, Decimal('0.00')])
+    for product_id, price, qty in lines:
+        deltas[product_id][0] += qty
+        deltas[product_id][1] += Decimal(price) * qty
+    return deltas
+
+
+def _case(values, output_field):
+    return Case(
+        *[When(product_id=product_id, then=Value(value)) for product_id, value in values.items()],
+        output_field=output_field,
+    )
+
+
+def _shift(field, values, sign, output_field):
+    expression = F(field) + sign * _case(values, output_field)
+    if sign < 0:
+        expression = Greatest(expression, Value(0), output_field=output_field)
+    return expression
+
+
+def day_bounds(day):
+    """
+    Return the aware [start, end) datetimes of ``day``, so date filters can
+    be written as index friendly range predicates.
+    """
+    start = timezone.make_aware(datetime.combine(day, time.min))
+    return start, start + timedelta(days=1)
+
+
+def _upsert(reports, increment=(), replace=(), assign=None):
+    """
+    Insert ``reports`` with a single INSERT ... ON CONFLICT DO UPDATE. Where
+    a row for the same product and report_date already exists, the
+    ``increment`` columns are added to it and the ``replace`` columns
+    overwritten. ``assign`` maps further columns to SQL expressions over
+    the existing row (``{table}.column``) and the new one (``excluded.column``).
+
+    Concurrent writers never read the counters, so there is no window in
+    which two of them can both create the row or lose each other's update.
+    """
+    if not reports:
+        return
+    opts = reports[0]._meta
+    qn = connection.ops.quote_name
+    table = qn(opts.db_table)
+    fields = [field for field in opts.concrete_fields if not field.primary_key]
+
+    sets = [f'{qn(column)} = {table}.{qn(column)} + excluded.{qn(column)}' for column in increment]
+    sets += [f'{qn(column)} = excluded.{qn(column)}' for column in replace]
+    sets += [f'{qn(column)} = {expression.format(table=table)}' for column, expression in (assign or {}).items()]
+    row = '(' + ', '.join(['%s'] * len(fields)) + ')'
+
+    batch_size = connection.ops.bulk_batch_size(fields, reports)
+    with connection.cursor() as cursor:
+        for start in range(0, len(reports), batch_size):
+            batch = reports[start:start + batch_size]
+            cursor.execute(
+                f"INSERT INTO {table} ({', '.join(qn(field.column) for field in fields)}) "
+                f"VALUES {', '.join([row] * len(batch))} "
+                f"ON CONFLICT ({qn('product_id')}, {qn('report_date')}) DO UPDATE SET {', '.join(sets)}",
+                [field.get_db_prep_save(getattr(report, field.attname), connection)
+                 for report in batch for field in fields],
+            )
+
+
+@transaction.atomic
+def apply_lines(lines, day=None, sign=1, transactions=None):
+    """
+    Add (``sign=1``) or remove (``sign=-1``) one order's contribution to the
+    daily SalesReport and InventoryReport rows of ``day``.
+
+    Each order counts as one transaction per product it contains. Lines of
+    several orders can be applied at once by passing ``transactions``, the
+    number of orders per product. Adding is one upsert per report table;
+    removing updates the rows in place. The cost is independent of how many
+    orders were already placed that day.
+    """
+    deltas = _deltas(lines)
+    if not deltas:
+        return
+    day = day or timezone.localdate()
+    created = day_bounds(day)[0] if day != timezone.localdate() else timezone.now()
+    products = Product.objects.in_bulk(deltas.keys())
+    units = {product_id: units for product_id, (units, _) in deltas.items()}
+    revenue = {product_id: revenue for product_id, (_, revenue) in deltas.items()}
+    transactions = {product_id: (transactions or {}).get(product_id, 1) for product_id in deltas}
+
+    if sign > 0:
+        now = timezone.now()
+        _upsert([
+            SalesReport(
+                product=products[product_id],
+                product_title=products[product_id].title,
+                product_price=products[product_id].price,
+                total_sales=revenue[product_id],
+                total_units_sold=units[product_id],
+                number_of_transactions=transactions[product_id],
+                average_transaction_value=revenue[product_id] / transactions[product_id],
+                date_created=created,
+                report_date=day,
+            )
+            for product_id in deltas if product_id in products
+        ], increment=['total_sales', 'total_units_sold', 'number_of_transactions'], assign={
+            # Multiplying by 1.0 keeps SQLite from dividing integers
+            'average_transaction_value': '({table}.total_sales + excluded.total_sales) * 1.0 '
+                                         '/ ({table}.number_of_transactions + excluded.number_of_transactions)',
+        })
+        _upsert([
+            InventoryReport(
+                product=products[product_id],
+                product_title=products[product_id].title,
+                days_on_hand=(now - products[product_id].created).days,
+                inventory_on_hand=products[product_id].inventory,
+                quantity_sold=units[product_id],
+                created=created,
+                report_date=day,
+            )
+            for product_id in deltas if product_id in products
+        ], increment=['quantity_sold'], replace=['inventory_on_hand', 'days_on_hand'])
+    else:
+        sales = SalesReport.objects.filter(product_id__in=deltas.keys(), report_date=day)
+        sales.update(
+            total_sales=_shift('total_sales', revenue, sign, models.DecimalField()),
+            total_units_sold=_shift('total_units_sold', units, sign, models.PositiveIntegerField()),
+            number_of_transactions=_shift('number_of_transactions', transactions, sign,
+                                          models.PositiveIntegerField()),
+        )
+        sales.update(average_transaction_value=Case(
+            When(number_of_transactions=0, then=Value(Decimal('0.00'))),
+            default=Cast('total_sales', models.FloatField()) / F('number_of_transactions'),
+            output_field=models.DecimalField(),
+        ))
+
+        now = timezone.now()
+        in_stock = {product_id: product for product_id, product in products.items()}
+        InventoryReport.objects.filter(product_id__in=in_stock.keys(), report_date=day).update(
+            quantity_sold=_shift('quantity_sold', units, sign, models.PositiveIntegerField()),
+            inventory_on_hand=_case({product_id: product.inventory for product_id, product in in_stock.items()},
+                                    models.PositiveIntegerField()),
+            days_on_hand=_case({product_id: (now - product.created).days for product_id, product in in_stock.items()},
+                               models.PositiveIntegerField()),
+        )
+
+    from .charts import bump_chart_version
+    transaction.on_commit(lambda: bump_chart_version(day.year))
+
+
+def apply_order(order, sign=1):
+    apply_lines(order_lines(order), day=timezone.localdate(order.created), sign=sign)
+
+
+def rebuild(start_date, end_date, dry_run=False):
+    """
+    Recompute SalesReport totals and InventoryReport.quantity_sold for every
+    day in [start_date, end_date] from OrderItem, and repair rows that have
+    drifted. Returns a list of (report, product_id, day) tuples that differed.
+
+    Inventory snapshots (inventory_on_hand, days_on_hand) cannot be rebuilt
+    from order history and are left untouched.
+    """
+    start, _ = day_bounds(start_date)
+    _, end = day_bounds(end_date)
+
+    expected = {
+        (row['product_id'], row['day']): row
+        for row in OrderItem.objects
+        .filter(product__isnull=False, order__created__gte=start, order__created__lt=end)
+        .annotate(day=TruncDate('order__created'))
+        .values('product_id', 'day')
+        .annotate(units=Sum('quantity'), revenue=Sum(F('price') * F('quantity')),
+                  transactions=Count('order_id', distinct=True))
+    }
+    zero = {'units': 0, 'revenue': Decimal('0.00'), 'transactions': 0}
+    drift = []
+
+    sales_seen, sales_changed = set(), []
+    for report in SalesReport.objects.filter(date_created__gte=start, date_created__lt=end):
+        key = (report.product_id, report.report_date)
+        row = expected.get(key, zero)
+        sales_seen.add(key)
+        revenue = row['revenue'] or Decimal('0.00')
+        if (report.total_sales, report.total_units_sold, report.number_of_transactions) != \
+                (revenue, row['units'], row['transactions']):
+            drift.append(('sales', *key))
+            report.total_sales = revenue
+            report.total_units_sold = row['units']
+            report.number_of_transactions = row['transactions']
+            report.average_transaction_value = report.calculate_average_transaction_value()
+            sales_changed.append(report)
+
+    inventory_seen, inventory_changed = set(), []
+    for report in InventoryReport.objects.filter(created__gte=start, created__lt=end):
+        key = (report.product_id, report.report_date)
+        row = expected.get(key, zero)
+        inventory_seen.add(key)
+        if report.quantity_sold != row['units']:
+            drift.append(('inventory', *key))
+            report.quantity_sold = row['units']
+            inventory_changed.append(report)
+
+    missing_sales = expected.keys() - sales_seen
+    missing_inventory = expected.keys() - inventory_seen
+    drift += [('sales', *key) for key in missing_sales] + [('inventory', *key) for key in missing_inventory]
+    if dry_run:
+        return drift
+
+    products = Product.objects.in_bulk({product_id for product_id, _ in missing_sales | missing_inventory})
+    with transaction.atomic():
+        SalesReport.objects.bulk_update(sales_changed, ['total_sales', 'total_units_sold', 'number_of_transactions',
+                                                        'average_transaction_value'])
+        InventoryReport.objects.bulk_update(inventory_changed, ['quantity_sold'])
+        SalesReport.objects.bulk_create([
+            SalesReport(
+                product=products[product_id],
+                product_title=products[product_id].title,
+                product_price=products[product_id].price,
+                total_sales=expected[product_id, day]['revenue'],
+                total_units_sold=expected[product_id, day]['units'],
+                number_of_transactions=expected[product_id, day]['transactions'],
+                average_transaction_value=expected[product_id, day]['revenue'] / expected[product_id, day]['transactions'],
+                date_created=day_bounds(day)[0],
+                report_date=day,
+            )
+            for product_id, day in missing_sales
+        ])
+        InventoryReport.objects.bulk_create([
+            InventoryReport(
+                product=products[product_id],
+                product_title=products[product_id].title,
+                inventory_on_hand=products[product_id].inventory,
+                quantity_sold=expected[product_id, day]['units'],
+                created=day_bounds(day)[0],
+                report_date=day,
+            )
+            for product_id, day in missing_inventory
+        ])
+        if drift:
+            from .charts import bump_chart_version
+            for year in range(start_date.year, end_date.year + 1):
+                transaction.on_commit(lambda year=year: bump_chart_version(year))
+    return drift
+
+
+class _WholeDays(Func):
+    """
+    The whole days in a DurationField expression.
+    """
+    template = 'EXTRACT(DAY FROM %(expressions)s)'
+    output_field = models.IntegerField()
+
+    def as_sqlite(self, compiler, connection, **extra_context):
+        # SQLite durations are integer microseconds
+        return self.as_sql(compiler, connection, template='(%(expressions)s / 86400000000)', **extra_context)
+
+
+def _insert_missing(model, day, **values):
+    """
+    Insert a ``model`` row for ``day`` for every product that has none, with
+    a single INSERT ... SELECT over the products. ``values`` maps columns
+    to expressions over the product; the other columns get their field
+    defaults. Returns the number of rows inserted.
+    """
+    opts = model._meta
+    qn = connection.ops.quote_name
+    for field in opts.concrete_fields:
+        if not field.primary_key and field.attname not in values and field.get_default() is not None:
+            values[field.attname] = Value(field.get_default(), output_field=field)
+    # Annotations may not shadow the product's own fields (created)
+    names = {f'new_{column}': expression for column, expression in values.items()}
+    rows = (Product.objects.order_by()
+            .filter(~Exists(model.objects.filter(product_id=OuterRef('pk'), report_date=day)))
+            .annotate(**names).values_list(*names))
+    sql, params = rows.query.sql_with_params()
+    columns = ', '.join(qn(opts.get_field(column).column) for column in values)
+    with connection.cursor() as cursor:
+        # Rows an order creates meanwhile win; the unique constraint skips ours
+        cursor.execute(
+            f"INSERT INTO {qn(opts.db_table)} ({columns}) {sql} "
+            f"ON CONFLICT ({qn('product_id')}, {qn('report_date')}) DO NOTHING",
+            params,
+        )
+        return cursor.rowcount
+
+
+def materialize(start_date, end_date):
+    """
+    Create the zero-valued SalesReport and InventoryReport rows that are
+    missing for any (product, day) pair in [start_date, end_date], so every
+    product shows up in the daily reports even on days without sales.
+    Returns the number of sales and inventory rows created.
+
+    The rows are written by the database, one INSERT ... SELECT per report
+    table and day, so the products are never loaded into Python.
+    """
+    sales = inventory = 0
+    with transaction.atomic():
+        for offset in range((end_date - start_date).days + 1):
+            day = start_date + timedelta(days=offset)
+            created = Value(day_bounds(day)[0], output_field=models.DateTimeField())
+            report_date = Value(day, output_field=models.DateField())
+            sales += _insert_missing(
+                SalesReport, day, product_id=F('id'), product_title=F('title'), product_price=F('price'),
+                date_created=created, report_date=report_date,
+            )
+            inventory += _insert_missing(
+                InventoryReport, day, product_id=F('id'), product_title=F('title'),
+                days_on_hand=Greatest(_WholeDays(ExpressionWrapper(created - F('created'),
+                                                                   output_field=models.DurationField())),
+                                      Value(0)),
+                inventory_on_hand=F('inventory'), created=created, report_date=report_date,
+            )
+    return sales, inventory
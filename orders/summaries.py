@@ -0,0 +1,68 @@
+from django.core.cache import cache
+from django.db.models import Count, Sum
+from django.db.models.functions import TruncDate
+from django.utils import timezone
+
+from .rollups import day_bounds
+
+SUMMARY_VERSION_KEY = 'orders:summary-version'
+SUMMARY_KEY = 'orders:summary:{version}:{scope}:{start}:{end}'
+SUMMARY_TIMEOUT = 60 * 60 * 24 * 30
+
+
+def in_window(queryset, start, end, field='created'):
+    """
+    Filter ``queryset`` to rows whose ``field`` falls on a day in
+    [start, end], as a half-open range on the column so an index applies.
+    """
+    return queryset.filter(**{f'{field}__gte': day_bounds(start)[0], f'{field}__lt': day_bounds(end)[1]})
+
+
+def order_summary(queryset, start, end):
+    """
+    Order count and revenue of ``queryset`` between ``start`` and ``end``,
+    in total and per day. Two aggregate queries, whatever the number of
+    orders.
+    """
+    orders = in_window(queryset, start, end).order_by()
+    totals = orders.aggregate(orders=Count('pk'), revenue=Sum('total_paid'))
+    days = list(
+        orders.annotate(day=TruncDate('created')).values('day')
+        .annotate(orders=Count('pk'), revenue=Sum('total_paid')).order_by('day')
+    )
+    return {'start': start, 'end': end, 'orders': totals['orders'], 'revenue': totals['revenue'] or 0, 'days': days}
+
+
+def summary_version():
+    version = cache.get(SUMMARY_VERSION_KEY)
+    if version is None:
+        cache.add(SUMMARY_VERSION_KEY, 1, timeout=None)
+        version = cache.get(SUMMARY_VERSION_KEY)
+    return version
+
+
+def bump_summary_version():
+    """
+    Retire every cached summary. Called when an order dated before today
+    is changed or deleted, the only way a closed range can change.
+    """
+    try:
+        cache.incr(SUMMARY_VERSION_KEY)
+    except ValueError:
+        cache.add(SUMMARY_VERSION_KEY, 2, timeout=None)
+
+
+def cached_order_summary(queryset, start, end, scope):
+    """
+    order_summary() of ``queryset``, cached when the range is closed, i.e.
+    ends before today. ``scope`` names what ``queryset`` selects, e.g. one
+    user's orders, and is part of the cache key.
+    """
+    if end >= timezone.localdate():
+        return order_summary(queryset, start, end)
+    key = SUMMARY_KEY.format(version=summary_version(), scope=scope, start=start, end=end)
+    summary = cache.get(key)
+    if summary is None:
+        summary = order_summary(queryset, start, end)
+        cache.set(key, summary, SUMMARY_TIMEOUT)
+    return summary
@@ -0,0 +1,18 @@
+from jobs.queue import completing
+from .models import Order
+from .rollups import apply_order
+
+
+def sale_job_key(order_number):
+    return f'order-sale:{order_number}'
+
+
+def record_sale(order_id):
+    """
+    Background job queued by checkout: add a placed order to the daily
+    sales and inventory reports.
+    """
+    order = Order.objects.filter(pk=order_id).first()
+    if order is not None:
+        with completing():
+            apply_order(order)
@@ -1,3 +1,554 @@
-from django.test import TestCase
+import gzip
+import tempfile
+from datetime import date, timedelta
+from decimal import Decimal
+from importlib import import_module
+from types import SimpleNamespace
+from unittest import skipUnless
 
-# Create your tests here.
+from django.apps import apps
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import IntegrityError, connection, transaction
+from django.test import TestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from jobs.queue import claim, run, run_pending
+from store.models import MAIN_STOREFRONT_ID, Product
+from store.storefronts import get_storefront
+from core.instrumentation import TRANSACTION_STATEMENTS
+from core.testing import QueryBudgetAssertions, run_in_other_process
+from .cancellation import cancel_orders
+from .checkout import InsufficientStock, place_order
+from .exports import model_columns, stream_csv
+from .models import Order, OrderItem, InventoryMovement, InventoryReport, SalesReport
+from .charts import year_bounds
+from .rollups import apply_lines, day_bounds, materialize, rebuild
+from .summaries import in_window
+
+
+class CheckoutTestCase(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = get_user_model().objects.create(email='till@example.com', user_name='till')
+        cls.products = Product.objects.bulk_create([
+            Product(created_by=cls.user, title=f'tile-{i}', slug=f'tile-{i}',
+                    price=Decimal('2.50'), inventory=10)
+            for i in range(30)
+        ])
+
+    def checkout(self, order_number, lines):
+        return place_order(order_number=order_number, user_id=self.user.id, full_name='cust',
+                           address1='', phone='', lines=lines)
+
+    def test_place_order_decrements_stock_and_logs_movements(self):
+        product = self.products[0]
+        order = self.checkout(1, [(product.id, product.price, 3)])
+
+        product.refresh_from_db()
+        self.assertEqual(product.inventory, 7)
+        self.assertEqual(order.total_paid, Decimal('7.50'))
+        self.assertTrue(Order.objects.get(pk=1).billing_status)
+        self.assertEqual(OrderItem.objects.get(order=order).quantity, 3)
+        self.assertEqual(InventoryMovement.objects.get(product=product).movement_type, 'OUT')
+
+    def test_place_order_query_count_is_constant(self):
+        counts = []
+        for order_number, size in ((1, 1), (2, 30)):
+            lines = [(product.id, product.price, 1) for product in self.products[:size]]
+            with CaptureQueriesContext(connection) as ctx:
+                self.checkout(order_number, lines)
+            counts.append(len(ctx.captured_queries))
+        self.assertEqual(counts[0], counts[1])
+
+    def test_place_order_charges_database_prices(self):
+        product = self.products[0]
+        Product.objects.filter(pk=product.pk).update(price=Decimal('4.00'))
+        order = self.checkout(1, [(product.id, Decimal('2.50'), 2)])
+
+        self.assertEqual(order.total_paid, Decimal('8.00'))
+        self.assertEqual(OrderItem.objects.get(order=order).price, Decimal('4.00'))
+
+    def test_place_order_rejects_oversell(self):
+        product = self.products[0]
+        with self.assertRaises(InsufficientStock) as ctx:
+            self.checkout(1, [(product.id, product.price, 11)])
+
+        self.assertEqual(ctx.exception.lines, [product.id])
+        self.assertFalse(Order.objects.exists())
+        product.refresh_from_db()
+        self.assertEqual(product.inventory, 10)
+
+
+    def test_add_view_reports_short_lines(self):
+        product = self.products[0]
+        self.user.is_active = True
+        self.user.save()
+        self.client.force_login(self.user)
+        self.client.post(reverse('basket:basket_add'), {'action': 'post', 'productid': product.id, 'productqty': 10})
+        Product.objects.filter(pk=product.pk).update(inventory=9)
+
+        response = self.client.post(reverse('orders:add'), {'action': 'post', 'cusName': 'cust'})
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.json()['lines'], [product.id])
+        self.assertFalse(Order.objects.exists())
+
+    def test_order_is_booked_to_the_products_storefront(self):
+        sj = get_storefront('sj')
+        Product.objects.filter(pk__in=[self.products[0].pk, self.products[1].pk]).update(storefront=sj)
+        lines = [(product.id, product.price, 1) for product in self.products[:3]]
+
+        self.assertEqual(self.checkout(1, lines[:2]).storefront, sj)
+        self.assertEqual(self.checkout(2, lines).storefront_id, MAIN_STOREFRONT_ID)
+
+
+class CheckoutBudgetTestCase(QueryBudgetAssertions, TransactionTestCase):
+    """
+    Checkout commits its own transaction here, as in production, rather
+    than running in a savepoint of the test's.
+    """
+    serialized_rollback = True
+
+    def setUp(self):
+        self.user = get_user_model().objects.create(email='till@example.com', user_name='till', is_active=True)
+        self.products = Product.objects.bulk_create([
+            Product(created_by=self.user, title=f'tile-{i}', slug=f'tile-{i}',
+                    price=Decimal('2.50'), inventory=10)
+            for i in range(30)
+        ])
+
+    def test_checkout_within_query_budget(self):
+        self.client.force_login(self.user)
+        for order_number, size in ((1, 1), (2, 30)):
+            for product in self.products[:size]:
+                self.client.post(reverse('basket:basket_add'),
+                                 {'action': 'post', 'productid': product.id, 'productqty': 1})
+            # Worst case: the basket's prices are no longer cached
+            cache.clear()
+            response = self.client.post(reverse('orders:add'), {'action': 'post', 'order_number': order_number,
+                                                                'cusName': 'cust', 'add': '', 'phone_num': ''})
+            self.assertEqual(response.status_code, 200)
+            self.assertWithinBudget(response)
+
+
+class FoldShop2TestCase(TestCase):
+
+    def test_shop2_rows_move_to_the_sj_storefront(self):
+        user = get_user_model().objects.create(email='sj@example.com', user_name='sj')
+        Product.objects.create(created_by=user, title='Blazer', slug='blazer', price=Decimal('20.00'))
+        with connection.cursor() as cursor:
+            cursor.execute('CREATE TABLE shop2_category (id integer PRIMARY KEY, name text, slug text)')
+            cursor.execute('CREATE TABLE shop2_subcategory (id integer PRIMARY KEY, name text, categories_id integer)')
+            cursor.execute('CREATE TABLE shop2_product (id integer PRIMARY KEY, category_id integer, '
+                           'subcategory_id integer, created_by_id integer, title text, slug text, price decimal, '
+                           'inventory integer, created datetime)')
+            cursor.execute('CREATE TABLE shop2_order (order_number integer PRIMARY KEY, user_id integer, '
+                           'full_name text, address1 text, phone text, total_paid decimal, created datetime)')
+            cursor.execute('CREATE TABLE shop2_orderitem (id integer PRIMARY KEY, order_id integer, '
+                           'product_id integer, price decimal, quantity integer)')
+            cursor.execute("INSERT INTO shop2_category VALUES (7, 'uniform', 'uniform')")
+            cursor.execute("INSERT INTO shop2_subcategory VALUES (3, 'jackets', 7)")
+            cursor.execute("INSERT INTO shop2_product VALUES (5, 7, 3, %s, 'Blazer', 'blazer', 25, 4, "
+                           "'2024-07-01 08:00:00')", [user.pk])
+            cursor.execute("INSERT INTO shop2_order VALUES (9, %s, 'cust', '', '', 50, '2024-07-02 09:00:00')",
+                           [user.pk])
+            cursor.execute("INSERT INTO shop2_orderitem VALUES (1, 9, 5, 25, 2), (2, NULL, 5, 25, 1)")
+
+        fold = import_module('orders.migrations.0019_fold_shop2')
+        fold.fold_shop2(apps, SimpleNamespace(connection=connection))
+
+        sj = get_storefront('sj')
+        product = Product.objects.get(storefront=sj)
+        self.assertEqual((product.title, product.price, product.inventory), ('Blazer', Decimal('25.00'), 4))
+        self.assertEqual((product.category.slug, product.category.storefront), ('uniform', sj))
+        self.assertEqual(product.subcategory.name, 'jackets')
+        self.assertEqual(product.created.date(), date(2024, 7, 1))
+        order = Order.objects.get(storefront=sj)
+        self.assertEqual(order.total_paid, Decimal('50.00'))
+        # Items of orders shop2 had already lost are dropped
+        self.assertEqual([(item.product, item.quantity) for item in order.items.all()], [(product, 2)])
+
+
+class RollupTestCase(TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        # Paid orders also queue their invoice for pre-rendering
+        invoices = tempfile.TemporaryDirectory()
+        cls.addClassCleanup(invoices.cleanup)
+        settings = override_settings(INVOICE_ROOT=invoices.name)
+        settings.enable()
+        cls.addClassCleanup(settings.disable)
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = get_user_model().objects.create(email='till@example.com', user_name='till')
+        cls.product = Product.objects.create(created_by=cls.user, title='tile', slug='tile',
+                                             price=Decimal('2.50'), inventory=100)
+
+    def checkout(self, order_number, qty, run_jobs=True):
+        order = place_order(order_number=order_number, user_id=self.user.id, full_name='cust',
+                            address1='', phone='', lines=[(self.product.id, self.product.price, qty)])
+        if run_jobs:
+            run_pending()
+        return order
+
+    def test_orders_add_deltas_to_daily_reports(self):
+        self.checkout(1, 2)
+        self.checkout(2, 4)
+
+        sales = SalesReport.objects.get(product=self.product)
+        self.assertEqual(sales.total_units_sold, 6)
+        self.assertEqual(sales.total_sales, Decimal('15.00'))
+        self.assertEqual(sales.number_of_transactions, 2)
+        self.assertEqual(sales.average_transaction_value, Decimal('7.50'))
+        inventory = InventoryReport.objects.get(product=self.product)
+        self.assertEqual(inventory.quantity_sold, 6)
+        self.assertEqual(inventory.inventory_on_hand, 94)
+
+    def test_order_delete_reverses_deltas(self):
+        self.checkout(1, 2)
+        self.checkout(2, 4)
+        Order.objects.get(pk=2).delete()
+
+        sales = SalesReport.objects.get(product=self.product)
+        self.assertEqual(sales.total_units_sold, 2)
+        self.assertEqual(sales.number_of_transactions, 1)
+        inventory = InventoryReport.objects.get(product=self.product)
+        self.assertEqual(inventory.quantity_sold, 2)
+        self.assertEqual(inventory.inventory_on_hand, 98)
+
+    def test_order_deleted_before_its_job_ran(self):
+        self.checkout(1, 2)
+        self.checkout(2, 4, run_jobs=False)
+        Order.objects.get(pk=2).delete()
+
+        run_pending()
+        self.assertEqual(SalesReport.objects.get(product=self.product).total_units_sold, 2)
+        self.assertEqual(InventoryReport.objects.get(product=self.product).quantity_sold, 2)
+
+    def test_cancel_orders_in_bulk(self):
+        other = Product.objects.create(created_by=self.user, title='grout', slug='grout',
+                                       price=Decimal('1.00'), inventory=100)
+        for number in (1, 2, 3):
+            place_order(order_number=number, user_id=self.user.id, full_name='cust', address1='', phone='',
+                        lines=[(self.product.id, self.product.price, number), (other.id, other.price, 1)])
+        self.checkout(5, 1)
+        self.checkout(4, 10, run_jobs=False)
+
+        # Independent of the number of orders and items; one set of report
+        # updates per day the orders were placed on
+        with self.assertNumQueries(22):
+            self.assertEqual(cancel_orders(Order.objects.exclude(pk=5)), 4)
+
+        self.assertEqual(list(Order.objects.values_list('pk', flat=True)), [5])
+        self.product.refresh_from_db()
+        other.refresh_from_db()
+        self.assertEqual((self.product.inventory, other.inventory), (99, 100))
+        self.assertEqual(InventoryMovement.objects.filter(movement_type='IN').count(), 7)
+        sales = SalesReport.objects.get(product=self.product)
+        self.assertEqual((sales.total_units_sold, sales.number_of_transactions), (1, 1))
+        self.assertEqual(SalesReport.objects.get(product=other).number_of_transactions, 0)
+        self.assertEqual(InventoryReport.objects.get(product=self.product).quantity_sold, 1)
+        run_pending()
+        self.assertEqual(SalesReport.objects.get(product=self.product).total_units_sold, 1)
+
+    def test_cancel_order_whose_job_is_claimed(self):
+        self.checkout(1, 2)
+        self.checkout(2, 3, run_jobs=False)
+        claimed = claim()
+        cancel_orders(Order.objects.filter(pk=2))
+
+        for job in claimed:
+            run(job)
+        self.assertEqual(SalesReport.objects.get(product=self.product).total_units_sold, 2)
+        self.assertEqual(InventoryReport.objects.get(product=self.product).quantity_sold, 2)
+
+    def test_admin_cancel_action(self):
+        self.checkout(1, 2)
+        self.checkout(2, 3)
+        staff = get_user_model().objects.create_superuser('staff@example.com', 'staff', 'pw')
+        self.client.force_login(staff)
+        self.client.post(reverse('admin:orders_order_changelist'), {
+            'action': 'cancel_selected', '_selected_action': [1, 2],
+        })
+
+        self.assertFalse(Order.objects.exists())
+        self.product.refresh_from_db()
+        self.assertEqual(self.product.inventory, 100)
+        self.assertEqual(SalesReport.objects.get(product=self.product).total_units_sold, 0)
+
+    def test_orders_upsert_into_existing_daily_rows(self):
+        today = timezone.localdate()
+        materialize(today, today)
+        self.checkout(1, 2)
+        apply_lines([(self.product.id, self.product.price, 4)], day=today)
+
+        sales = SalesReport.objects.get(product=self.product)
+        self.assertEqual((sales.total_units_sold, sales.number_of_transactions), (6, 2))
+        self.assertEqual(sales.average_transaction_value, Decimal('7.50'))
+        self.assertEqual(InventoryReport.objects.get(product=self.product).quantity_sold, 6)
+
+    def test_one_report_row_per_product_and_day(self):
+        self.checkout(1, 2)
+        with self.assertRaises(IntegrityError), transaction.atomic():
+            SalesReport.objects.create(product=self.product)
+        with self.assertRaises(IntegrityError), transaction.atomic():
+            InventoryReport.objects.create(product=self.product)
+
+    def test_rebuild_repairs_drift(self):
+        self.checkout(1, 3)
+        SalesReport.objects.update(total_units_sold=99)
+        InventoryReport.objects.all().delete()
+        today = timezone.localdate()
+
+        self.assertEqual(len(rebuild(today, today, dry_run=True)), 2)
+        rebuild(today, today)
+        self.assertEqual(rebuild(today, today, dry_run=True), [])
+        self.assertEqual(SalesReport.objects.get().total_units_sold, 3)
+        self.assertEqual(InventoryReport.objects.get().quantity_sold, 3)
+
+
+class MaterializeTestCase(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = get_user_model().objects.create(email='admin@example.com', user_name='admin',
+                                                   is_staff=True, is_superuser=True, is_active=True)
+        Product.objects.bulk_create([
+            Product(created_by=cls.user, title=f'tile-{i}', slug=f'tile-{i}', price=Decimal('2.50'))
+            for i in range(3)
+        ])
+
+    def test_materialize_fills_missing_rows_once(self):
+        end = timezone.localdate()
+        start = end - timedelta(days=4)
+
+        self.assertEqual(materialize(start, end), (15, 15))
+        self.assertEqual(materialize(start, end), (0, 0))
+
+    def test_materialized_rows_describe_the_product(self):
+        product = Product.objects.first()
+        created = timezone.now() - timedelta(days=3, hours=5)
+        Product.objects.filter(pk=product.pk).update(created=created, inventory=7)
+        end = timezone.localdate()
+        start = end - timedelta(days=4)
+        materialize(start, end)
+
+        sales = SalesReport.objects.get(product=product, report_date=start)
+        self.assertEqual((sales.product_title, sales.product_price, sales.total_sales, sales.total_units_sold),
+                         (product.title, product.price, Decimal('0.00'), 0))
+        self.assertEqual(sales.date_created, day_bounds(start)[0])
+        for report in InventoryReport.objects.filter(product=product):
+            self.assertEqual(report.inventory_on_hand, 7)
+            self.assertEqual(report.days_on_hand, max((day_bounds(report.report_date)[0] - created).days, 0))
+
+    def test_materialize_does_not_load_products(self):
+        end = timezone.localdate()
+        with CaptureQueriesContext(connection) as ctx:
+            materialize(end - timedelta(days=1), end)
+        queries = [q['sql'] for q in ctx.captured_queries if not q['sql'].startswith(TRANSACTION_STATEMENTS)]
+        self.assertEqual(len(queries), 4)
+        self.assertTrue(all(sql.startswith('INSERT INTO') for sql in queries))
+
+    def test_report_changelists_do_not_write(self):
+        self.client.force_login(self.user)
+        for url in ('admin:orders_salesreport_changelist', 'admin:orders_inventoryreport_changelist'):
+            with CaptureQueriesContext(connection) as ctx:
+                response = self.client.get(reverse(url))
+            self.assertEqual(response.status_code, 200)
+            writes = [q['sql'] for q in ctx.captured_queries
+                      if q['sql'].startswith(('INSERT', 'UPDATE')) and '"orders_' in q['sql']]
+            self.assertEqual(writes, [])
+
+
+class ExportTestCase(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = get_user_model().objects.create(email='admin@example.com', user_name='admin')
+        product = Product.objects.create(created_by=cls.user, title='tile', slug='tile', price=Decimal('2.50'))
+        SalesReport.objects.create(product=product, total_units_sold=4, total_sales=Decimal('10.00'))
+
+    def export(self, gzip=False):
+        response = stream_csv(SalesReport.objects.all(), 'sales', 'Sales Report', 'date_created',
+                              model_columns(SalesReport, exclude=["product_title", "id", "order"]), gzip=gzip)
+        return response, b''.join(response.streaming_content)
+
+    def test_stream_csv(self):
+        response, content = self.export()
+        lines = content.decode().splitlines()
+
+        self.assertIn('attachment; filename=sales_', response['Content-Disposition'])
+        self.assertTrue(lines[0].startswith('Sales Report for: '))
+        self.assertEqual(lines[2].split(',')[:3], ['product', 'product_price', 'total_sales'])
+        self.assertEqual(lines[3].split(',')[:4], ['tile', '2.50', '10.00', '4'])
+
+    def test_stream_csv_gzip(self):
+        response, content = self.export(gzip=True)
+
+        self.assertTrue(response['Content-Disposition'].endswith('.csv.gz'))
+        self.assertEqual(gzip.decompress(content), self.export()[1])
+
+
+class SalesViewTestCase(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = get_user_model().objects.create(email='staff@example.com', user_name='staff', is_active=True,
+                                                   is_staff=True)
+        now = timezone.now()
+        Order.objects.bulk_create([
+            Order(user=cls.user, full_name='cust', address1='', phone='', total_paid=Decimal('10.00'),
+                  billing_status=True, created=now - timedelta(days=days_ago))
+            for days_ago in [0] * 20 + [1] * 10 + [40] * 5
+        ])
+
+    def setUp(self):
+        cache.clear()
+        self.client.force_login(self.user)
+
+    def get(self, **params):
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get(reverse('orders:sales'), params)
+        return response, len(ctx.captured_queries)
+
+    def test_totals_come_from_the_database(self):
+        response, _ = self.get()
+        summary = response.context['summary']
+        self.assertEqual((summary['orders'], response.context['total']), (30, Decimal('300.00')))
+        self.assertEqual([day['orders'] for day in summary['days']], [10, 20])
+        self.assertEqual(len(response.context['sales']), 25)
+        self.assertEqual(len(self.get(page=2)[0].context['sales']), 5)
+
+    def test_closed_ranges_are_cached(self):
+        past = timezone.localdate() - timedelta(days=45)
+        params = {'start_date': past, 'end_date': timezone.localdate() - timedelta(days=1)}
+        self.get()  # warm the category cache
+        response, cold = self.get(**params)
+        self.assertEqual(response.context['summary']['orders'], 15)
+        response, warm = self.get(**params)
+        self.assertEqual(warm, cold - 2)
+
+        Order.objects.filter(created__date=timezone.localdate() - timedelta(days=40)).first().delete()
+        self.assertEqual(self.get(**params)[0].context['summary']['orders'], 14)
+
+
+class ChartTestCase(TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        invoices = tempfile.TemporaryDirectory()
+        cls.addClassCleanup(invoices.cleanup)
+        settings = override_settings(INVOICE_ROOT=invoices.name)
+        settings.enable()
+        cls.addClassCleanup(settings.disable)
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = get_user_model().objects.create(email='till@example.com', user_name='till')
+        cls.product = Product.objects.create(created_by=cls.user, title='tile', slug='tile',
+                                             price=Decimal('2.50'), inventory=100)
+
+    def setUp(self):
+        cache.clear()
+        self.year = timezone.localdate().year
+
+    def checkout(self, order_number, qty):
+        with self.captureOnCommitCallbacks(execute=True):
+            place_order(order_number=order_number, user_id=self.user.id, full_name='cust',
+                        address1='', phone='', lines=[(self.product.id, self.product.price, qty)])
+        with self.captureOnCommitCallbacks(execute=True):
+            run_pending()
+
+    def chart(self, name):
+        return self.client.get(reverse(f'orders:chart-{name}', args=[self.year])).json()['data']
+
+    def test_charts_are_cached_until_orders_are_written(self):
+        self.checkout(1, 2)
+        month = timezone.localdate().month - 1
+        self.assertEqual(self.chart('sales')['datasets'][0]['data'][month], '5.00')
+        self.assertEqual(self.chart('most-sold')['datasets'][0]['data'], [2])
+        with self.assertNumQueries(0):
+            self.chart('sales')
+            self.chart('most-sold')
+            self.chart('least-sold')
+
+        self.checkout(2, 4)
+        self.assertEqual(self.chart('sales')['datasets'][0]['data'][month], '15.00')
+        self.assertEqual(self.chart('most-sold')['datasets'][0]['data'], [6])
+        self.assertEqual(self.chart('spend-per-customer')['datasets'][0]['data'][month], '7.50')
+
+    def test_worker_writes_retire_the_web_charts(self):
+        self.checkout(1, 2)
+        self.assertEqual(self.chart('most-sold')['datasets'][0]['data'], [2])
+        # The job worker applies orders to the rollups in its own process
+        SalesReport.objects.update(total_units_sold=4)
+        run_in_other_process(f'from orders.charts import bump_chart_version\nbump_chart_version({self.year})')
+        self.assertEqual(self.chart('most-sold')['datasets'][0]['data'], [4])
+
+    def test_products_without_sales_stay_off_the_charts(self):
+        idle = Product.objects.create(created_by=self.user, title='idle', slug='idle',
+                                      price=Decimal('1.00'), inventory=5)
+        self.checkout(1, 2)
+        today = timezone.localdate()
+        materialize(today.replace(year=self.year - 1, month=1, day=1), today)
+        self.assertTrue(SalesReport.objects.filter(product=idle).exists())
+        cache.clear()
+        self.assertEqual(self.chart('least-sold')['labels'], ['tile'])
+        self.assertEqual(self.chart('most-sold')['labels'], ['tile'])
+        response = self.client.get(reverse('orders:chart-filter-options'))
+        self.assertEqual(response.json()['options'], [self.year])
+
+    def test_filter_options_come_from_the_rollups(self):
+        self.checkout(1, 2)
+        SalesReport.objects.create(product=self.product, total_sales=Decimal('1.00'), total_units_sold=1,
+                                   date_created=timezone.now().replace(year=self.year - 2))
+        cache.clear()
+        response = self.client.get(reverse('orders:chart-filter-options'))
+        self.assertEqual(response.json()['options'], [self.year, self.year - 1, self.year - 2])
+
+
+@skipUnless(connection.vendor == 'sqlite', 'EXPLAIN QUERY PLAN output is SQLite specific')
+class QueryPlanTestCase(TestCase):
+    """
+    The hot order and report queries must be answered from an index.
+    SQLite reports a full table scan as a plan step starting with 'SCAN'.
+    """
+
+    def assertNoFullScan(self, queryset):
+        sql, params = queryset.query.sql_with_params()
+        with connection.cursor() as cursor:
+            cursor.execute(f'EXPLAIN QUERY PLAN {sql}', params)
+            steps = [row[-1] for row in cursor.fetchall()]
+        scans = [step for step in steps if step.startswith('SCAN')]
+        self.assertEqual(scans, [], f'{sql}\n' + '\n'.join(steps))
+
+    def test_hot_queries_use_indexes(self):
+        start, end = day_bounds(timezone.localdate())
+        year_start, year_end = year_bounds(timezone.localdate().year)
+        billed = Order.objects.filter(billing_status=True)
+        queries = {
+            'customer orders': billed.filter(user_id=1)[:10],
+            'staff order window': in_window(billed, start, end)[:10],
+            'order summary': in_window(billed, start, end).order_by().values('total_paid'),
+            'spend chart': Order.objects.filter(created__gte=year_start, created__lt=year_end).values('total_paid'),
+            'sales rollup row': SalesReport.objects.filter(product_id__in=[1, 2], report_date=timezone.localdate()),
+            'inventory rollup row': InventoryReport.objects.filter(product_id__in=[1, 2],
+                                                                   report_date=timezone.localdate()),
+            'sales charts': SalesReport.objects.filter(date_created__gte=year_start, date_created__lt=year_end)
+                            .values('product_id', 'total_units_sold'),
+            'inventory report window': InventoryReport.objects.filter(created__gte=start)[:100],
+            'rebuild': OrderItem.objects.filter(order__created__gte=start, order__created__lt=end)
+                       .values('product_id', 'quantity'),
+            'product sales of a day': SalesReport(product_id=1, date_created=timezone.now()).day_items(),
+            'storefront listing': Product.objects.filter(storefront_id=MAIN_STOREFRONT_ID, is_active=True)[:24],
+        }
+        for name, queryset in queries.items():
+            with self.subTest(name):
+                self.assertNoFullScan(queryset)
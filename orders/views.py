@@ -1,13 +1,14 @@
 from django.http.response import JsonResponse
 from django.shortcuts import render
 from django.views.generic import View
-import sys
+import logging
 from django.contrib import messages
 # for generating pdf invoice
 from django.utils import timezone
 from datetime import datetime
 from django.shortcuts import get_object_or_404
-from .forms import StockHistorySearchForm
+from django.core.paginator import Paginator
+from .forms import DateWindowForm
 from django.contrib.auth.decorators import login_required
 from django.db.models import Count, F, Sum, Avg
 from django.db.models.functions import ExtractYear, ExtractMonth
@@ -19,109 +20,56 @@ from django.db.models.functions import TruncMonth
 from django.utils.timezone import now
 from datetime import datetime, timedelta
 from collections import OrderedDict
-from django.db import transaction, IntegrityError
+from django.db import transaction, IntegrityError, OperationalError
 from basket.basket import Basket
 from store.models import Product
 from .models import Order, OrderItem, InventoryReport, SalesReport, InventoryMovement
+from .checkout import InsufficientStock, place_order, basket_lines
+from .summaries import cached_order_summary, in_window
+from .charts import monthly_sales, monthly_spend, sales_years, units_by_product
 from utils.charts import months, colorPrimary, colorSuccess, colorDanger, generate_color_palette, get_year_dict
+from core.instrumentation import query_budget
 
+logger = logging.getLogger(__name__)
 
-def payment_confirmation(order_number):
-    Order.objects.filter(order_number=order_number).update(billing_status=True)
-    print(order_number)
 
-
-@transaction.atomic
+@query_budget(10)
 def add(request):
     basket = Basket(request)
     if request.POST.get('action') != 'post':
         return JsonResponse({'error': 'Invalid request'}, status=400)
 
-    savepoint = transaction.savepoint()
-
+    order_number = request.POST.get('order_number')
     try:
-        order_number = request.POST.get('order_number')
-        user_id = request.user.id
-        baskettotal = basket.get_total_price()
-        full_name = request.POST.get('cusName')
-        address1 = request.POST.get('add')
-        phone = request.POST.get('phone_num')
+        place_order(
+            order_number=order_number,
+            user_id=request.user.id,
+            full_name=request.POST.get('cusName'),
+            address1=request.POST.get('add'),
+            phone=request.POST.get('phone_num'),
+            lines=basket_lines(basket),
+        )
+        return JsonResponse({'success': 'Order created'})
 
+    except InsufficientStock as e:
+        return JsonResponse({'error': 'Insufficient inventory', 'lines': e.lines}, status=400)
+
+    except IntegrityError:
+        # Checked only once the insert failed, so placing an order doesn't
+        # pay for the lookup
         if Order.objects.filter(order_number=order_number).exists():
             return JsonResponse({'error': 'Order already exists'}, status=409)
+        logger.exception('Order creation failed')
+        return JsonResponse({'error': 'Failed to process order'}, status=500)
 
-        # Create Order
-        order = Order.objects.create(
-            user_id=user_id,
-            full_name=full_name,
-            address1=address1,
-            phone=phone,
-            total_paid=baskettotal,
-            order_number=order_number
-        )
-        order_id = order.pk
-
-        payment_confirmation(order_number)
-
-        for item in basket:
-            quant = item['qty']
-            product = item['product']
-            price = item['price']
-
-            inv = Product.objects.select_for_update().get(id=product.id)
-
-            if not inv.has_inventory():
-                raise ValueError(f'{inv.name} is out of stock.')
-
-            # Deduct from inventory
-            inv.remove_items_from_inventory(count=quant)
-
-            # Create Order Item
-            OrderItem.objects.create(
-                order_id=order_id,
-                product=product,
-                price=price,
-                quantity=quant
-            )
-
-            # Log inventory movement
-            InventoryMovement.objects.create(
-                product=inv,
-                movement_type='OUT',
-                quantity=quant,
-                note=f"Order #{order_number} stock out"
-            )
-
-            # Ensure inventory report exists and update
-            today = timezone.now().date()
-            inventory_report, _ = InventoryReport.objects.get_or_create(
-                product=inv,
-                created__date=today,
-                defaults={'created': timezone.now()}
-            )
-            inventory_report.days_on_hand = inventory_report.calculate_days_on_hand()
-            inventory_report.inventory_on_hand = inv.inventory
-            inventory_report.quantity_sold = inventory_report.calculate_amount_sold()
-            inventory_report.save()
-
-            # Ensure sales report exists and update
-            sales_report, _ = SalesReport.objects.get_or_create(
-                product=inv,
-                date_created__date=today,
-                defaults={'date_created': timezone.now()}
-            )
-            sales_report.total_sales = sales_report.calculate_total_sales()
-            sales_report.total_units_sold = sales_report.calculate_total_units_sold()
-            sales_report.number_of_transactions = sales_report.calculate_number_of_transactions()
-            sales_report.average_transaction_value = sales_report.calculate_average_transaction_value()
-            sales_report.save()
-
-        transaction.savepoint_commit(savepoint)
-        return JsonResponse({'success': 'Order created'})
+    except OperationalError:
+        # A lock that could not be taken in time (SQLite "database is locked",
+        # a PostgreSQL lock timeout): nothing was written, so it can be retried
+        logger.warning('Order creation failed', exc_info=True)
+        return JsonResponse({'error': 'Checkout is busy, please retry'}, status=503)
 
-    except Exception as e:
-        transaction.savepoint_rollback(savepoint)
-        print(f"Order creation failed: {e}", file=sys.stderr)
+    except Exception:
+        logger.exception('Order creation failed')
         return JsonResponse({'error': 'Failed to process order'}, status=500)
 
 
@@ -133,57 +81,49 @@ def user_orders(request):
         orders = Order.objects.filter(user_id=request.user.id, billing_status=True)
     return orders
 
+SALES_PER_PAGE = 25
+
+
 @login_required
 def sales(request):
     if request.user.is_staff or request.user.is_superuser:
-        sales = Order.objects.filter(billing_status=True)[:85]
+        sales, scope = Order.objects.filter(billing_status=True), 'all'
     else:
-        sales = Order.objects.filter(user_id=request.user.id, billing_status=True)[:85]
-    form = StockHistorySearchForm(request.POST or None)
-    total = sum([sale.total_paid for sale in sales])
-    if request.method == 'POST':
-        if request.user.is_staff or request.user.is_superuser:
-            sales = Order.objects.filter(billing_status=True).filter(
-                created__range=[form['start_date'].value(), form['end_date'].value()])
-        else:
-            sales = Order.objects.filter(user_id=request.user.id, billing_status=True).filter(
-                created__range=[form['start_date'].value(), form['end_date'].value()])
-        total = sum([sale.total_paid for sale in sales])
+        sales, scope = Order.objects.filter(user_id=request.user.id, billing_status=True), f'user-{request.user.id}'
+    form = DateWindowForm(request.GET or None)
+    start, end = form.window()
+    summary = cached_order_summary(sales, start, end, scope)
+
+    rows = in_window(sales, start, end).select_related('user')
+    page = Paginator(rows, SALES_PER_PAGE).get_page(request.GET.get('page'))
+    query = request.GET.copy()
+    query.pop('page', None)
     return render(request,
-                  'account/user/sales.html', {'sales': sales, 'form': form, 'total': total})
+                  'account/user/sales.html', {'sales': page, 'form': form, 'total': summary['revenue'],
+                                              'summary': summary, 'query': query.urlencode()})
 
 def dash(request):
     orders = Order.objects.all()
     order_items = OrderItem.objects.all()
-    print(orders)
-    print(order_items)
     return render(request,
                   'account/user/dashmoard.html', {'order_items':order_items, 'orders':orders})
 
 def customer_rel(request):
     orders = Order.objects.exclude(full_name="").exclude(phone="").exclude(full_name="cust").annotate(full_name_count=Count('full_name')).filter(full_name_count=1)
-    print(orders)
     return render(request,
                   'account/user/customers.html', {'orders':orders})
 
 
 def get_filter_options(request):
-    grouped_purchases = Order.objects.annotate(year=ExtractYear("created")).values("year").order_by("-year").distinct()
-    options = [purchase["year"] for purchase in grouped_purchases]
-
     return JsonResponse({
-        "options": options,
+        "options": sales_years(),
     })
 
 def get_sales_chart(request, year):
-    purchases = Order.objects.filter(created__year=year)
-    grouped_purchases = purchases.annotate(price=F("total_paid")).annotate(month=ExtractMonth("created"))\
-        .values("month").annotate(average=Sum("total_paid")).values("month", "average").order_by("month")
-        
     sales_dict = get_year_dict()
 
-    for group in grouped_purchases:
-        sales_dict[months[group["month"]-1]] = round(group["average"], 2)
+    for month, total in monthly_sales(year).items():
+        sales_dict[months[month-1]] = round(total, 2)
 
     fixed_value = 800000
 
@@ -209,14 +149,10 @@ def get_sales_chart(request, year):
 
 
 def spend_per_customer_chart(request, year):
-    purchases = Order.objects.filter(created__year=year)
-    grouped_purchases = purchases.annotate(price=F("total_paid")).annotate(month=ExtractMonth("created"))\
-        .values("month").annotate(average=Avg("total_paid")).values("month", "average").order_by("month")
-
     spend_per_customer_dict = get_year_dict()
 
-    for group in grouped_purchases:
-        spend_per_customer_dict[months[group["month"]-1]] = round(group["average"], 2)
+    for month, average in monthly_spend(year).items():
+        spend_per_customer_dict[months[month-1]] = round(average, 2)
 
     return JsonResponse({
         "title": f"Spend per customer in {year}",
@@ -236,51 +172,23 @@ def statistics_view(request):
     return render(request, "account/user/statistics.html", {})
 
 def get_most_sold_chart(request, year):
-    # Query to get the most sold items for the specified year
-    most_sold_items = OrderItem.objects.filter(order__created__year=year) \
-        .values('product__title').annotate(total_quantity=Sum('quantity')).order_by('-total_quantity')[:75]
-    print(most_sold_items)
-
-    # Prepare data for the chart
-    labels = [item['product__title'] for item in most_sold_items]
-    quantities = [item['total_quantity'] for item in most_sold_items]
-
-    # Prepare JSON response
-    response_data = {
-        "title": f"Most Sold Items in {year}",
-        "data": {
-            "labels": labels,
-            "datasets": [{
-                "label": "Quantity Sold",
-                "backgroundColor": "#4e73df",
-                "borderColor": "#4e73df",
-                "data": quantities,
-            }]
-        }
-    }
-
-    return JsonResponse(response_data)
+    return units_chart(f"Most Sold Items in {year}", units_by_product(year)[:75])
 
 def get_least_sold_chart(request, year):
-    # Query to get the most sold items for the specified year
-    most_sold_items = OrderItem.objects.filter(order__created__year=year) \
-        .values('product__title').annotate(total_quantity=Sum('quantity')).order_by('total_quantity')[:10]
-    print(most_sold_items)
-
-    # Prepare data for the chart
-    labels = [item['product__title'] for item in most_sold_items]
-    quantities = [item['total_quantity'] for item in most_sold_items]
+    least_sold_items = sorted(units_by_product(year), key=lambda item: item[1])[:10]
+    return units_chart(f"Most Sold Items in {year}", least_sold_items)
 
+def units_chart(title, items):
     # Prepare JSON response
     response_data = {
-        "title": f"Most Sold Items in {year}",
+        "title": title,
         "data": {
-            "labels": labels,
+            "labels": [label for label, _ in items],
             "datasets": [{
                 "label": "Quantity Sold",
                 "backgroundColor": "#4e73df",
                 "borderColor": "#4e73df",
-                "data": quantities,
+                "data": [units for _, units in items],
             }]
         }
     }
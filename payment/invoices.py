@@ -0,0 +1,170 @@
+import hashlib
+import os
+import tempfile
+import zipfile
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from functools import lru_cache
+from io import BytesIO
+from pathlib import Path
+
+from django.conf import settings
+from django.db.models import Prefetch, prefetch_related_objects
+from django.template.loader import get_template
+from xhtml2pdf import pisa
+
+from orders.models import OrderItem
+
+INVOICE_TEMPLATE = 'payment/invoice.html'
+
+
+def render_pdf(template_src, context):
+    """
+    Render ``template_src`` with ``context`` to PDF bytes, or None when
+    xhtml2pdf reports an error.
+    """
+    html = get_template(template_src).render(context)
+    result = BytesIO()
+    pdf = pisa.pisaDocument(BytesIO(html.encode("ISO-8859-1")), result)
+    if pdf.err:
+        return None
+    return result.getvalue()
+
+
+@lru_cache(maxsize=None)
+def _template_digest():
+    # Part of every invoice key, so editing the template retires old PDFs
+    return hashlib.sha256(Path(get_template(INVOICE_TEMPLATE).origin.name).read_bytes()).hexdigest()
+
+
+def load_items(orders):
+    """
+    Prefetch the items and products an invoice shows, for one query
+    however many orders there are.
+    """
+    prefetch_related_objects(orders, Prefetch('items', queryset=OrderItem.objects.select_related('product')))
+
+
+def invoice_context(order):
+    return {
+        'order_id': order.order_number,
+        'phone': order.phone,
+        'date': str(order.created),
+        'name': order.full_name,
+        'order': order,
+        'amount': order.total_paid,
+    }
+
+
+def invoice_digest(order):
+    """
+    Hash everything an invoice shows: the order's details, totals and items
+    and the template itself. Expects the items to be prefetched.
+    """
+    digest = hashlib.sha256(_template_digest().encode())
+    for value in (order.order_number, order.full_name, order.phone, order.created, order.total_paid):
+        digest.update(f'{value}\x1f'.encode())
+    for item in order.items.all():
+        code = item.product.code if item.product else ''
+        digest.update(f'{code}\x1f{item.price}\x1f{item.quantity}\x1e'.encode())
+    return digest.hexdigest()
+
+
+def invoice_path(order, root=None):
+    return Path(root or settings.INVOICE_ROOT) / f'{order.order_number}-{invoice_digest(order)[:32]}.pdf'
+
+
+def render_invoice(order, root=None):
+    """
+    Return the path of ``order``'s invoice PDF, rendering it on a cache miss.
+    Returns None if the PDF cannot be rendered. ``root`` overrides
+    settings.INVOICE_ROOT.
+
+    Files are content addressed: a changed order gets a new file and older
+    renders of it are removed, so a cached file never needs invalidating.
+    """
+    path = invoice_path(order, root)
+    if path.exists():
+        return path
+
+    pdf = render_pdf(INVOICE_TEMPLATE, invoice_context(order))
+    if pdf is None:
+        return None
+    path.parent.mkdir(parents=True, exist_ok=True)
+    # Write then rename, so concurrent readers never see a partial file
+    fd, tmp = tempfile.mkstemp(dir=path.parent, suffix='.tmp')
+    with os.fdopen(fd, 'wb') as f:
+        f.write(pdf)
+    os.replace(tmp, path)
+
+    for stale in path.parent.glob(f'{order.order_number}-*.pdf'):
+        if stale != path:
+            stale.unlink(missing_ok=True)
+    return path
+
+
+def render_invoices(orders, workers=None, root=None):
+    """
+    Yield ``(order_number, path)`` for the invoices of ``orders``, in the
+    order they become available. Cached invoices come first. Cache misses
+    are rendered across a pool of ``workers`` processes, one per core by
+    default. ``workers=1`` renders them in this process.
+    """
+    orders = list(orders)
+    load_items(orders)
+    missing = []
+    for order in orders:
+        path = invoice_path(order, root)
+        if path.exists():
+            yield order.order_number, path
+        else:
+            missing.append(order)
+
+    workers = min(workers or os.cpu_count() or 1, len(missing))
+    if workers <= 1:
+        for order in missing:
+            yield order.order_number, render_invoice(order, root)
+        return
+
+    from . import pool
+
+    # Orders are sent with their items prefetched, so workers never query
+    # the database.
+    with ProcessPoolExecutor(max_workers=workers, initializer=pool.setup) as executor:
+        futures = [executor.submit(pool.render, order, root) for order in missing]
+        for future in as_completed(futures):
+            yield future.result()
+
+
+class _Sink:
+    """
+    Write-only file that collects what ZipFile writes, so the archive can
+    be streamed as it grows.
+    """
+
+    def __init__(self):
+        self.chunks = []
+
+    def write(self, data):
+        self.chunks.append(bytes(data))
+        return len(data)
+
+    def flush(self):
+        pass
+
+    def take(self):
+        data, self.chunks = b''.join(self.chunks), []
+        return data
+
+
+def invoice_zip(orders, workers=None, root=None):
+    """
+    Yield a ZIP archive holding the invoices of ``orders``, chunk by chunk
+    as they are rendered. PDFs are already compressed, so they are stored.
+    """
+    sink = _Sink()
+    with zipfile.ZipFile(sink, 'w', zipfile.ZIP_STORED) as archive:
+        for order_number, path in render_invoices(orders, workers, root):
+            if path is not None:
+                archive.write(path, f'Invoice_{order_number}.pdf')
+                yield sink.take()
+    yield sink.take()
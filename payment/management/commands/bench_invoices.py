@@ -0,0 +1,63 @@
+import tempfile
+import time
+from decimal import Decimal
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from orders.models import Order, OrderItem
+from payment.invoices import INVOICE_TEMPLATE, invoice_context, invoice_zip, load_items, render_pdf
+from store.models import Product
+
+
+class Command(BaseCommand):
+    help = ('Compare invoices/s of the one-at-a-time invoice rendering with the pooled bulk export, '
+            'cold and warm cache. Rolls back all writes.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--orders', type=int, default=200)
+        parser.add_argument('--items', type=int, default=5, help='Items per order')
+        parser.add_argument('--workers', type=int, default=None, help='Render processes, one per core by default')
+
+    def report(self, name, count, elapsed):
+        self.stdout.write(f"{name:>12} {count:>8} {elapsed:>8.2f}s {count / elapsed:>10.1f}")
+
+    def handle(self, *args, **options):
+        count = options['orders']
+        with transaction.atomic():
+            user = get_user_model().objects.create(email='bench@example.com', user_name='bench-invoices')
+            products = Product.objects.bulk_create([
+                Product(created_by=user, title=f'bench-invoice-{i}', slug=f'bench-invoice-{i}', code=f'B-{i}',
+                        price=Decimal('9.99'))
+                for i in range(options['items'])
+            ])
+            orders = Order.objects.bulk_create([
+                Order(user=user, full_name='bench', address1='bench', phone='0', total_paid=Decimal('49.95'),
+                      billing_status=True)
+                for _ in range(count)
+            ])
+            orders = list(Order.objects.filter(user=user))
+            OrderItem.objects.bulk_create([
+                OrderItem(order=order, product=product, price=product.price, quantity=1)
+                for order in orders for product in products
+            ])
+
+            self.stdout.write(f"{'path':>12} {'invoices':>8} {'time':>9} {'invoices/s':>10}")
+
+            # Baseline: what one GenerateInvoice request per order used to do
+            started = time.perf_counter()
+            for order in Order.objects.filter(user=user):
+                load_items([order])
+                render_pdf(INVOICE_TEMPLATE, invoice_context(order))
+            self.report('serial', count, time.perf_counter() - started)
+
+            with tempfile.TemporaryDirectory() as root:
+                for name in ('pool cold', 'pool warm'):
+                    started = time.perf_counter()
+                    size = sum(len(chunk) for chunk in invoice_zip(Order.objects.filter(user=user),
+                                                                   options['workers'], root))
+                    self.report(name, count, time.perf_counter() - started)
+            self.stdout.write(f"zip bytes={size}")
+
+            transaction.set_rollback(True)
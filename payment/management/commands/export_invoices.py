@@ -0,0 +1,34 @@
+import time
+from datetime import date
+
+from django.core.management.base import BaseCommand, CommandError
+
+from orders.models import Order
+from orders.rollups import day_bounds
+from payment.invoices import invoice_zip
+
+
+class Command(BaseCommand):
+    help = ('Write the invoices of every paid order placed between --start and --end (inclusive) '
+            'to a ZIP, rendering missing ones across a process pool.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--start', type=date.fromisoformat, required=True, help='YYYY-MM-DD')
+        parser.add_argument('--end', type=date.fromisoformat, required=True, help='YYYY-MM-DD')
+        parser.add_argument('--output', required=True, help='Path of the ZIP to write')
+        parser.add_argument('--workers', type=int, default=None, help='Render processes, one per core by default')
+
+    def handle(self, *args, **options):
+        if options['end'] < options['start']:
+            raise CommandError('--end is before --start')
+        orders = Order.objects.filter(billing_status=True, created__gte=day_bounds(options['start'])[0],
+                                      created__lt=day_bounds(options['end'])[1]).order_by('created')
+
+        count = orders.count()
+        started = time.perf_counter()
+        with open(options['output'], 'wb') as f:
+            for chunk in invoice_zip(orders, options['workers']):
+                f.write(chunk)
+        elapsed = time.perf_counter() - started
+        self.stdout.write(f"Wrote {count} invoices to {options['output']} in {elapsed:.2f}s "
+                          f"({count / elapsed if elapsed else 0:.1f} invoices/s)")
@@ -0,0 +1,21 @@
+"""
+Entry points for the invoice rendering process pool.
+
+Nothing here imports models at module level: on platforms that spawn
+rather than fork, a worker imports this module before Django is set up.
+"""
+
+
+def setup():
+    import django
+    from django.apps import apps
+
+    if not apps.ready:
+        django.setup()
+
+
+def render(order, root):
+    from .invoices import render_invoice
+
+    path = render_invoice(order, root)
+    return order.order_number, path
@@ -0,0 +1,13 @@
+from orders.models import Order
+from .invoices import load_items, render_invoice
+
+
+def prerender_invoice(order_number):
+    """
+    Background job queued when an order is paid, so the first download of
+    its invoice is served from the cache too.
+    """
+    order = Order.objects.filter(order_number=order_number, billing_status=True).first()
+    if order is not None:
+        load_items([order])
+        render_invoice(order)
@@ -1,3 +1,115 @@
-from django.test import TestCase
+import tempfile
+import zipfile
+from decimal import Decimal
+from io import BytesIO
+from pathlib import Path
+from unittest import mock
 
-# Create your tests here.
+from django.contrib.auth import get_user_model
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from jobs.queue import run_pending
+from orders.models import Order, OrderItem
+from store.models import Product
+from . import invoices
+
+
+class InvoiceCacheTestCase(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = get_user_model().objects.create(email='till@example.com', user_name='till', is_active=True)
+        product = Product.objects.create(created_by=cls.user, title='tile', slug='tile', code='t-1',
+                                         price=Decimal('2.50'), inventory=10)
+        cls.order = Order.objects.create(user=cls.user, full_name='cust', address1='', phone='',
+                                         total_paid=Decimal('5.00'))
+        OrderItem.objects.create(order=cls.order, product=product, price=Decimal('2.50'), quantity=2)
+
+    def setUp(self):
+        invoice_root = tempfile.TemporaryDirectory()
+        self.addCleanup(invoice_root.cleanup)
+        settings = override_settings(INVOICE_ROOT=invoice_root.name)
+        settings.enable()
+        self.addCleanup(settings.disable)
+        self.invoice_root = Path(invoice_root.name)
+        self.client.force_login(self.user)
+
+    def pay(self):
+        order = Order.objects.get(pk=self.order.pk)
+        order.billing_status = True
+        order.save()
+
+    def download(self):
+        response = self.client.get(reverse('payment:generateinvoice', args=[self.order.pk]))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['Content-Type'], 'application/pdf')
+        return b''.join(response.streaming_content)
+
+    def test_paying_prerenders_the_invoice(self):
+        self.pay()
+        self.assertEqual(list(self.invoice_root.iterdir()), [])
+        run_pending()
+        self.assertEqual(len(list(self.invoice_root.glob(f'{self.order.pk}-*.pdf'))), 1)
+
+        with mock.patch.object(invoices, 'render_pdf', wraps=invoices.render_pdf) as render_pdf:
+            self.assertTrue(self.download().startswith(b'%PDF'))
+            self.download()
+        render_pdf.assert_not_called()
+
+    def test_changed_orders_get_a_new_invoice(self):
+        self.pay()
+        first = self.download()
+        [old] = self.invoice_root.iterdir()
+
+        OrderItem.objects.filter(order=self.order).update(quantity=3)
+        Order.objects.filter(pk=self.order.pk).update(total_paid=Decimal('7.50'))
+        self.assertNotEqual(self.download(), first)
+        [new] = self.invoice_root.iterdir()
+        self.assertNotEqual(new, old)
+
+    def test_unpaid_orders_have_no_invoice(self):
+        response = self.client.get(reverse('payment:generateinvoice', args=[self.order.pk]))
+        self.assertNotEqual(response['Content-Type'], 'application/pdf')
+
+
+class InvoiceExportTestCase(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.staff = get_user_model().objects.create(email='staff@example.com', user_name='staff', is_active=True,
+                                                    is_staff=True, is_superuser=True)
+        product = Product.objects.create(created_by=cls.staff, title='tile', slug='tile', code='t-1',
+                                         price=Decimal('2.50'))
+        cls.orders = Order.objects.bulk_create([
+            Order(user=cls.staff, full_name=f'cust-{i}', address1='', phone='', total_paid=Decimal('2.50'),
+                  billing_status=True)
+            for i in range(3)
+        ])
+        OrderItem.objects.bulk_create([
+            OrderItem(order=order, product=product, price=Decimal('2.50'), quantity=1)
+            for order in Order.objects.all()
+        ])
+
+    def setUp(self):
+        invoice_root = tempfile.TemporaryDirectory()
+        self.addCleanup(invoice_root.cleanup)
+        settings = override_settings(INVOICE_ROOT=invoice_root.name)
+        settings.enable()
+        self.addCleanup(settings.disable)
+
+    def test_pooled_export(self):
+        archive = zipfile.ZipFile(BytesIO(b''.join(invoices.invoice_zip(Order.objects.all(), workers=2))))
+        self.assertEqual(sorted(archive.namelist()),
+                         sorted(f'Invoice_{order.pk}.pdf' for order in Order.objects.all()))
+        self.assertTrue(all(archive.read(name).startswith(b'%PDF') for name in archive.namelist()))
+
+    def test_admin_action(self):
+        self.client.force_login(self.staff)
+        response = self.client.post(reverse('admin:orders_order_changelist'), {
+            'action': 'export_invoices',
+            '_selected_action': list(Order.objects.values_list('pk', flat=True)[:2]),
+        })
+        self.assertEqual(response['Content-Type'], 'application/zip')
+        archive = zipfile.ZipFile(BytesIO(b''.join(response.streaming_content)))
+        self.assertEqual(len(archive.namelist()), 2)
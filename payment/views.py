@@ -8,11 +8,9 @@ from django.shortcuts import render
 from django.views.generic import View
 import sys
 # for generating pdf invoice
-from io import BytesIO
-from django.http import HttpResponse
-from django.template.loader import get_template
-from xhtml2pdf import pisa
+from django.http import FileResponse, HttpResponse
 import os
+from .invoices import load_items, render_invoice, render_pdf
 
 
 # Create your views here.
@@ -37,12 +35,9 @@ def fetch_resources(uri, rel):
     return path
 
 def render_to_pdf(template_src, context_dict={}):
-    template = get_template(template_src)
-    html  = template.render(context_dict)
-    result = BytesIO()
-    pdf = pisa.pisaDocument(BytesIO(html.encode("ISO-8859-1")), result)#, link_callback=fetch_resources)
-    if not pdf.err:
-        return HttpResponse(result.getvalue(), content_type='application/pdf')
+    pdf = render_pdf(template_src, context_dict)
+    if pdf is not None:
+        return HttpResponse(pdf, content_type='application/pdf')
     return None
 
 
@@ -50,28 +45,14 @@ class GenerateInvoice(View):
     def get(self, request, pk, *args, **kwargs):
         try:
             order_db = Order.objects.get(order_number = pk , user = request.user , billing_status= True) 
-            print(order_db)    #you can filter using order_id as well
         except:
             return HttpResponse("505 Not Found")
-        data = {
-            'order_id': order_db.order_number,
-            'phone': order_db.phone,
-            'date': str(order_db.created),
-            'name': order_db.full_name,
-            'order': order_db,
-            'amount': order_db.total_paid,
-        }
-        pdf = render_to_pdf('payment/invoice.html', data)
-        #return HttpResponse(pdf, content_type='application/pdf')
-
-        # force download
-        if pdf:
-            response = HttpResponse(pdf, content_type='application/pdf')
-            filename = "Invoice_%s.pdf" %(data['order_id'])
-            content = "inline; filename='%s'" %(filename)
-            #download = request.GET.get("download")
-            #if download:
-            content = "attachment; filename=%s" %(filename)
-            response['Content-Disposition'] = content
-            return response
+        load_items([order_db])
+
+        # Usually pre-rendered when the order was paid; otherwise rendered now
+        # and cached for later downloads
+        path = render_invoice(order_db)
+        if path:
+            return FileResponse(open(path, 'rb'), as_attachment=True, content_type='application/pdf',
+                                filename="Invoice_%s.pdf" % order_db.order_number)
         return HttpResponse("Not found")
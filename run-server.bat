@@ -17,5 +17,8 @@ if not defined _OLD_VIRTUAL_PATH set _OLD_VIRTUAL_PATH=%PATH%
 
 set PATH=%VIRTUAL_ENV%\Scripts;%PATH%
 start C:\"Program Files"\Google\Chrome\Application\chrome.exe
+rem The job worker sends activation emails, updates the sales reports and
+rem renders invoices; without it those jobs stay pending
+start "job worker" python .\manage.py runworker
 .\manage.py runserver
 pause
\ No newline at end of file
@@ -1,7 +0,0 @@
-from django.apps import AppConfig
-
-
-class Shop2Config(AppConfig):
-    default_auto_field = 'django.db.models.BigAutoField'
-    name = 'shop2'
-    verbose_name = 'STORE-2(SCHOOL JUNCTION)'
@@ -1,5 +0,0 @@
-from .basket import Basket
-
-
-def basket(request):
-    return {'basket': Basket(request)}
\ No newline at end of file
@@ -1,29 +0,0 @@
-# Generated by Django 4.1.6 on 2024-07-10 08:09
-
-from django.db import migrations, models
-import django.db.models.deletion
-
-
-class Migration(migrations.Migration):
-
-    dependencies = [
-        ('shop2', '0001_initial'),
-    ]
-
-    operations = [
-        migrations.AlterField(
-            model_name='inventoryreport',
-            name='product',
-            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='inv_report', to='shop2.product'),
-        ),
-        migrations.AlterField(
-            model_name='orderitem',
-            name='product',
-            field=models.ForeignKey(null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='order_item', to='shop2.product'),
-        ),
-        migrations.AlterField(
-            model_name='salesreport',
-            name='product',
-            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='report_prod', to='shop2.product'),
-        ),
-    ]
@@ -1,19 +0,0 @@
-# Generated by Django 4.1.6 on 2025-03-09 15:09
-
-from django.db import migrations, models
-import django.db.models.deletion
-
-
-class Migration(migrations.Migration):
-
-    dependencies = [
-        ('shop2', '0002_alter_inventoryreport_product_and_more'),
-    ]
-
-    operations = [
-        migrations.AlterField(
-            model_name='orderitem',
-            name='product',
-            field=models.ForeignKey(null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='order_items', to='shop2.product'),
-        ),
-    ]
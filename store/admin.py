@@ -1,13 +1,19 @@
 from django.contrib import admin
 from unfold.admin import ModelAdmin
-from .models import Category, Product, SubCategory
+from .models import Category, Product, Storefront, SubCategory
 
 
 
 
+@admin.register(Storefront)
+class StorefrontAdmin(ModelAdmin):
+    list_display = ['name', 'slug', 'templates']
+
+
 @admin.register(Category)
 class CategoryAdmin(ModelAdmin):
-    list_display = ['name', 'slug']
+    list_display = ['name', 'slug', 'storefront']
+    list_filter = ['storefront']
     prepopulated_fields = {'slug': ('name',)}
     
 
@@ -16,7 +22,7 @@ class CategoryAdmin(ModelAdmin):
 class ProductAdmin(ModelAdmin):
     list_display = ['title', 'inventory', 'code', 'price',
                     'in_stock', 'created', 'updated','subcategory']
-    list_filter = ['in_stock', 'is_active']
+    list_filter = ['storefront', 'in_stock', 'is_active']
     list_editable = ['price', 'in_stock']
     prepopulated_fields = {'slug': ('title',)}
     search_fields = ['code']
@@ -0,0 +1,142 @@
+from collections import Counter
+from urllib.parse import quote
+
+from django.core.cache import cache
+from django.db.models import Prefetch
+from django.utils import timezone
+
+from .models import MAIN_STOREFRONT_ID, Category, Product, SubCategory
+
+CATALOG_VERSION_KEY = 'store:catalog-version'
+CATALOG_MODIFIED_KEY = 'store:catalog-modified'
+CATEGORY_TREE_KEY = 'store:category-tree:{storefront}:{version}'
+CATEGORY_JSON_KEY = 'store:category-json:{storefront}:{version}'
+SUBCATEGORY_JSON_KEY = 'store:subcategory-json:{storefront}:{version}:{category}'
+CATEGORY_TREE_TIMEOUT = 60 * 60 * 24
+PRICE_VERSION_KEY = 'store:price-version'
+PRICE_KEY = 'store:price:{version}:{product}'
+PRICE_TIMEOUT = 60 * 60 * 24
+
+stats = Counter(local_hits=0, shared_hits=0, misses=0)
+# {storefront id: (catalog version, category tree)}
+_local = {}
+
+
+def catalog_version():
+    """
+    Return the current catalog version. It is bumped whenever a Category or
+    SubCategory is saved or deleted, so it can key caches and ETags.
+    """
+    version = cache.get(CATALOG_VERSION_KEY)
+    if version is None:
+        cache.add(CATALOG_VERSION_KEY, 1, timeout=None)
+        version = cache.get(CATALOG_VERSION_KEY)
+    return version
+
+
+def catalog_last_modified():
+    """
+    Return when the catalog last changed, for Last-Modified headers. Before
+    the first change this is the time the value was first asked for.
+    """
+    modified = cache.get(CATALOG_MODIFIED_KEY)
+    if modified is None:
+        cache.add(CATALOG_MODIFIED_KEY, timezone.now().replace(microsecond=0), timeout=None)
+        modified = cache.get(CATALOG_MODIFIED_KEY)
+    return modified
+
+
+def bump_catalog_version():
+    try:
+        cache.incr(CATALOG_VERSION_KEY)
+    except ValueError:
+        cache.add(CATALOG_VERSION_KEY, 2, timeout=None)
+    cache.set(CATALOG_MODIFIED_KEY, timezone.now().replace(microsecond=0), timeout=None)
+
+
+def get_category_tree(storefront=MAIN_STOREFRONT_ID):
+    """
+    Return every Category of ``storefront`` with its SubCategories
+    prefetched. The tree is cached in this process and in the shared cache,
+    both keyed by the catalog version, so steady state costs no queries.
+    """
+    version = catalog_version()
+    local_version, tree = _local.get(storefront, (None, None))
+    if local_version == version:
+        stats['local_hits'] += 1
+        return tree
+
+    key = CATEGORY_TREE_KEY.format(storefront=storefront, version=version)
+    tree = cache.get(key)
+    if tree is None:
+        stats['misses'] += 1
+        tree = list(Category.objects.filter(storefront_id=storefront).prefetch_related(
+            Prefetch('subcategory_set', queryset=SubCategory.objects.order_by('name'))
+        ))
+        cache.set(key, tree, CATEGORY_TREE_TIMEOUT)
+    else:
+        stats['shared_hits'] += 1
+
+    _local[storefront] = version, tree
+    return tree
+
+
+def category_data(storefront=MAIN_STOREFRONT_ID):
+    """
+    Category rows as served by the category JSON endpoint, cached per
+    storefront and catalog version.
+    """
+    key = CATEGORY_JSON_KEY.format(storefront=storefront, version=catalog_version())
+    data = cache.get(key)
+    if data is None:
+        data = list(Category.objects.filter(storefront_id=storefront).values())
+        cache.set(key, data, CATEGORY_TREE_TIMEOUT)
+    return data
+
+
+def subcategory_data(category_name, storefront=MAIN_STOREFRONT_ID):
+    key = SUBCATEGORY_JSON_KEY.format(storefront=storefront, version=catalog_version(),
+                                      category=quote(category_name))
+    data = cache.get(key)
+    if data is None:
+        data = list(SubCategory.objects.filter(categories__storefront_id=storefront,
+                                               categories__name=category_name).values())
+        cache.set(key, data, CATEGORY_TREE_TIMEOUT)
+    return data
+
+
+def price_version():
+    """
+    Return the current price version. It is bumped whenever a product's
+    price changes or it stops being sold, so baskets can tell their prices
+    moved since they were last written.
+    """
+    version = cache.get(PRICE_VERSION_KEY)
+    if version is None:
+        cache.add(PRICE_VERSION_KEY, 1, timeout=None)
+        version = cache.get(PRICE_VERSION_KEY)
+    return version
+
+
+def bump_price_version():
+    try:
+        cache.incr(PRICE_VERSION_KEY)
+    except ValueError:
+        cache.add(PRICE_VERSION_KEY, 2, timeout=None)
+
+
+def prices(product_ids):
+    """
+    Return {product_id: price} for the active products among
+    ``product_ids``, from one cache round trip. Misses cost one query.
+    """
+    version = price_version()
+    keys = {PRICE_KEY.format(version=version, product=product_id): product_id for product_id in product_ids}
+    found = {keys[key]: price for key, price in cache.get_many(keys).items()}
+    missing = [product_id for product_id in keys.values() if product_id not in found]
+    if missing:
+        loaded = dict(Product.products.filter(id__in=missing).values_list('id', 'price'))
+        cache.set_many({PRICE_KEY.format(version=version, product=product_id): price
+                        for product_id, price in loaded.items()}, PRICE_TIMEOUT)
+        found.update(loaded)
+    return found
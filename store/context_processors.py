@@ -1,7 +1,11 @@
-from .models import Category
+from django.utils.functional import SimpleLazyObject
+
+from .catalog import get_category_tree
+from .storefronts import storefront_id
 
 
 def categories(request):
+    # Lazy, so pages that never render the nav don't even hit the cache
     return {
-        'categories': Category.objects.all()
-    }
\ No newline at end of file
+        'categories': SimpleLazyObject(lambda: get_category_tree(storefront_id(request)))
+    }
@@ -0,0 +1,65 @@
+import random
+import statistics
+import time
+from decimal import Decimal
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from store.models import Category, Product, SubCategory
+from store.search import rebuild_index, search_ids
+
+COLOURS = ['white', 'black', 'grey', 'beige', 'ivory', 'cream', 'brown', 'blue', 'green', 'sand']
+MATERIALS = ['ceramic', 'porcelain', 'marble', 'granite', 'slate', 'terrazzo', 'mosaic', 'vinyl']
+FINISHES = ['matt', 'gloss', 'polished', 'rustic', 'satin', 'textured']
+SIZES = ['30x30', '40x40', '60x60', '30x60', '60x120', '20x20']
+
+
+class Command(BaseCommand):
+    help = 'Search a synthetic catalogue and report query latency. Rolls back all writes.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--products', type=int, default=100_000)
+        parser.add_argument('--queries', type=int, default=500)
+        parser.add_argument('--max-p95-ms', type=float, default=10.0)
+
+    def handle(self, *args, **options):
+        rng = random.Random(42)
+        with transaction.atomic():
+            user = get_user_model().objects.create(email='bench@example.com', user_name='bench-search')
+            categories = [Category.objects.create(name=name, slug=f'bench-{name}') for name in ('wall', 'floor')]
+            subcategories = [SubCategory.objects.create(name=material, categories=rng.choice(categories))
+                             for material in MATERIALS]
+            for start in range(0, options['products'], 10_000):
+                Product.objects.bulk_create([
+                    Product(created_by=user, title=f'{rng.choice(COLOURS)} {rng.choice(FINISHES)} tile {i}',
+                            code=f'CW-{i:06d}', slug=f'bench-{i}', price=Decimal('9.99'),
+                            description=f'{rng.choice(SIZES)} {rng.choice(MATERIALS)} {rng.choice(FINISHES)}',
+                            category=rng.choice(categories), subcategory=rng.choice(subcategories))
+                    for i in range(start, min(start + 10_000, options['products']))
+                ])
+            started = time.perf_counter()
+            rebuild_index()
+            self.stdout.write(f"Indexed {options['products']} products in {time.perf_counter() - started:.2f}s")
+
+            queries = [rng.choice([
+                lambda: rng.choice(COLOURS)[:3],
+                lambda: f'{rng.choice(COLOURS)} {rng.choice(MATERIALS)[:4]}',
+                lambda: f'cw {rng.randrange(options["products"]):06d}'[:7],
+                lambda: f'{rng.choice(FINISHES)} {rng.choice(SIZES)} floor',
+            ])() for _ in range(options['queries'])]
+            timings = []
+            for query in queries:
+                started = time.perf_counter()
+                search_ids(query)
+                timings.append((time.perf_counter() - started) * 1000)
+
+            transaction.set_rollback(True)
+
+        timings.sort()
+        p95 = timings[int(len(timings) * 0.95) - 1]
+        self.stdout.write(f"queries={len(timings)} p50={statistics.median(timings):.2f}ms "
+                          f"p95={p95:.2f}ms max={timings[-1]:.2f}ms")
+        if p95 > options['max_p95_ms']:
+            raise CommandError(f"p95 search latency {p95:.2f}ms is above {options['max_p95_ms']}ms")
@@ -0,0 +1,15 @@
+from django.core.management.base import BaseCommand
+
+from store.models import Product
+from store.search import rebuild_index, uses_fts
+
+
+class Command(BaseCommand):
+    help = 'Rebuild the product full-text search index from the product table.'
+
+    def handle(self, *args, **options):
+        if not uses_fts():
+            self.stdout.write('This database is searched without a separate index, nothing to rebuild.')
+            return
+        rebuild_index()
+        self.stdout.write(self.style.SUCCESS(f"Indexed {Product.objects.count()} products"))
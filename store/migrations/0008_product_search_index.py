@@ -0,0 +1,24 @@
+from django.db import migrations
+
+
+def create_search_index(apps, schema_editor):
+    from store.search import rebuild_index
+    if schema_editor.connection.vendor == 'sqlite':
+        rebuild_index()
+
+
+def drop_search_index(apps, schema_editor):
+    from store.search import FTS_TABLE
+    if schema_editor.connection.vendor == 'sqlite':
+        schema_editor.execute(f"DROP TABLE IF EXISTS {FTS_TABLE}")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('store', '0007_product_listing_indexes'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_search_index, drop_search_index),
+    ]
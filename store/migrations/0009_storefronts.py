@@ -0,0 +1,75 @@
+# Generated by Django 4.1.6 on 2026-10-18 15:56
+
+from django.core.management.color import no_style
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+def create_storefronts(apps, schema_editor):
+    # Fixed ids: existing rows default to the main storefront and core.urls
+    # mounts School Junction under its slug
+    Storefront = apps.get_model('store', 'Storefront')
+    Storefront.objects.bulk_create([
+        Storefront(id=1, name='Main shop', slug='main', templates='store'),
+        Storefront(id=2, name='School Junction', slug='sj', templates='sj'),
+    ], ignore_conflicts=True)
+    connection = schema_editor.connection
+    with connection.cursor() as cursor:
+        for sql in connection.ops.sequence_reset_sql(no_style(), [Storefront]):
+            cursor.execute(sql)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('store', '0008_product_search_index'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Storefront',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=255)),
+                ('slug', models.SlugField(unique=True)),
+                ('templates', models.CharField(default='store', max_length=50)),
+            ],
+        ),
+        migrations.RunPython(create_storefronts, migrations.RunPython.noop),
+        migrations.AddField(
+            model_name='category',
+            name='storefront',
+            field=models.ForeignKey(default=1, on_delete=django.db.models.deletion.PROTECT, to='store.storefront'),
+        ),
+        migrations.AddField(
+            model_name='product',
+            name='storefront',
+            field=models.ForeignKey(default=1, on_delete=django.db.models.deletion.PROTECT, to='store.storefront'),
+        ),
+        migrations.AlterField(
+            model_name='category',
+            name='slug',
+            field=models.SlugField(max_length=255),
+        ),
+        migrations.AlterField(
+            model_name='product',
+            name='title',
+            field=models.CharField(max_length=255),
+        ),
+        migrations.AddConstraint(
+            model_name='category',
+            constraint=models.UniqueConstraint(fields=('storefront', 'slug'), name='category_storefront_slug_uniq'),
+        ),
+        migrations.AddConstraint(
+            model_name='product',
+            constraint=models.UniqueConstraint(fields=('storefront', 'title'), name='product_storefront_title_uniq'),
+        ),
+        migrations.RemoveIndex(
+            model_name='product',
+            name='product_listing_idx',
+        ),
+        migrations.AddIndex(
+            model_name='product',
+            index=models.Index(fields=['storefront', '-created', 'id'], name='product_storefront_listing_idx'),
+        ),
+    ]
@@ -3,23 +3,57 @@ from django.db import models
 from django.urls import reverse
 from django.utils import timezone
 from django.core.validators import MinValueValidator
+from django.db.models.signals import post_delete, post_save, pre_delete
+from django.dispatch import receiver
 
 
 
+# The shop at the site root; created by the storefront migration
+MAIN_STOREFRONT_ID = 1
+
+
+class Storefront(models.Model):
+    """
+    One shop served from the shared catalog and order tables: the main
+    shop at the site root, School Junction under sjshop/. Each storefront
+    is mounted in core.urls with its slug as the URL namespace.
+    """
+    name = models.CharField(max_length=255)
+    slug = models.SlugField(max_length=50, unique=True)
+    # Template directory of the storefront's pages, e.g. 'store' or 'sj'
+    templates = models.CharField(max_length=50, default='store')
+
+    def __str__(self):
+        return self.name
+
+    @property
+    def url_namespace(self):
+        return 'store' if self.pk == MAIN_STOREFRONT_ID else self.slug
+
+    def template(self, name):
+        return f'{self.templates}/{name}'
+
+
 class ProductManager(models.Manager):
     def get_queryset(self):
         return super(ProductManager, self).get_queryset().filter(is_active=True)
 
 
 class Category(models.Model):
+    storefront = models.ForeignKey(Storefront, on_delete=models.PROTECT, default=MAIN_STOREFRONT_ID)
     name = models.CharField(max_length=255, db_index=True)
-    slug = models.SlugField(max_length=255, unique=True)
+    slug = models.SlugField(max_length=255)
 
     class Meta:
         verbose_name_plural = 'categories'
+        constraints = [
+            models.UniqueConstraint(fields=['storefront', 'slug'], name='category_storefront_slug_uniq'),
+        ]
 
     def get_absolute_url(self):
-        return reverse('store:category_list', args=[self.slug])
+        from .storefronts import get_storefront
+        return reverse('store:category_list', args=[self.slug],
+                       current_app=get_storefront(self.storefront_id).url_namespace)
 
     def __str__(self):
         return self.name
@@ -37,10 +71,11 @@ class SubCategory(models.Model):
     
 
 class Product(models.Model):
+    storefront = models.ForeignKey(Storefront, on_delete=models.PROTECT, default=MAIN_STOREFRONT_ID)
     category = models.ForeignKey(Category, on_delete=models.SET_NULL, blank=True, null= True)
     subcategory = models.ForeignKey(SubCategory, on_delete=models.SET_NULL, blank=True, null= True)
     created_by = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='product_creator')
-    title = models.CharField(max_length=255,unique=True)
+    title = models.CharField(max_length=255)
     size = models.CharField(max_length=255, null=True)
     author = models.CharField(max_length=255, default='admin')
     code = models.CharField(max_length=255, default='')
@@ -61,13 +96,30 @@ class Product(models.Model):
     class Meta:
         verbose_name_plural = 'Products'
         ordering = ('-created',)
+        indexes = [
+            # Keyset pagination of the storefront listings
+            models.Index(fields=['storefront', '-created', 'id'], name='product_storefront_listing_idx'),
+            models.Index(fields=['category', '-created', 'id'], name='product_category_listing_idx'),
+        ]
+        constraints = [
+            models.UniqueConstraint(fields=['storefront', 'title'], name='product_storefront_title_uniq'),
+        ]
 
     def get_absolute_url(self):
-        return reverse('store:product_detail', args=[self.slug])
+        from .storefronts import get_storefront
+        return reverse('store:product_detail', args=[self.slug],
+                       current_app=get_storefront(self.storefront_id).url_namespace)
 
     def __str__(self):
         return self.title
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        product = super().from_db(db, field_names, values)
+        # What baskets price from, to tell whether a save changes it
+        product._loaded_price = (product.__dict__.get('price'), product.__dict__.get('is_active'))
+        return product
+
     @property
     def can_order(self):
         if self.has_inventory():
@@ -88,9 +140,71 @@ class Product(models.Model):
         return self.inventory > 0 # True or False
 
     def remove_items_from_inventory(self, count=1, save=True):
-        current_inv = self.inventory
-        current_inv -= count
-        self.inventory = current_inv
-        if save == True:
-            self.save()
-        return self.inventory
\ No newline at end of file
+        """
+        Take ``count`` items out of stock. With ``save`` the decrement is a
+        conditional UPDATE of the inventory column (see store.stock), which
+        raises ValueError when there is not enough stock.
+        """
+        if save:
+            from .stock import reserve
+            if reserve({self.pk: count}):
+                raise ValueError(f"Not enough inventory of {self}.")
+            self.refresh_from_db(fields=['inventory'])
+        else:
+            self.inventory -= count
+        return self.inventory
+
+@receiver([post_save, post_delete], sender=Storefront)
+def invalidate_storefronts(sender, **kwargs):
+    from .storefronts import clear_storefronts
+    clear_storefronts()
+
+
+@receiver([post_save, post_delete], sender=Category)
+@receiver([post_save, post_delete], sender=SubCategory)
+def invalidate_catalog(sender, **kwargs):
+    from .catalog import bump_catalog_version
+    bump_catalog_version()
+
+
+@receiver([post_save, post_delete], sender=Product)
+def invalidate_prices(sender, instance, created=False, signal=None, **kwargs):
+    # Reads __dict__ so a deferred price is never loaded just to compare it
+    current = (instance.__dict__.get('price'), instance.__dict__.get('is_active'))
+    if signal is post_save and (created or getattr(instance, '_loaded_price', None) == current):
+        return
+    from .catalog import bump_price_version
+    bump_price_version()
+    instance._loaded_price = current
+
+
+@receiver(post_save, sender=Product)
+def index_product(sender, instance, **kwargs):
+    from .search import index_products
+    index_products([instance.id])
+
+
+@receiver(post_delete, sender=Product)
+def unindex_product(sender, instance, **kwargs):
+    from .search import unindex_products
+    unindex_products([instance.id])
+
+
+@receiver(pre_delete, sender=Category)
+@receiver(pre_delete, sender=SubCategory)
+def remember_categorized_products(sender, instance, **kwargs):
+    # The products are detached with a plain UPDATE (SET_NULL), so note
+    # their ids now to reindex them once the delete has happened.
+    field = 'category' if sender is Category else 'subcategory'
+    instance._product_ids = list(Product.objects.filter(**{field: instance}).values_list('id', flat=True))
+
+
+@receiver([post_save, post_delete], sender=Category)
+@receiver([post_save, post_delete], sender=SubCategory)
+def reindex_categorized_products(sender, instance, **kwargs):
+    from .search import index_products
+    product_ids = getattr(instance, '_product_ids', None)
+    if product_ids is None:
+        field = 'category' if sender is Category else 'subcategory'
+        product_ids = Product.objects.filter(**{field: instance}).values_list('id', flat=True)
+    index_products(product_ids)
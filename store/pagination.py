@@ -0,0 +1,45 @@
+import base64
+from datetime import datetime
+
+from django.db.models import Q
+
+PRODUCTS_PER_PAGE = 40
+
+
+def encode_cursor(product):
+    raw = f"{product.created.isoformat()}|{product.id}"
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip('=')
+
+
+def decode_cursor(token):
+    """
+    Return the (created, id) pair of an ``?after=`` token, or None when the
+    token is missing or malformed.
+    """
+    if not token:
+        return None
+    try:
+        raw = base64.urlsafe_b64decode(token + '=' * (-len(token) % 4)).decode()
+        created, product_id = raw.split('|')
+        return datetime.fromisoformat(created), int(product_id)
+    except (ValueError, UnicodeDecodeError):
+        return None
+
+
+def keyset_page(queryset, after=None, per_page=PRODUCTS_PER_PAGE):
+    """
+    Return one page of products ordered by (-created, id) together with the
+    token of the next page (None on the last page).
+
+    Pages are selected with a WHERE on the ordering columns rather than an
+    OFFSET, so every page costs the same however deep the shopper scrolls.
+    """
+    queryset = queryset.order_by('-created', 'id')
+    cursor = decode_cursor(after)
+    if cursor:
+        created, product_id = cursor
+        queryset = queryset.filter(Q(created__lt=created) | Q(created=created, id__gt=product_id))
+
+    products = list(queryset[:per_page + 1])
+    next_token = encode_cursor(products[per_page - 1]) if len(products) > per_page else None
+    return products[:per_page], next_token
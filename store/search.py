@@ -0,0 +1,141 @@
+import re
+
+from django.db import connection
+from django.db.models import Case, Q, When
+
+from .models import Product
+
+FTS_TABLE = 'store_product_fts'
+SEARCH_LIMIT = 50
+# bm25() weights of the FTS columns (title, code, description, category,
+# subcategory), as the A/B/C weights on PostgreSQL: words found in the
+# title or code outrank words that only hit the category or description
+FTS_WEIGHTS = (10.0, 10.0, 1.0, 4.0, 4.0)
+
+CREATE_FTS_TABLE = (
+    f"CREATE VIRTUAL TABLE IF NOT EXISTS {FTS_TABLE} USING fts5("
+    "title, code, description, category, subcategory, "
+    "tokenize='unicode61', prefix='2 3 4 5')"
+)
+
+# Products joined with their category names, as (rowid, title, code, ...)
+# rows for the FTS table.
+_DOCUMENTS = (
+    "SELECT p.id, p.title, p.code, p.description, COALESCE(c.name, ''), COALESCE(s.name, '') "
+    "FROM store_product p "
+    "LEFT JOIN store_category c ON c.id = p.category_id "
+    "LEFT JOIN store_subcategory s ON s.id = p.subcategory_id"
+)
+
+
+def uses_fts():
+    return connection.vendor == 'sqlite'
+
+
+def terms(query):
+    return re.findall(r'\w+', query.lower())
+
+
+def _chunks(product_ids, size=500):
+    product_ids = [int(product_id) for product_id in product_ids]
+    for start in range(0, len(product_ids), size):
+        yield product_ids[start:start + size]
+
+
+def index_products(product_ids):
+    """
+    (Re)index the given products. Called from the Product and category
+    signals; a no-op on databases without FTS5.
+    """
+    if not uses_fts():
+        return
+    with connection.cursor() as cursor:
+        for chunk in _chunks(product_ids):
+            placeholders = ', '.join(['%s'] * len(chunk))
+            cursor.execute(f"DELETE FROM {FTS_TABLE} WHERE rowid IN ({placeholders})", chunk)
+            cursor.execute(
+                f"INSERT INTO {FTS_TABLE} (rowid, title, code, description, category, subcategory) "
+                f"{_DOCUMENTS} WHERE p.id IN ({placeholders})",
+                chunk,
+            )
+
+
+def unindex_products(product_ids):
+    if not uses_fts():
+        return
+    with connection.cursor() as cursor:
+        for chunk in _chunks(product_ids):
+            placeholders = ', '.join(['%s'] * len(chunk))
+            cursor.execute(f"DELETE FROM {FTS_TABLE} WHERE rowid IN ({placeholders})", chunk)
+
+
+def rebuild_index():
+    if not uses_fts():
+        return
+    with connection.cursor() as cursor:
+        cursor.execute(f"DROP TABLE IF EXISTS {FTS_TABLE}")
+        cursor.execute(CREATE_FTS_TABLE)
+        cursor.execute(
+            f"INSERT INTO {FTS_TABLE} (rowid, title, code, description, category, subcategory) {_DOCUMENTS}"
+        )
+
+
+def search_ids(query, limit=SEARCH_LIMIT, storefront=None):
+    """
+    Return the ids of products matching every word of ``query``, best match
+    first. The last word also matches as a prefix, so results follow the
+    shopper as they type. ``storefront`` limits them to one storefront's
+    products.
+    """
+    words = terms(query)
+    if not words:
+        return []
+
+    if uses_fts():
+        # Only the word being typed is a prefix; earlier words are complete
+        # and exact terms are much cheaper for FTS5 to intersect.
+        match = ' '.join([f'"{word}"' for word in words[:-1]] + [f'"{words[-1]}"*'])
+        join, params = '', [match]
+        if storefront is not None:
+            join = f"JOIN store_product p ON p.id = {FTS_TABLE}.rowid AND p.storefront_id = %s "
+            params = [storefront, match]
+        # Ranked before the LIMIT, so strong matches among older products
+        # are not cut off by newer weak ones; newer products win ties
+        weights = ', '.join(str(weight) for weight in FTS_WEIGHTS)
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f"SELECT {FTS_TABLE}.rowid FROM {FTS_TABLE} {join}"
+                f"WHERE {FTS_TABLE} MATCH %s ORDER BY bm25({FTS_TABLE}, {weights}), {FTS_TABLE}.rowid DESC LIMIT %s",
+                params + [limit],
+            )
+            return [product_id for product_id, in cursor.fetchall()]
+
+    if connection.vendor == 'postgresql':
+        from django.contrib.postgres.search import SearchQuery, SearchRank, SearchVector
+
+        vector = (SearchVector('title', 'code', weight='A', config='simple')
+                  + SearchVector('category__name', 'subcategory__name', weight='B', config='simple')
+                  + SearchVector('description', weight='C', config='simple'))
+        tsquery = SearchQuery(' & '.join(words[:-1] + [f'{words[-1]}:*']), search_type='raw', config='simple')
+        products = Product.objects if storefront is None else Product.objects.filter(storefront_id=storefront)
+        return list(
+            products.annotate(document=vector, rank=SearchRank(vector, tsquery))
+            .filter(document=tsquery).order_by('-rank').values_list('id', flat=True)[:limit]
+        )
+
+    condition = Q() if storefront is None else Q(storefront_id=storefront)
+    for word in words:
+        condition &= (Q(title__icontains=word) | Q(code__icontains=word) | Q(description__icontains=word)
+                      | Q(category__name__icontains=word) | Q(subcategory__name__icontains=word))
+    return list(Product.objects.filter(condition).values_list('id', flat=True)[:limit])
+
+
+def search_products(query, limit=SEARCH_LIMIT, storefront=None):
+    """
+    Return the matching products as a queryset kept in rank order.
+    """
+    ids = search_ids(query, limit, storefront)
+    if not ids:
+        return Product.objects.none()
+    ranking = Case(*[When(id=product_id, then=position) for position, product_id in enumerate(ids)])
+    return Product.objects.filter(id__in=ids).order_by(ranking)
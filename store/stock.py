@@ -0,0 +1,86 @@
+from django.db import models, transaction
+from django.db.models import Case, F, Func, Q, Subquery, When
+from django.db.models.lookups import Exact
+
+from .models import Product
+
+
+def _merge(changes):
+    deltas = {}
+    for product_id, delta in changes.items() if isinstance(changes, dict) else changes:
+        deltas[product_id] = deltas.get(product_id, 0) + delta
+    return {product_id: delta for product_id, delta in deltas.items() if delta}
+
+
+def adjust(changes):
+    """
+    Apply signed stock ``changes``, given as {product_id: delta} or
+    (product_id, delta) pairs, with a single UPDATE however many products
+    there are. Only the inventory column is written.
+
+    A decrement only applies while the product has that much stock. The
+    check is part of the UPDATE's WHERE clause, so concurrent writers
+    cannot oversell. Changes are all or nothing: if any line fails,
+    nothing is applied and the ids of the failed products are returned,
+    sorted. An empty list means every line was applied.
+    """
+    deltas = _merge(changes)
+    if not deltas:
+        return []
+
+    applicable = Q()
+    for product_id, delta in deltas.items():
+        applicable |= Q(id=product_id, inventory__gte=-delta) if delta < 0 else Q(id=product_id)
+
+    try:
+        with transaction.atomic():
+            updated = Product.objects.filter(applicable).filter(_every_line(applicable, len(deltas))).update(
+                inventory=Case(
+                    *[When(id=product_id, then=F('inventory') + delta) for product_id, delta in deltas.items()],
+                    default=F('inventory'),
+                    output_field=models.PositiveIntegerField(),
+                ),
+            )
+            if updated and updated != len(deltas):
+                raise _PartialUpdate
+    except _PartialUpdate:
+        pass
+    else:
+        if updated:
+            return []
+
+    applied = set(Product.objects.filter(applicable).values_list('id', flat=True))
+    # A concurrent writer may have made every line applicable again since;
+    # nothing was applied, so the whole change still failed
+    return sorted(deltas.keys() - applied) or sorted(deltas)
+
+
+class _PartialUpdate(Exception):
+    pass
+
+
+def _every_line(applicable, lines):
+    # Makes the UPDATE touch no row unless every line can be applied. The
+    # subquery is not correlated, so PostgreSQL evaluates it once and not
+    # again after waiting on a row lock; adjust() rolls back the rare
+    # partial update that slips through.
+    return Exact(
+        Subquery(Product.objects.filter(applicable).order_by().values(lines=Func('id', function='COUNT'))),
+        lines,
+    )
+
+
+def reserve(quantities):
+    """
+    Take {product_id: qty} out of stock. Returns the ids of the products
+    that do not have enough, in which case nothing is taken.
+    """
+    return adjust({product_id: -qty for product_id, qty in _merge(quantities).items()})
+
+
+def release(quantities):
+    """
+    Put {product_id: qty} back into stock. Returns the ids of products
+    that no longer exist, in which case nothing is put back.
+    """
+    return adjust(quantities)
@@ -0,0 +1,53 @@
+from django.utils.functional import SimpleLazyObject
+
+from .models import MAIN_STOREFRONT_ID, Storefront
+
+# Storefronts change together with the URLconf that mounts them, so each
+# process loads the handful of rows once. Saving one clears this copy.
+_storefronts = {}
+
+
+def _load():
+    if not _storefronts:
+        for storefront in Storefront.objects.all():
+            _storefronts[storefront.pk] = _storefronts[storefront.slug] = storefront
+    return _storefronts
+
+
+def get_storefront(key=None):
+    """
+    Return the Storefront with id or slug ``key``, the main storefront by
+    default. Costs no queries once the storefronts are loaded.
+    """
+    return _load()[key or MAIN_STOREFRONT_ID]
+
+
+def clear_storefronts():
+    _storefronts.clear()
+
+
+def storefront_id(request):
+    """
+    The id of the storefront ``request`` is for, the main one for requests
+    that did not pass through StorefrontMiddleware.
+    """
+    storefront = getattr(request, 'storefront', None)
+    return storefront.pk if storefront is not None else MAIN_STOREFRONT_ID
+
+
+class StorefrontMiddleware:
+    """
+    Set ``request.storefront`` from the ``storefront`` slug that core.urls
+    passes to the views of each mounted storefront. Views never see the
+    slug; requests outside any storefront get the main one.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        request.storefront = SimpleLazyObject(lambda: get_storefront(request.__dict__.get('storefront_slug')))
+        return self.get_response(request)
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        request.storefront_slug = view_kwargs.pop('storefront', None)
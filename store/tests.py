@@ -1,3 +1,312 @@
-from django.test import TestCase
+from decimal import Decimal
+from functools import partial
+from unittest import mock
 
-# Create your tests here.
+from django.contrib.auth import get_user_model
+from django.contrib.auth.models import AnonymousUser
+from django.core.cache import cache
+from django.db import connection
+from django.db.models import Q
+from django.test import RequestFactory, TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from . import catalog, views
+from orders.models import InventoryMovement
+from core.instrumentation import TRANSACTION_STATEMENTS
+from core.testing import QueryBudgetAssertions, run_in_other_process
+from .models import MAIN_STOREFRONT_ID, Category, Product, SubCategory
+from .pagination import keyset_page
+from .search import SEARCH_LIMIT, index_products, search_ids
+from .stock import adjust, release, reserve
+from .storefronts import get_storefront
+
+
+class CategoryCacheTestCase(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.tiles = Category.objects.create(name='tiles', slug='tiles')
+        SubCategory.objects.create(name='floor', categories=cls.tiles)
+
+    def setUp(self):
+        cache.clear()
+        catalog._local.clear()
+
+    def test_steady_state_costs_no_queries(self):
+        catalog.get_category_tree()
+        with self.assertNumQueries(0):
+            tree = catalog.get_category_tree()
+            self.assertEqual([sub.name for sub in tree[0].subcategory_set.all()], ['floor'])
+
+    def test_save_and_delete_invalidate(self):
+        catalog.get_category_tree()
+        Category.objects.create(name='paint', slug='paint')
+        self.assertEqual(len(catalog.get_category_tree()), 2)
+
+        SubCategory.objects.all().delete()
+        tree = catalog.get_category_tree()
+        self.assertEqual([list(category.subcategory_set.all()) for category in tree], [[], []])
+
+    def test_shared_cache_serves_other_processes(self):
+        catalog.get_category_tree()
+        output = run_in_other_process(
+            'from store import catalog\n'
+            'print([sub.name for category in catalog.get_category_tree() for sub in category.subcategory_set.all()])\n'
+            'print(catalog.stats["shared_hits"], catalog.stats["misses"])'
+        )
+        # The other process has no test database to fall back on
+        self.assertEqual(output.split('\n')[:2], ["['floor']", '1 0'])
+
+    def test_other_processes_invalidate(self):
+        catalog.get_category_tree()
+        prices = catalog.price_version()
+        run_in_other_process('from store import catalog\n'
+                             'catalog.bump_catalog_version()\n'
+                             'catalog.bump_price_version()')
+        misses = catalog.stats['misses']
+        catalog.get_category_tree()
+        self.assertEqual(catalog.stats['misses'], misses + 1)
+        self.assertEqual(catalog.price_version(), prices + 1)
+
+
+class KeysetPaginationTestCase(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        user = get_user_model().objects.create(email='staff@example.com', user_name='staff')
+        created = timezone.now()
+        Product.objects.bulk_create([
+            Product(created_by=user, title=f'tile-{i}', slug=f'tile-{i}', price=Decimal('1.00'), created=created)
+            for i in range(5)
+        ])
+
+    def test_pages_cover_every_product_once(self):
+        seen, after = [], None
+        while True:
+            products, after = keyset_page(Product.objects.all(), after, per_page=2)
+            seen += [product.id for product in products]
+            if after is None:
+                break
+        self.assertEqual(sorted(seen), sorted(Product.objects.values_list('id', flat=True)))
+        self.assertEqual(len(seen), len(set(seen)))
+
+    def test_bad_token_starts_over(self):
+        first, _ = keyset_page(Product.objects.all(), None, per_page=2)
+        self.assertEqual(keyset_page(Product.objects.all(), 'garbage', per_page=2)[0], first)
+
+    def test_products_json(self):
+        response = self.client.get(reverse('store:products-json'))
+        self.assertEqual(len(response.json()['data']), 5)
+        self.assertIsNone(response.json()['next'])
+
+
+class SearchTestCase(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = get_user_model().objects.create(email='staff@example.com', user_name='staff')
+        cls.wall = Category.objects.create(name='wall', slug='wall')
+        cls.marble = Product.objects.create(created_by=cls.user, title='Carrara marble', code='CM-100',
+                                            slug='carrara', price=Decimal('5.00'), category=cls.wall)
+        cls.ceramic = Product.objects.create(created_by=cls.user, title='White ceramic', code='WC-200',
+                                             slug='white', price=Decimal('3.00'),
+                                             description='Looks like marble')
+
+    def test_prefix_and_ranking(self):
+        self.assertEqual(search_ids('marb'), [self.marble.id, self.ceramic.id])
+        self.assertEqual(search_ids('wc 20'), [self.ceramic.id])
+        self.assertEqual(search_ids('wall carr'), [self.marble.id])
+        self.assertEqual(search_ids('!!'), [])
+
+    def test_title_matches_outrank_many_newer_weak_matches(self):
+        newer = Product.objects.bulk_create([
+            Product(created_by=self.user, title=f'tile-{i}', slug=f'tile-{i}', price=Decimal('1.00'),
+                    description='Marble look')
+            for i in range(SEARCH_LIMIT * 12)
+        ])
+        index_products([product.id for product in newer])
+        ids = search_ids('marble')
+        self.assertEqual(len(ids), SEARCH_LIMIT)
+        self.assertEqual(ids[0], self.marble.id)
+        self.assertEqual(search_ids('marble', storefront=MAIN_STOREFRONT_ID)[0], self.marble.id)
+
+    def test_signals_keep_index_in_sync(self):
+        self.ceramic.title = 'Blue ceramic'
+        self.ceramic.save()
+        self.assertEqual(search_ids('blue'), [self.ceramic.id])
+
+        self.wall.name = 'bathroom'
+        self.wall.save()
+        self.assertEqual(search_ids('bathroom'), [self.marble.id])
+
+        self.marble.delete()
+        self.assertEqual(search_ids('carrara'), [])
+
+    def test_search_view(self):
+        response = self.client.get(reverse('store:search'), {'query': 'cm-1'})
+        self.assertEqual(list(response.context['products']), [self.marble])
+
+
+class CatalogJsonTestCase(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        tiles = Category.objects.create(name='tiles', slug='tiles')
+        SubCategory.objects.create(name='floor', categories=tiles)
+
+    def setUp(self):
+        cache.clear()
+
+    def test_matching_etag_gets_304_without_queries(self):
+        url = reverse('store:subcategory-json', args=['tiles'])
+        response = self.client.get(url)
+        self.assertEqual(response.json()['data'][0]['name'], 'floor')
+        self.assertIn('Last-Modified', response)
+
+        with self.assertNumQueries(0):
+            response = self.client.get(url, HTTP_IF_NONE_MATCH=response['ETag'])
+        self.assertEqual(response.status_code, 304)
+
+    def test_catalog_change_changes_etag(self):
+        url = reverse('store:category-json')
+        etag = self.client.get(url)['ETag']
+        with self.assertNumQueries(0):
+            self.client.get(url)
+
+        Category.objects.create(name='paint', slug='paint')
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.json()['data']), 2)
+
+
+class StorefrontTestCase(QueryBudgetAssertions, TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        user = get_user_model().objects.create(email='staff@example.com', user_name='staff')
+        cls.sj = get_storefront('sj')
+        cls.main_tiles = Category.objects.create(name='tiles', slug='tiles')
+        cls.sj_tiles = Category.objects.create(name='tiles', slug='tiles', storefront=cls.sj)
+        # Same title and slug in both storefronts
+        cls.main = Product.objects.create(created_by=user, title='Blazer', slug='blazer', price=Decimal('20.00'),
+                                          category=cls.main_tiles)
+        cls.sj_product = Product.objects.create(created_by=user, title='Blazer', slug='blazer',
+                                                price=Decimal('25.00'), category=cls.sj_tiles, storefront=cls.sj)
+
+    def setUp(self):
+        cache.clear()
+        catalog._local.clear()
+
+    def test_listings_are_per_storefront(self):
+        response = self.client.get(reverse('store:product_all'))
+        self.assertEqual(list(response.context['products']), [self.main])
+        self.assertTemplateUsed(response, 'store/home.html')
+
+        response = self.client.get(reverse('store:product_all', current_app='sj'))
+        self.assertEqual(list(response.context['products']), [self.sj_product])
+        self.assertTemplateUsed(response, 'sj/home.html')
+
+        response = self.client.get(reverse('store:search', current_app='sj'), {'query': 'blaz'})
+        self.assertEqual(list(response.context['products']), [self.sj_product])
+
+    def test_sj_home_links_to_the_next_page(self):
+        Product.objects.create(created_by=self.main.created_by, title='Cap', slug='cap', price=Decimal('5.00'),
+                               category=self.sj_tiles, storefront=self.sj)
+        one_per_page = partial(keyset_page, per_page=1)
+        with mock.patch('store.views.keyset_page', one_per_page):
+            response = self.client.get(reverse('store:product_all', current_app='sj'))
+        self.assertContains(response, f'href="?after={response.context["next_page"]}"')
+
+    def test_sj_category_links_to_the_next_page(self):
+        Product.objects.create(created_by=self.main.created_by, title='Cap', slug='cap', price=Decimal('5.00'),
+                               category=self.sj_tiles, storefront=self.sj)
+        with mock.patch('store.views.keyset_page', partial(keyset_page, per_page=1)):
+            response = self.client.get(self.sj_tiles.get_absolute_url())
+        self.assertTemplateUsed(response, 'sj/products/category.html')
+        self.assertContains(response, f'href="?after={response.context["next_page"]}"')
+
+    def test_landing_is_per_storefront(self):
+        # all_products has no URL of its own
+        request = RequestFactory().get('/')
+        request.storefront, request.session, request.user = self.sj, self.client.session, AnonymousUser()
+        with self.assertTemplateUsed('sj/landing.html'), \
+                mock.patch('store.views.catalog.category_data', wraps=catalog.category_data) as category_data:
+            views.all_products(request)
+        category_data.assert_called_once_with(self.sj.pk)
+
+    def test_home_within_query_budget(self):
+        for url in (reverse('store:product_all'), reverse('store:product_all', current_app='sj')):
+            self.client.get(url)
+            response = self.client.get(url)
+            self.assertWithinBudget(response)
+            self.assertIn('db;dur=', response['Server-Timing'])
+
+    def test_urls_follow_the_storefront(self):
+        self.assertEqual(self.main.get_absolute_url(), '/blazer')
+        self.assertEqual(self.sj_product.get_absolute_url(), '/sjshop/blazer')
+        self.assertEqual(self.sj_tiles.get_absolute_url(), '/sjshop/shop/tiles/')
+
+        response = self.client.get(self.sj_product.get_absolute_url())
+        self.assertEqual(response.context['product'], self.sj_product)
+        response = self.client.get(self.sj_tiles.get_absolute_url())
+        self.assertEqual(list(response.context['products']), [self.sj_product])
+
+    def test_category_tree_per_storefront(self):
+        self.assertEqual(catalog.get_category_tree(), [self.main_tiles])
+        self.assertEqual(catalog.get_category_tree(self.sj.pk), [self.sj_tiles])
+        self.assertEqual(catalog.get_category_tree(MAIN_STOREFRONT_ID), [self.main_tiles])
+
+
+class StockTestCase(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        user = get_user_model().objects.create(email='stock@example.com', user_name='stock')
+        cls.a, cls.b = Product.objects.bulk_create([
+            Product(created_by=user, title=title, slug=title, price=Decimal('1.00'), inventory=5)
+            for title in ('a', 'b')
+        ])
+
+    def inventory(self):
+        return dict(Product.objects.values_list('id', 'inventory'))
+
+    def test_reserve_is_one_update(self):
+        updated = Product.objects.get(pk=self.a.pk).updated
+        with CaptureQueriesContext(connection) as ctx:
+            self.assertEqual(reserve({self.a.id: 2, self.b.id: 5}), [])
+        self.assertEqual(len([query for query in ctx.captured_queries
+                              if not query['sql'].startswith(TRANSACTION_STATEMENTS)]), 1)
+        self.assertEqual(self.inventory(), {self.a.id: 3, self.b.id: 0})
+        self.assertEqual(Product.objects.get(pk=self.a.pk).updated, updated)
+
+    def test_failed_lines_are_reported_and_nothing_is_taken(self):
+        self.assertEqual(reserve({self.a.id: 2, self.b.id: 6, 999: 1}), [self.b.id, 999])
+        self.assertEqual(self.inventory(), {self.a.id: 5, self.b.id: 5})
+
+    def test_partial_update_is_rolled_back(self):
+        # What a concurrent checkout can cause on PostgreSQL, where the
+        # all-lines guard is not re-checked after a row lock wait
+        with mock.patch('store.stock._every_line', return_value=Q()):
+            self.assertEqual(reserve({self.a.id: 2, self.b.id: 6}), [self.b.id])
+        self.assertEqual(self.inventory(), {self.a.id: 5, self.b.id: 5})
+
+    def test_release_and_adjust(self):
+        self.assertEqual(release({self.a.id: 3}), [])
+        self.assertEqual(adjust([(self.a.id, -8), (self.b.id, 1), (self.b.id, -6)]), [])
+        self.assertEqual(self.inventory(), {self.a.id: 0, self.b.id: 0})
+
+    def test_movement_admin_applies_stock_changes(self):
+        admin = get_user_model().objects.create(email='boss@example.com', user_name='boss', is_staff=True,
+                                                is_superuser=True, is_active=True)
+        self.client.force_login(admin)
+        url = reverse('admin:orders_inventorymovement_add')
+        response = self.client.post(url, {'product': self.a.id, 'movement_type': 'OUT', 'quantity': 4})
+        self.assertEqual(response.status_code, 302)
+        self.assertEqual(self.inventory()[self.a.id], 1)
+
+        movement = InventoryMovement.objects.get()
+        self.client.post(reverse('admin:orders_inventorymovement_change', args=[movement.pk]),
+                         {'product': self.a.id, 'movement_type': 'OUT', 'quantity': 2})
+        self.assertEqual(self.inventory()[self.a.id], 3)
@@ -9,7 +9,9 @@ urlpatterns = [
     path('<slug:slug>', views.product_detail, name='product_detail'),
     path('shop/<slug:category_slug>/', views.category_list, name='category_list'),
     path('search/', views.searchBar, name='search'),
+    path('products-json/', views.products_json, name='products-json'),
     path('category-json/', views.get_json_category_data, name='category-json'),
     path('subcategory-json/<str:cat>/', views.get_json_subcategory_data, name='subcategory-json'),
     path('subcategory/', views.get_subcategory, name='subcategory'),
+    path('metrics/catalog-cache/', views.catalog_cache_stats, name='catalog-cache-stats'),
 ]
\ No newline at end of file
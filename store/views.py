@@ -1,54 +1,87 @@
 from django.shortcuts import get_object_or_404, render
 from django.http import JsonResponse
+from django.views.decorators.cache import cache_control
+from django.views.decorators.http import condition
 from .models import Category, Product, SubCategory
+from . import catalog
+from .pagination import keyset_page
+from .search import search_products
+from .storefronts import storefront_id
+from core.instrumentation import query_budget
 
 
+@query_budget(3)
 def product_all(request):
-    products = Product.products.all().filter(in_stock=True)
-    return render(request, 'store/home.html', {'products': products})
+    products = Product.products.filter(storefront_id=storefront_id(request), in_stock=True)
+    products, next_page = keyset_page(products, request.GET.get('after'))
+    return render(request, request.storefront.template('home.html'), {'products': products, 'next_page': next_page})
 
 def all_products(request):
-    products = Product.products.all().filter(in_stock=True)
-    category = Category.objects.values()
-    print(category)
-    return render(request, 'store/landing.html', {'products': products, 'category':category})
+    products = Product.products.filter(storefront_id=storefront_id(request), in_stock=True)
+    products, next_page = keyset_page(products, request.GET.get('after'))
+    category = catalog.category_data(storefront_id(request))
+    return render(request, request.storefront.template('landing.html'),
+                  {'products': products, 'category': category, 'next_page': next_page})
 
+def products_json(request):
+    products = Product.products.filter(storefront_id=storefront_id(request), in_stock=True)
+    if request.GET.get('category'):
+        products = products.filter(category__slug=request.GET['category'])
+    products, next_page = keyset_page(products, request.GET.get('after'))
+    data = [{
+        'id': product.id,
+        'title': product.title,
+        'code': product.code,
+        'price': product.price,
+        'inventory': product.inventory,
+        'image': product.image.url,
+        'url': product.get_absolute_url(),
+    } for product in products]
+    return JsonResponse({'data': data, 'next': next_page})
+
+def catalog_etag(request, *args, **kwargs):
+    return f'catalog-{storefront_id(request)}-{catalog.catalog_version()}'
+
+def catalog_last_modified(request, *args, **kwargs):
+    return catalog.catalog_last_modified()
+
+# Browsers revalidate on every poll and get a 304 until the catalog changes
+@cache_control(no_cache=True)
+@condition(etag_func=catalog_etag, last_modified_func=catalog_last_modified)
 def get_json_category_data(request):
-    qs_val = list(Category.objects.values())
-    return JsonResponse({'data':qs_val})
+    return JsonResponse({'data': catalog.category_data(storefront_id(request))})
 
+@cache_control(no_cache=True)
+@condition(etag_func=catalog_etag, last_modified_func=catalog_last_modified)
 def get_json_subcategory_data(request, *args, **kwargs):
     selected_cat = kwargs.get('cat')
-    obj_subcat = list(SubCategory.objects.filter(categories__name=selected_cat).values())
-    return JsonResponse({'data': obj_subcat})
+    return JsonResponse({'data': catalog.subcategory_data(selected_cat, storefront_id(request))})
 
 def category_list(request, category_slug=None):
-    category = get_object_or_404(Category, slug=category_slug)
-    products = Product.objects.filter(category=category)
-    return render(request, 'store/products/category.html', {'category': category, 'products': products})
+    category = get_object_or_404(Category, storefront_id=storefront_id(request), slug=category_slug)
+    products, next_page = keyset_page(Product.objects.filter(category=category), request.GET.get('after'))
+    return render(request, request.storefront.template('products/category.html'),
+                  {'category': category, 'products': products, 'next_page': next_page})
 
 def product_detail(request, slug):
-    product = get_object_or_404(Product, slug=slug, in_stock=True)
-    return render(request, 'store/products/single.html', {'product': product})
+    product = get_object_or_404(Product, storefront_id=storefront_id(request), slug=slug, in_stock=True)
+    return render(request, request.storefront.template('products/single.html'), {'product': product})
 
 def searchBar(request):
     if request.method == 'GET':
         query = request.GET.get('query')
         if query:
-            products = Product.objects.filter(code__icontains=query)
-            return render(request, 'store/searchbar.html', {'products': products})
+            products = search_products(query, storefront=storefront_id(request))
+            return render(request, request.storefront.template('searchbar.html'), {'products': products})
         else:
-            print("No info to show")
-            return request(request, 'store/searchbar.html', {})    
+            return render(request, request.storefront.template('searchbar.html'), {})
         
 def get_subcategory(request):
-    user_id = request.user.id
-    csrf = request.GET.get('csrfmiddlewaretoken')
-    print(csrf)
     cat = request.GET.get('cat')
-    print(cat)
     subcat = request.GET.get('subcat')
-    products = Product.objects.filter(in_stock=True).filter(category__name__contains=cat).filter(subcategory__name__contains=subcat)
-    print(products)
-    return render(request, 'store/products/subcategory.html', {'products':products})
+    products = Product.objects.filter(storefront_id=storefront_id(request), in_stock=True).filter(category__name__contains=cat).filter(subcategory__name__contains=subcat)
+    return render(request, request.storefront.template('products/subcategory.html'), {'products':products})
+
 
+def catalog_cache_stats(request):
+    return JsonResponse({'version': catalog.catalog_version(), **catalog.stats})